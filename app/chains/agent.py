@@ -1,12 +1,10 @@
 from typing import Annotated, TypedDict, Optional, Literal, Callable
 
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_anthropic import ChatAnthropic
-from langchain_aws import ChatBedrock
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable, RunnableConfig
-from langchain_core.messages import ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
 from langgraph.prebuilt.tool_node import tools_condition
 from langgraph.graph.message import AnyMessage, add_messages
@@ -15,6 +13,7 @@ from dotenv import load_dotenv
 from app.tools.stock_stats import (
     get_gainers,
     get_losers,
+    get_intraday_movers,
     get_stock_price_history,
     get_stock_quantstats,
     get_stock_ratios,
@@ -30,12 +29,34 @@ from app.tools.risk_management import (
     calculate_r_multiples,
     calculate_technical_stops,
     calculate_position_size,
+    calculate_risk_plan,
+    simulate_trade_outcomes,
 )
+from app.tools.stock_backtest import backtest_bullish_setups
+from app.tools.portfolio_analytics import analyze_portfolio
+from app.tools.symbol_lookup import resolve_symbol
+from app.tools.web_search import web_search
 from app.tools.utils import create_tool_node_with_fallback
+from app.chains.models import get_llm
+from app.features.deadline import (
+    DeadlineExceeded,
+    call_llm_with_deadline,
+    deadline_scope,
+)
+from app.features.scheduler import Priority
+from app.chains.router import FastRouter
+from app.chains.streaming import INCOMPLETE
 from app.chains.templates import *
 
+import os
+
 load_dotenv()
 
+FAST_ROUTER_ENABLED = os.environ.get("FAST_ROUTER_ENABLED", "true").lower() == "true"
+
+# Re-prompts when a model returns neither text nor tool calls, before giving up.
+MAX_EMPTY_RESPONSE_RETRIES = 2
+
 
 def update_dialog_stack(left: list[str], right: Optional[str]) -> list[str]:
     """Push or pop the state."""
@@ -98,25 +119,60 @@ class ToGainersLosersAssistant(BaseModel):
     )
 
 
+def create_partial_answer(messages: list[AnyMessage]) -> AIMessage:
+    """
+    Answer with the observations gathered so far when the request runs out of time.
+
+    The answer is marked INCOMPLETE, so it is never cached.
+    """
+    last_question = max(
+        (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1
+    )
+    observations = [
+        m.content.strip()
+        for m in messages[last_question + 1 :]
+        if isinstance(m, ToolMessage)
+        and isinstance(m.content, str)
+        and "<observation>" in m.content
+        and "Error:" not in m.content
+    ]
+
+    if not observations:
+        return AIMessage(
+            content="I ran out of time before I could gather any data for this request. Please try again.",
+            additional_kwargs={INCOMPLETE: "deadline"},
+        )
+
+    return AIMessage(
+        content="I ran out of time before finishing this analysis. Here is the data I gathered so far:\n\n"
+        + "\n\n".join(observations),
+        additional_kwargs={INCOMPLETE: "deadline"},
+    )
+
+
 class Assistant:
     def __init__(self, runnable: Runnable):
         self.runnable = runnable
 
     def __call__(self, state: AgentState, config: RunnableConfig):
-        while True:
-            result = self.runnable.invoke(state)
-
-            if not result.tool_calls and (
-                not result.content
-                or isinstance(result.content, list)
-                and not result.content[0].get("text")
-            ):
-                messages = state["messages"] + [("user", "Respond with a real output.")]
-                state = {**state, "messages": messages}
-                messages = state["messages"] + [("user", "Respond with a real output.")]
-                state = {**state, "messages": messages}
-            else:
-                break
+        with deadline_scope(config):
+            for _ in range(MAX_EMPTY_RESPONSE_RETRIES + 1):
+                try:
+                    result = call_llm_with_deadline(self.runnable.invoke, state, config)
+                except DeadlineExceeded:
+                    return {"messages": create_partial_answer(state["messages"])}
+
+                if not result.tool_calls and (
+                    not result.content
+                    or isinstance(result.content, list)
+                    and not result.content[0].get("text")
+                ):
+                    messages = state["messages"] + [
+                        ("user", "Respond with a real output.")
+                    ]
+                    state = {**state, "messages": messages}
+                else:
+                    break
         return {"messages": result}
 
 
@@ -127,7 +183,13 @@ def create_full_scan_agent(llm: Runnable) -> Assistant:
             ("placeholder", "{messages}"),
         ]
     )
-    scan_tools = [get_stock_universe, get_stock_price_history, get_stock_quantstats]
+    scan_tools = [
+        get_stock_universe,
+        get_stock_price_history,
+        get_stock_quantstats,
+        backtest_bullish_setups,
+        analyze_portfolio,
+    ]
     runnable = prompt | llm.bind_tools(scan_tools)
     return Assistant(runnable)
 
@@ -173,6 +235,8 @@ def create_risk_management_agent(llm: Runnable) -> Assistant:
         ]
     )
     risk_tools = [
+        calculate_risk_plan,
+        simulate_trade_outcomes,
         calculate_technical_stops,
         calculate_r_multiples,
         calculate_position_size,
@@ -188,7 +252,7 @@ def create_gainers_losers_agent(llm: Runnable) -> Assistant:
             ("placeholder", "{messages}"),
         ]
     )
-    runnable = prompt | llm.bind_tools([get_gainers, get_losers])
+    runnable = prompt | llm.bind_tools([get_gainers, get_losers, get_intraday_movers])
     return Assistant(runnable)
 
 
@@ -199,7 +263,7 @@ def create_primary_assistant(llm: Runnable) -> Assistant:
             ("placeholder", "{messages}"),
         ]
     )
-    tools = [TavilySearchResults(max_results=1)]
+    tools = [resolve_symbol, web_search()]
     runnable = prompt | llm.bind_tools(
         tools
         + [
@@ -213,23 +277,132 @@ def create_primary_assistant(llm: Runnable) -> Assistant:
     return Assistant(runnable)
 
 
+def create_merge_assistant(llm: Runnable) -> Assistant:
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", MERGE_TEMPLATE),
+            ("placeholder", "{messages}"),
+        ]
+    )
+    # The history holds tool_use blocks for the handoffs, so the same tools have to be bound.
+    runnable = prompt | llm.bind_tools(
+        [
+            resolve_symbol,
+            web_search(),
+            ToFullScanAssistant,
+            ToFullAnalysisAssistant,
+            ToChartAnalysisAssistant,
+            ToRiskManagementAssistant,
+            ToGainersLosersAssistant,
+        ]
+    )
+    return Assistant(runnable)
+
+
+def create_entry_message(assistant_name: str, tool_call_id: str) -> ToolMessage:
+    return ToolMessage(
+        content=f"The assistant is now the {assistant_name}. Reflect on the above conversation between the host assistant and the user."
+        f" The user's intent is unsatisfied. Use the provided tools to assist the user. Remember, you are {assistant_name},"
+        " and actions are not complete until after you have successfully invoked the appropriate tool."
+        " Do not mention who you are - just act as the proxy for the assistant.",
+        tool_call_id=tool_call_id,
+    )
+
+
 def create_entry_node(assistant_name: str, new_dialog_state: str) -> Callable:
     def entry_node(state: AgentState) -> dict:
         tool_call_id = state["messages"][-1].tool_calls[0]["id"]
+        return {
+            "messages": [create_entry_message(assistant_name, tool_call_id)],
+            "dialog_state": new_dialog_state,
+        }
+
+    return entry_node
+
+
+def create_specialist_graph(assistant: Assistant, tool_node: Runnable) -> StateGraph:
+    """Compile a specialist and its tools as a standalone loop, for use as a parallel branch."""
+    builder = StateGraph(AgentState)
+    builder.add_node("assistant", assistant)
+    builder.add_node("tools", tool_node)
+    builder.add_edge("tools", "assistant")
+    builder.add_conditional_edges("assistant", tools_condition)
+    builder.set_entry_point("assistant")
+    return builder.compile()
+
+
+def create_fan_out_node(
+    branches: dict[str, tuple[str, StateGraph]], tools: Optional[list] = None
+) -> Callable:
+    """
+    Run several specialist handoffs from one turn in parallel.
+
+    Each `To*Assistant` call runs in its own branch, seeded with the conversation so far
+    and only its own tool call, so wall time is that of the slowest specialist. Every
+    branch's final answer comes back as the ToolMessage for its call. Regular tool
+    calls made in the same turn (e.g. a web search next to a handoff) run alongside
+    them, so every tool_use id is answered before the merge node calls the model again.
+
+    Args:
+        branches (dict[str, tuple[str, StateGraph]]): Handoff tool name -> (assistant name, compiled specialist graph).
+        tools (list): The primary assistant's own tools.
+
+    Returns:
+        Callable: The graph node.
+    """
+    tools_by_name = {tool.name: tool for tool in tools or []}
+
+    def fan_out_node(state: AgentState, config: RunnableConfig) -> dict:
+        handoff = state["messages"][-1]
+        history = state["messages"][:-1]
+        branch_config = {
+            **config,
+            "configurable": {
+                key: value
+                for key, value in config.get("configurable", {}).items()
+                if not key.startswith("__pregel")
+            },
+        }
+
+        def run_branch(tool_call: dict) -> str:
+            if tool_call["name"] in tools_by_name:
+                with deadline_scope(branch_config):
+                    tool = tools_by_name[tool_call["name"]]
+                    return str(tool.invoke(tool_call["args"], branch_config))
+            if tool_call["name"] not in branches:
+                raise ValueError(f"{tool_call['name']} is not a valid tool")
+
+            assistant_name, graph = branches[tool_call["name"]]
+            messages = history + [
+                AIMessage(content=handoff.content, tool_calls=[tool_call]),
+                create_entry_message(assistant_name, tool_call["id"]),
+            ]
+            result = graph.invoke({"messages": messages}, branch_config)
+            answer = result["messages"][-1].content
+            if isinstance(answer, list):
+                answer = "\n".join(
+                    block.get("text", "") for block in answer if isinstance(block, dict)
+                )
+            return answer
+
+        answers = RunnableLambda(run_branch).batch(
+            handoff.tool_calls, branch_config, return_exceptions=True
+        )
         return {
             "messages": [
                 ToolMessage(
-                    content=f"The assistant is now the {assistant_name}. Reflect on the above conversation between the host assistant and the user."
-                    f" The user's intent is unsatisfied. Use the provided tools to assist the user. Remember, you are {assistant_name},"
-                    " and actions are not complete until after you have successfully invoked the appropriate tool."
-                    " Do not mention who you are - just act as the proxy for the assistant.",
-                    tool_call_id=tool_call_id,
+                    content=(
+                        f"Error: {repr(answer)}"
+                        if isinstance(answer, Exception)
+                        else answer
+                    ),
+                    tool_call_id=tool_call["id"],
                 )
-            ],
-            "dialog_state": new_dialog_state,
+                for tool_call, answer in zip(handoff.tool_calls, answers)
+            ]
         }
 
-    return entry_node
+    return fan_out_node
 
 
 def should_continue(state: AgentState) -> Literal[
@@ -258,23 +431,39 @@ def should_continue(state: AgentState) -> Literal[
             "get_stock_quantstats",
         ]:
             return "analyze_stocks_tools"
-        elif tool_name == "get_stock_universe":
+        elif tool_name in [
+            "get_stock_universe",
+            "backtest_bullish_setups",
+            "analyze_portfolio",
+        ]:
             return "scan_stocks_tools"
         elif tool_name == "get_stock_chart_analysis":
             return "chart_analysis_tools"
         elif tool_name in [
+            "calculate_risk_plan",
+            "simulate_trade_outcomes",
             "calculate_technical_stops",
             "calculate_r_multiples",
             "calculate_position_size",
         ]:
             return "risk_management_tools"
-        elif tool_name in ["get_gainers", "get_losers"]:
+        elif tool_name in ["get_gainers", "get_losers", "get_intraday_movers"]:
             return "gainers_losers_tools"
     return END
 
 
+HANDOFF_TOOLS = {
+    ToFullScanAssistant.__name__,
+    ToFullAnalysisAssistant.__name__,
+    ToChartAnalysisAssistant.__name__,
+    ToRiskManagementAssistant.__name__,
+    ToGainersLosersAssistant.__name__,
+}
+
+
 def route_primary_assistant(state: AgentState) -> Literal[
     "primary_assistant_tools",
+    "fan_out_specialists",
     "enter_scan_stocks",
     "enter_analyze_stocks",
     "enter_chart_analysis",
@@ -288,6 +477,12 @@ def route_primary_assistant(state: AgentState) -> Literal[
 
     tool_calls = state["messages"][-1].tool_calls
     if tool_calls:
+        # Several calls including a handoff all go to the fan-out, which answers every
+        # tool_use id; a single specialist's entry node would only answer the first.
+        if len(tool_calls) > 1 and any(
+            tc["name"] in HANDOFF_TOOLS for tc in tool_calls
+        ):
+            return "fan_out_specialists"
         if tool_calls[0]["name"] == ToFullScanAssistant.__name__:
             return "enter_scan_stocks"
         elif tool_calls[0]["name"] == ToFullAnalysisAssistant.__name__:
@@ -302,129 +497,213 @@ def route_primary_assistant(state: AgentState) -> Literal[
     raise ValueError("Invalid route")
 
 
-def create_anthropic_agent_graph() -> StateGraph:
-    llm = ChatAnthropic(temperature=0, model_name="claude-3-opus-20240229")
-    # llm = ChatBedrock(
-    #     region_name="us-east-1",
-    #     credentials_profile_name="deploy",
-    #     model_id="anthropic.claude-3-sonnet-20240229-v1:0",
-    #     model_kwargs={"temperature": 0},
-    # )
-
+def route_fast_router(state: AgentState) -> Literal[
+    "primary_assistant",
+    "fan_out_specialists",
+    "enter_scan_stocks",
+    "enter_analyze_stocks",
+    "enter_chart_analysis",
+    "enter_risk_management",
+    "enter_gainers_losers",
+]:
+    if not getattr(state["messages"][-1], "tool_calls", None):
+        return "primary_assistant"
+    return route_primary_assistant(state)
+
+
+def create_anthropic_agent_graph(
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    llm_for: Callable[[str], Runnable] = get_llm,
+) -> StateGraph:
+    """
+    Build the multi-agent graph.
+
+    Args:
+        checkpointer (Optional[BaseCheckpointSaver]): Where to persist conversation state.
+        llm_for (Callable[[str], Runnable]): Returns the model for a node name. Defaults to
+            `get_llm`, which reads the per-node model configuration.
+
+    Returns:
+        StateGraph: The compiled graph.
+    """
     builder = StateGraph(AgentState)
 
     # Scan Assistant
+    scan_agent = create_full_scan_agent(llm_for("scan_stocks"))
+    scan_tools = create_tool_node_with_fallback(
+        [
+            get_stock_universe,
+            get_stock_price_history,
+            get_stock_quantstats,
+            backtest_bullish_setups,
+            analyze_portfolio,
+        ],
+        priority=Priority.SCAN,
+    )
     builder.add_node(
         "enter_scan_stocks",
         create_entry_node("Stock Scan Assistant", "scan_stocks"),
     )
-    builder.add_node("scan_stocks", create_full_scan_agent(llm))
+    builder.add_node("scan_stocks", scan_agent)
     builder.add_edge("enter_scan_stocks", "scan_stocks")
-    builder.add_node(
-        "scan_stocks_tools",
-        create_tool_node_with_fallback(
-            [get_stock_universe, get_stock_price_history, get_stock_quantstats]
-        ),
-    )
+    builder.add_node("scan_stocks_tools", scan_tools)
     builder.add_edge("scan_stocks_tools", "scan_stocks")
     builder.add_conditional_edges("scan_stocks", should_continue)
 
     # Analysis Assistant
+    analysis_agent = create_full_analysis_agent(llm_for("analyze_stocks"))
+    analysis_tools = create_tool_node_with_fallback(
+        [
+            get_stock_price_history,
+            get_key_metrics,
+            get_stock_ratios,
+            get_stock_sector_info,
+            get_valuation_multiples,
+            get_news_sentiment,
+            get_relative_strength,
+            get_stock_quantstats,
+        ]
+    )
     builder.add_node(
         "enter_analyze_stocks",
         create_entry_node("Stock Analysis Assistant", "analyze_stocks"),
     )
-    builder.add_node("analyze_stocks", create_full_analysis_agent(llm))
+    builder.add_node("analyze_stocks", analysis_agent)
     builder.add_edge("enter_analyze_stocks", "analyze_stocks")
-    builder.add_node(
-        "analyze_stocks_tools",
-        create_tool_node_with_fallback(
-            [
-                get_stock_price_history,
-                get_key_metrics,
-                get_stock_ratios,
-                get_stock_sector_info,
-                get_valuation_multiples,
-                get_news_sentiment,
-                get_relative_strength,
-                get_stock_quantstats,
-            ]
-        ),
-    )
+    builder.add_node("analyze_stocks_tools", analysis_tools)
     builder.add_edge("analyze_stocks_tools", "analyze_stocks")
     builder.add_conditional_edges("analyze_stocks", should_continue)
 
     # Chart Assistant
+    chart_agent = create_chart_analysis_agent(llm_for("chart_analysis"))
+    chart_tools = create_tool_node_with_fallback([get_stock_chart_analysis])
     builder.add_node(
         "enter_chart_analysis",
         create_entry_node("Stock Chart Analysis Assistant", "chart_analysis"),
     )
-    builder.add_node("chart_analysis", create_chart_analysis_agent(llm))
+    builder.add_node("chart_analysis", chart_agent)
     builder.add_edge("enter_chart_analysis", "chart_analysis")
-    builder.add_node(
-        "chart_analysis_tools",
-        create_tool_node_with_fallback([get_stock_chart_analysis]),
-    )
+    builder.add_node("chart_analysis_tools", chart_tools)
     builder.add_edge("chart_analysis_tools", "chart_analysis")
     builder.add_conditional_edges("chart_analysis", should_continue)
 
     # Risk Management Assistant
+    risk_agent = create_risk_management_agent(llm_for("risk_management"))
+    risk_tools = create_tool_node_with_fallback(
+        [
+            calculate_risk_plan,
+            simulate_trade_outcomes,
+            calculate_technical_stops,
+            calculate_r_multiples,
+            calculate_position_size,
+        ]
+    )
     builder.add_node(
         "enter_risk_management",
         create_entry_node("Stock Risk Management Assistant", "risk_management"),
     )
-    builder.add_node("risk_management", create_risk_management_agent(llm))
+    builder.add_node("risk_management", risk_agent)
     builder.add_edge("enter_risk_management", "risk_management")
-    builder.add_node(
-        "risk_management_tools",
-        create_tool_node_with_fallback(
-            [
-                calculate_technical_stops,
-                calculate_r_multiples,
-                calculate_position_size,
-            ]
-        ),
-    )
+    builder.add_node("risk_management_tools", risk_tools)
     builder.add_edge("risk_management_tools", "risk_management")
     builder.add_conditional_edges("risk_management", should_continue)
 
     # Gainers/Losers Assistant
+    gainers_losers_agent = create_gainers_losers_agent(llm_for("gainers_losers"))
+    gainers_losers_tools = create_tool_node_with_fallback(
+        [get_gainers, get_losers, get_intraday_movers]
+    )
     builder.add_node(
         "enter_gainers_losers",
         create_entry_node("Stock Gainers/Losers Assistant", "gainers_losers"),
     )
-    builder.add_node("gainers_losers", create_gainers_losers_agent(llm))
+    builder.add_node("gainers_losers", gainers_losers_agent)
     builder.add_edge("enter_gainers_losers", "gainers_losers")
-    builder.add_node(
-        "gainers_losers_tools",
-        create_tool_node_with_fallback([get_gainers, get_losers]),
-    )
+    builder.add_node("gainers_losers_tools", gainers_losers_tools)
     builder.add_edge("gainers_losers_tools", "gainers_losers")
     builder.add_conditional_edges("gainers_losers", should_continue)
 
+    # Parallel Specialists
+    builder.add_node(
+        "fan_out_specialists",
+        create_fan_out_node(
+            {
+                ToFullScanAssistant.__name__: (
+                    "Stock Scan Assistant",
+                    create_specialist_graph(scan_agent, scan_tools),
+                ),
+                ToFullAnalysisAssistant.__name__: (
+                    "Stock Analysis Assistant",
+                    create_specialist_graph(analysis_agent, analysis_tools),
+                ),
+                ToChartAnalysisAssistant.__name__: (
+                    "Stock Chart Analysis Assistant",
+                    create_specialist_graph(chart_agent, chart_tools),
+                ),
+                ToRiskManagementAssistant.__name__: (
+                    "Stock Risk Management Assistant",
+                    create_specialist_graph(risk_agent, risk_tools),
+                ),
+                ToGainersLosersAssistant.__name__: (
+                    "Stock Gainers/Losers Assistant",
+                    create_specialist_graph(gainers_losers_agent, gainers_losers_tools),
+                ),
+            },
+            tools=[resolve_symbol, web_search()],
+        ),
+    )
+    builder.add_node(
+        "merge_specialists", create_merge_assistant(llm_for("merge_specialists"))
+    )
+    builder.add_edge("fan_out_specialists", "merge_specialists")
+
     # Primary Assistant
-    builder.add_node("primary_assistant", create_primary_assistant(llm))
+    primary_routes = {
+        "enter_scan_stocks": "enter_scan_stocks",
+        "enter_analyze_stocks": "enter_analyze_stocks",
+        "enter_chart_analysis": "enter_chart_analysis",
+        "enter_risk_management": "enter_risk_management",
+        "enter_gainers_losers": "enter_gainers_losers",
+        "fan_out_specialists": "fan_out_specialists",
+        "primary_assistant_tools": "primary_assistant_tools",
+        END: END,
+    }
+    builder.add_node(
+        "primary_assistant", create_primary_assistant(llm_for("primary_assistant"))
+    )
     builder.add_node(
         "primary_assistant_tools",
-        create_tool_node_with_fallback([TavilySearchResults(max_results=1)]),
+        create_tool_node_with_fallback([resolve_symbol, web_search()]),
+    )
+    builder.add_conditional_edges(
+        "primary_assistant", route_primary_assistant, primary_routes
     )
     builder.add_conditional_edges(
-        "primary_assistant",
-        route_primary_assistant,
-        {
-            "enter_scan_stocks": "enter_scan_stocks",
-            "enter_analyze_stocks": "enter_analyze_stocks",
-            "enter_chart_analysis": "enter_chart_analysis",
-            "enter_risk_management": "enter_risk_management",
-            "enter_gainers_losers": "enter_gainers_losers",
-            "primary_assistant_tools": "primary_assistant_tools",
-            END: END,
-        },
+        "merge_specialists", route_primary_assistant, primary_routes
     )
     builder.add_edge("primary_assistant_tools", "primary_assistant")
-    builder.set_entry_point("primary_assistant")
 
-    graph = builder.compile()
+    # Fast-path Router
+    if FAST_ROUTER_ENABLED:
+        builder.add_node("fast_router", FastRouter())
+        builder.add_conditional_edges(
+            "fast_router",
+            route_fast_router,
+            {
+                "enter_scan_stocks": "enter_scan_stocks",
+                "enter_analyze_stocks": "enter_analyze_stocks",
+                "enter_chart_analysis": "enter_chart_analysis",
+                "enter_risk_management": "enter_risk_management",
+                "enter_gainers_losers": "enter_gainers_losers",
+                "fan_out_specialists": "fan_out_specialists",
+                "primary_assistant": "primary_assistant",
+            },
+        )
+        builder.set_entry_point("fast_router")
+    else:
+        builder.set_entry_point("primary_assistant")
+
+    graph = builder.compile(checkpointer=checkpointer)
     return graph
 
 
@@ -0,0 +1,181 @@
+import os
+import time
+import atexit
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+from typing import AsyncIterator, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+CHECKPOINT_DB = os.environ.get("CHECKPOINT_DB", ".data/checkpoints.sqlite")
+CHECKPOINT_COMMIT_EVERY = int(os.environ.get("CHECKPOINT_COMMIT_EVERY", "8"))
+CHECKPOINT_PRUNE_EVERY = int(os.environ.get("CHECKPOINT_PRUNE_EVERY", "16"))
+CHECKPOINT_KEEP_PER_THREAD = int(os.environ.get("CHECKPOINT_KEEP_PER_THREAD", "20"))
+CHECKPOINT_MAX_AGE_DAYS = int(os.environ.get("CHECKPOINT_MAX_AGE_DAYS", "7"))
+
+
+class BatchedSqliteSaver(SqliteSaver):
+    """
+    A SqliteSaver that batches commits and prunes old checkpoints.
+
+    LangGraph writes a checkpoint after every superstep, and the stock saver commits
+    each one. Here writes accumulate in the open transaction and are committed every
+    `commit_every` writes (or on `flush()`), with WAL journaling so readers are never
+    blocked. Every `prune_every` commits, only the newest `keep_per_thread` checkpoints
+    of each thread are kept and threads idle for more than `max_age_days` are dropped.
+
+    The async methods run the sync ones in the default executor so the saver also works
+    with `astream`/`astream_events`.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        *,
+        commit_every: int = CHECKPOINT_COMMIT_EVERY,
+        prune_every: int = CHECKPOINT_PRUNE_EVERY,
+        keep_per_thread: int = CHECKPOINT_KEEP_PER_THREAD,
+        max_age_days: int = CHECKPOINT_MAX_AGE_DAYS,
+        **kwargs,
+    ):
+        super().__init__(conn, **kwargs)
+        self.commit_every = max(1, commit_every)
+        self.prune_every = max(1, prune_every)
+        self.keep_per_thread = keep_per_thread
+        self.max_age_days = max_age_days
+        self._pending_writes = 0
+        self._commits = 0
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+
+        super().setup()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_threads ("
+            " thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+    ) -> RunnableConfig:
+        with self.lock:
+            self.setup()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at)"
+                " VALUES (?, ?)",
+                (str(config["configurable"]["thread_id"]), time.time()),
+            )
+        return super().put(config, checkpoint, metadata)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig,
+        *,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        loop = asyncio.get_running_loop()
+        checkpoints = await loop.run_in_executor(
+            None, lambda: list(self.list(config, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+    ) -> RunnableConfig:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.put, config, checkpoint, metadata)
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        with super().cursor(transaction=False) as cur:
+            yield cur
+
+        if transaction:
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._commit()
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        self._pending_writes = 0
+        self._commits += 1
+
+        if self._commits % self.prune_every == 0:
+            self.prune()
+
+    def flush(self) -> None:
+        """Commit any checkpoints still held in the open transaction."""
+        with self.lock:
+            if self._pending_writes:
+                self._commit()
+
+    def prune(self) -> int:
+        """Delete stale threads and all but the newest checkpoints of each thread."""
+        self.setup()
+        cutoff = time.time() - self.max_age_days * 86400
+
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id IN ("
+                " SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            deleted = cur.rowcount
+            cur.execute(
+                "DELETE FROM checkpoint_threads WHERE updated_at < ?", (cutoff,)
+            )
+            cur.execute(
+                "DELETE FROM checkpoints WHERE rowid IN ("
+                " SELECT rowid FROM ("
+                "  SELECT rowid, ROW_NUMBER() OVER ("
+                "   PARTITION BY thread_id ORDER BY thread_ts DESC) AS rn"
+                "  FROM checkpoints)"
+                " WHERE rn > ?)",
+                (self.keep_per_thread,),
+            )
+            deleted += cur.rowcount
+            self.conn.commit()
+        finally:
+            cur.close()
+
+        return deleted
+
+
+def create_checkpointer(path: str = CHECKPOINT_DB) -> BatchedSqliteSaver:
+    """
+    Open the local checkpoint database used to resume conversations.
+
+    Args:
+        path (str): The SQLite file to store checkpoints in. Defaults to CHECKPOINT_DB.
+
+    Returns:
+        BatchedSqliteSaver: A checkpointer for `StateGraph.compile`.
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    saver = BatchedSqliteSaver(conn)
+    atexit.register(saver.flush)
+    return saver
@@ -0,0 +1,145 @@
+import os
+import copy
+from functools import lru_cache
+from typing import Optional
+
+from botocore.config import Config
+from langchain_anthropic import ChatAnthropic
+from langchain_aws import ChatBedrock
+from langchain_core.language_models import BaseChatModel
+from dotenv import load_dotenv
+
+from app.features.deadline import LLM_TIMEOUT_SECONDS
+from app.features.replay import REPLAY_MODE, ReplayChatModel
+
+load_dotenv()
+
+MODEL_CONFIG_PATH = os.environ.get("MODEL_CONFIG_PATH", "models.yaml")
+
+# Nodes of the agent graph (plus the chart vision call) that get their own model.
+MODEL_NODES = [
+    "primary_assistant",
+    "scan_stocks",
+    "analyze_stocks",
+    "chart_analysis",
+    "risk_management",
+    "gainers_losers",
+    "merge_specialists",
+    "chart_vision",
+]
+
+DEFAULT_MODEL_CONFIG = {
+    "default": {
+        "provider": "anthropic",
+        "model": "claude-3-opus-20240229",
+        "max_tokens": 1024,
+        "temperature": 0,
+    },
+    "nodes": {
+        "chart_vision": {"max_tokens": 4096},
+    },
+}
+
+
+def load_model_config(path: str = MODEL_CONFIG_PATH) -> dict:
+    """
+    Build the node -> model settings map.
+
+    Settings are layered: the built-in defaults, then the YAML file at `path` (if it
+    exists), then environment variables. `MODEL_DEFAULT`, `MODEL_PROVIDER_DEFAULT` and
+    `MAX_TOKENS_DEFAULT` change every node; `MODEL_<NODE>`, `MODEL_PROVIDER_<NODE>` and
+    `MAX_TOKENS_<NODE>` (e.g. `MODEL_GAINERS_LOSERS`) change a single node.
+
+    Args:
+        path (str): The YAML file to read. Defaults to MODEL_CONFIG_PATH.
+
+    Returns:
+        dict: The resolved settings for every node in MODEL_NODES.
+    """
+    config = copy.deepcopy(DEFAULT_MODEL_CONFIG)
+
+    if path and os.path.exists(path):
+        import yaml
+
+        with open(path) as f:
+            overrides = yaml.safe_load(f) or {}
+        config["default"].update(overrides.get("default", {}))
+        for node, settings in overrides.get("nodes", {}).items():
+            config["nodes"].setdefault(node, {}).update(settings)
+
+    def apply_env(settings: dict, suffix: str) -> None:
+        if os.environ.get(f"MODEL_{suffix}"):
+            settings["model"] = os.environ[f"MODEL_{suffix}"]
+        if os.environ.get(f"MODEL_PROVIDER_{suffix}"):
+            settings["provider"] = os.environ[f"MODEL_PROVIDER_{suffix}"]
+        if os.environ.get(f"MAX_TOKENS_{suffix}"):
+            settings["max_tokens"] = int(os.environ[f"MAX_TOKENS_{suffix}"])
+
+    apply_env(config["default"], "DEFAULT")
+
+    resolved = {}
+    for node in MODEL_NODES:
+        settings = {**config["default"], **config["nodes"].get(node, {})}
+        apply_env(settings, node.upper())
+        resolved[node] = settings
+    return resolved
+
+
+@lru_cache(maxsize=None)
+def build_llm(
+    provider: str,
+    model: str,
+    max_tokens: int,
+    temperature: float = 0,
+    region_name: Optional[str] = None,
+    credentials_profile_name: Optional[str] = None,
+) -> BaseChatModel:
+    """Create a chat model client. Clients are shared between nodes with the same settings."""
+    if provider == "anthropic":
+        return ChatAnthropic(
+            model_name=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            default_request_timeout=LLM_TIMEOUT_SECONDS,
+        )
+    if provider == "bedrock":
+        return ChatBedrock(
+            region_name=region_name or "us-east-1",
+            credentials_profile_name=credentials_profile_name,
+            model_id=model,
+            model_kwargs={"temperature": temperature, "max_tokens": max_tokens},
+            config=Config(
+                connect_timeout=10,
+                read_timeout=LLM_TIMEOUT_SECONDS,
+                retries={"max_attempts": 2},
+            ),
+        )
+    raise ValueError(f"Unknown model provider: {provider}")
+
+
+def get_llm(node: str) -> BaseChatModel:
+    """
+    Return the chat model configured for a graph node.
+
+    Args:
+        node (str): One of MODEL_NODES.
+
+    Returns:
+        BaseChatModel: The model client for that node, wrapped in a ReplayChatModel
+        when REPLAY_MODE is set (with no client at all in replay mode).
+    """
+    if REPLAY_MODE == "replay":
+        return ReplayChatModel(node=node)
+
+    settings = load_model_config()[node]
+    llm = build_llm(
+        settings["provider"],
+        settings["model"],
+        int(settings["max_tokens"]),
+        settings.get("temperature", 0),
+        settings.get("region_name"),
+        settings.get("credentials_profile_name"),
+    )
+    if REPLAY_MODE != "off":
+        return ReplayChatModel(node=node, model=llm)
+    return llm
@@ -0,0 +1,199 @@
+import re
+import json
+import time
+import logging
+from typing import AsyncIterator, Optional
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    ToolMessage,
+    convert_to_messages,
+)
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from app.chains.router import classify
+from app.chains.streaming import AgentEvent, is_incomplete, stream_agent_events
+from app.features.cache import MarketDayCache, get_cache
+from app.features.market_calendar import market_data_date
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "response"
+
+# Routes whose answers are about intraday data (the current gainers and losers), so
+# they go stale within minutes and are never cached until the close.
+LIVE_DATA_ROUTES = {"ToGainersLosersAssistant"}
+# Tools that return intraday data. A run that called one is not cached either, even if
+# the question was routed elsewhere.
+LIVE_DATA_TOOLS = {"get_gainers", "get_losers", "get_intraday_movers"}
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"[^\w\s$.%]", " ", text.lower())
+    return " ".join(text.split()).strip(" .")
+
+
+def get_question(input: dict) -> Optional[str]:
+    """Return the text of the newest user message in a graph input."""
+    messages = input.get("messages", [])
+    if isinstance(messages, (tuple, str)) or not isinstance(messages, list):
+        messages = [messages]
+
+    for message in reversed(convert_to_messages(messages)):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else None
+    return None
+
+
+def used_live_data(messages: list) -> bool:
+    """Whether the newest turn in `messages` called any of LIVE_DATA_TOOLS."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return False
+        calls = getattr(message, "tool_calls", None) or []
+        if any(call["name"] in LIVE_DATA_TOOLS for call in calls):
+            return True
+    return False
+
+
+def is_tool_error(output) -> bool:
+    """Whether a tool observation reports an error instead of data."""
+    content = getattr(output, "content", output)
+    return isinstance(content, str) and "Error:" in content
+
+
+def incomplete_turn(messages: list) -> bool:
+    """
+    Whether the newest turn in `messages` ended in a stand-in answer (e.g. the partial
+    answer at the deadline) or had a tool fail, so its answer must not be reused.
+    """
+    if messages and is_incomplete(messages[-1]):
+        return True
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return False
+        if isinstance(message, ToolMessage) and is_tool_error(message):
+            return True
+    return False
+
+
+def response_cache_key(question: str) -> Optional[str]:
+    """
+    Build the cache key for a question, or None if its answer must not be shared.
+
+    Only questions the fast-path router can resolve on their own (an explicit symbol, or
+    no symbol needed) are cacheable; follow-ups like "now do risk on it" depend on the
+    conversation and are never cached. Neither are questions about live data such as
+    today's top gainers and losers (LIVE_DATA_ROUTES).
+    """
+    routes = classify(question)
+    if not routes or any(route.tool in LIVE_DATA_ROUTES for route in routes):
+        return None
+
+    symbol = next((r.args["symbol"] for r in routes if r.args.get("symbol")), None)
+    path = "+".join(sorted(route.tool for route in routes))
+    return json.dumps(
+        [
+            normalize_question(question),
+            symbol,
+            path,
+            market_data_date().isoformat(),
+        ]
+    )
+
+
+class ResponseCache:
+    """
+    Same-day exact-match cache in front of a compiled agent graph.
+
+    Answers are keyed by normalized question, resolved symbol, assistant path and market
+    data date, and expire at the next market close. On a hit the question and cached
+    answer are written into the thread's checkpoint so the conversation can continue.
+    """
+
+    def __init__(self, graph: Runnable, cache: Optional[MarketDayCache] = None):
+        self.graph = graph
+        self.cache = cache or get_cache()
+
+    def _lookup(self, input: dict, config: Optional[RunnableConfig]):
+        question = get_question(input)
+        key = response_cache_key(question) if question else None
+        answer = self.cache.get(NAMESPACE, key) if key else None
+        if answer is not None:
+            logger.info("response cache hit key=%s", key)
+        return question, key, answer
+
+    def _replay(
+        self, question: str, answer: str, input: dict, config: Optional[RunnableConfig]
+    ) -> dict:
+        messages = [HumanMessage(content=question), AIMessage(content=answer)]
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+
+        if getattr(self.graph, "checkpointer", None) is not None and thread_id:
+            self.graph.update_state(
+                config, {"messages": messages}, as_node="primary_assistant"
+            )
+            return self.graph.get_state(config).values
+        return {"messages": messages}
+
+    def _store(self, key: Optional[str], answer) -> None:
+        if key and isinstance(answer, str) and answer:
+            self.cache.set(NAMESPACE, key, answer)
+
+    def invoke(self, input: dict, config: Optional[RunnableConfig] = None) -> dict:
+        question, key, answer = self._lookup(input, config)
+        if answer is not None:
+            return self._replay(question, answer, input, config)
+
+        output = self.graph.invoke(input, config)
+        messages = output["messages"]
+        if not used_live_data(messages) and not incomplete_turn(messages):
+            self._store(key, messages[-1].content)
+        return output
+
+    async def ainvoke(
+        self, input: dict, config: Optional[RunnableConfig] = None
+    ) -> dict:
+        question, key, answer = self._lookup(input, config)
+        if answer is not None:
+            return self._replay(question, answer, input, config)
+
+        output = await self.graph.ainvoke(input, config)
+        messages = output["messages"]
+        if not used_live_data(messages) and not incomplete_turn(messages):
+            self._store(key, messages[-1].content)
+        return output
+
+    async def astream_events(
+        self, input: dict, config: Optional[RunnableConfig] = None
+    ) -> AsyncIterator[AgentEvent]:
+        """Stream the run as AgentEvents; a cache hit yields only the final answer."""
+        start = time.perf_counter()
+        question, key, answer = self._lookup(input, config)
+        if answer is not None:
+            self._replay(question, answer, input, config)
+            yield AgentEvent(
+                "final",
+                data=answer,
+                elapsed=time.perf_counter() - start,
+                metadata={"cached": True},
+            )
+            return
+
+        skip = False
+        async for event in stream_agent_events(self.graph, input, config):
+            if event.type == "tool_start" and event.name in LIVE_DATA_TOOLS:
+                skip = True
+            if event.type == "tool_end" and is_tool_error(event.data):
+                skip = True
+            if (
+                event.type == "final"
+                and not skip
+                and not event.metadata.get("incomplete")
+            ):
+                self._store(key, event.data)
+            yield event
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="CachedAgentGraph")
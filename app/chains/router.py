@@ -0,0 +1,244 @@
+import re
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+logger = logging.getLogger(__name__)
+
+# Intents are checked against the whole question. A question that matches several
+# symbol intents (analysis, chart, risk) fans out to all of them; any other mix is left
+# to the LLM router.
+INTENT_PATTERNS = {
+    "ToGainersLosersAssistant": re.compile(
+        r"\b(gainers?|losers?|movers|biggest (winners|drops))\b", re.I
+    ),
+    "ToFullScanAssistant": re.compile(
+        r"\b(scan|screen|screener|stock universe)\b", re.I
+    ),
+    "ToRiskManagementAssistant": re.compile(
+        r"\b(risk|position siz(e|ing)|stop[- ]?loss|r[- ]?multiples?)\b", re.I
+    ),
+    "ToChartAnalysisAssistant": re.compile(
+        r"\b(charts?|charting|technical analysis)\b", re.I
+    ),
+    "ToFullAnalysisAssistant": re.compile(
+        r"\b((full|complete|deep|in[- ]depth|fundamental) analysis|deep dive)\b",
+        re.I,
+    ),
+}
+
+# "Analyze X" on its own means a full analysis, but "analyze the chart of X" does not.
+GENERIC_ANALYSIS_PATTERN = re.compile(r"\b(analy[sz]e|analysis)\b", re.I)
+
+SYMBOL_INTENTS = {
+    "ToFullAnalysisAssistant",
+    "ToChartAnalysisAssistant",
+    "ToRiskManagementAssistant",
+}
+
+# Upper-case words that show up in questions but are not tickers.
+NON_SYMBOLS = set(
+    "A I R AM PM AI US USA OK ME MY IT IS OF ON AT TO FOR AND THE OR IN BE DO SO "
+    "SMA EMA RSI ATR ADR EPS PE ETF IPO CEO USD ATH YTD TA RS NYSE SEC GDP CPI FED "
+    "API".split()
+)
+
+SYMBOL_PATTERN = re.compile(r"(?<![\w$])\$?([A-Z]{1,5}(?:\.[A-Z])?)(?![\w.])")
+CASHTAG_PATTERN = re.compile(r"(?<![\w$])\$([A-Za-z]{1,5}(?:\.[A-Za-z])?)\b")
+ENTRY_PATTERN = re.compile(
+    r"\b(?:at|entry(?: price)?(?: of| at)?|buy(?:ing)?(?: at)?|@)\s*\$?(\d+(?:\.\d+)?)",
+    re.I,
+)
+STOP_PATTERN = re.compile(
+    r"\bstop(?:[- ]?loss)?(?: price)?(?: of| at| @)?\s*\$?(\d+(?:\.\d+)?)", re.I
+)
+ACCOUNT_PATTERN = re.compile(
+    r"\$?(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:dollar )?account", re.I
+)
+RISK_PERCENT_PATTERN = re.compile(
+    r"(?:risk(?:ing)?\s*(\d+(?:\.\d+)?)\s*%|(\d+(?:\.\d+)?)\s*%\s*risk)", re.I
+)
+
+
+@dataclass
+class Route:
+    """A routing decision made without calling the LLM."""
+
+    tool: str
+    args: dict = field(default_factory=dict)
+
+
+def ticker_candidates(text: str) -> set:
+    """Cashtags in the text, or failing those its upper-case ticker-looking words."""
+    candidates = {m.upper() for m in CASHTAG_PATTERN.findall(text)}
+    if not candidates:
+        candidates = {m for m in SYMBOL_PATTERN.findall(text) if m not in NON_SYMBOLS}
+    return candidates
+
+
+def extract_symbol(text: str) -> Optional[str]:
+    """
+    Return the one stock the text is about, or None.
+
+    That is its only ticker-looking token, or, when it has none, a company name (or a
+    misspelling of one) found in the local symbol index.
+    """
+    candidates = ticker_candidates(text)
+    if len(candidates) == 1:
+        return candidates.pop()
+    if not candidates:
+        return resolve_company(text)
+    return None
+
+
+def resolve_company(text: str) -> Optional[str]:
+    """
+    The ticker of the company named in the text, from the local symbol index.
+
+    None when no name matches or more than one company does, so the assistant decides.
+    """
+    from app.features.symbols import get_symbol_index
+
+    try:
+        match = get_symbol_index().find_in_text(text)
+    except Exception as e:
+        logger.warning("Symbol lookup failed: %s", e)
+        return None
+    return match.symbol if match else None
+
+
+def extract_risk_params(text: str) -> dict:
+    """Pull entry/stop prices, account size and risk percent out of the text."""
+    params = {}
+
+    stop = STOP_PATTERN.search(text)
+    if stop:
+        params["stop_price"] = float(stop.group(1))
+
+    for match in ENTRY_PATTERN.finditer(text):
+        if stop and match.start(1) == stop.start(1):
+            continue
+        params["entry_price"] = float(match.group(1))
+        break
+
+    account = ACCOUNT_PATTERN.search(text)
+    if account:
+        size = float(account.group(1).replace(",", ""))
+        params["account_size"] = size * 1000 if account.group(2) else size
+
+    risk = RISK_PERCENT_PATTERN.search(text)
+    if risk:
+        params["risk_percent"] = float(risk.group(1) or risk.group(2))
+
+    return params
+
+
+def classify(text: str) -> List[Route]:
+    """
+    Classify a formulaic question into specialist handoffs.
+
+    Args:
+        text (str): The user's question.
+
+    Returns:
+        List[Route]: The handoffs to make, or an empty list if the question should go to the LLM router.
+    """
+    intents = [
+        name for name, pattern in INTENT_PATTERNS.items() if pattern.search(text)
+    ]
+    if not intents and GENERIC_ANALYSIS_PATTERN.search(text):
+        intents = ["ToFullAnalysisAssistant"]
+
+    if not intents:
+        return []
+
+    if len(intents) == 1 and intents[0] not in SYMBOL_INTENTS:
+        if intents[0] == "ToFullScanAssistant":
+            return [Route(intents[0], {"symbol": ""})]
+        return [Route(intents[0], {"request": text})]
+
+    if not set(intents) <= SYMBOL_INTENTS:
+        return []
+
+    symbol = extract_symbol(text)
+    if symbol is None:
+        return []
+
+    routes = []
+    for intent in intents:
+        if intent == "ToRiskManagementAssistant":
+            params = extract_risk_params(text)
+            details = " ".join(
+                f"{key.replace('_', ' ').capitalize()}: {value}."
+                for key, value in params.items()
+            )
+            request = f"{text}\n{details}" if details else text
+            routes.append(Route(intent, {"symbol": symbol, "request": request}))
+        else:
+            routes.append(Route(intent, {"symbol": symbol}))
+    return routes
+
+
+class FastRouter:
+    """
+    Graph node that routes formulaic questions straight to a specialist.
+
+    On a hit it emits the same `To*Assistant` tool calls the primary assistant would have
+    made, so the existing `enter_*` nodes (or the parallel fan-out, for several calls)
+    take over unchanged. On a miss it writes nothing and the graph falls through to the
+    LLM router.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.hits = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.total if self.total else 0.0
+
+    def __call__(self, state: dict) -> dict:
+        message = state["messages"][-1]
+        if not isinstance(message, HumanMessage) or not isinstance(
+            message.content, str
+        ):
+            return {}
+
+        routes = classify(message.content)
+
+        with self.lock:
+            self.total += 1
+            if routes:
+                self.hits += 1
+            hit_rate = self.hit_rate
+
+        if not routes:
+            logger.info(
+                "fast_router miss hit_rate=%.2f question=%r", hit_rate, message.content
+            )
+            return {}
+
+        logger.info(
+            "fast_router hit routes=%s hit_rate=%.2f question=%r",
+            [(route.tool, route.args) for route in routes],
+            hit_rate,
+            message.content,
+        )
+        return {
+            "messages": AIMessage(
+                content=f"Routing to {', '.join(route.tool for route in routes)}.",
+                tool_calls=[
+                    {
+                        "name": route.tool,
+                        "args": route.args,
+                        "id": f"toolu_fast_{uuid.uuid4().hex[:20]}",
+                    }
+                    for route in routes
+                ],
+            )
+        }
@@ -0,0 +1,149 @@
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+
+@dataclass
+class AgentEvent:
+    """
+    A UI-facing event from an agent run.
+
+    `type` is one of "token", "tool_start", "tool_end", "chart", "node_end", "error"
+    or "final". `elapsed` is the number of seconds since the run started; `duration`
+    is only set on "tool_end".
+    """
+
+    type: str
+    name: Optional[str] = None
+    data: Any = None
+    run_id: Optional[str] = None
+    elapsed: float = 0.0
+    duration: Optional[float] = None
+    metadata: dict = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+
+# Set in an answer's additional_kwargs (to the reason) when it is a stand-in, like the
+# partial answer at the deadline, so it is shown but never reused.
+INCOMPLETE = "incomplete"
+
+
+def is_incomplete(message) -> bool:
+    return bool((getattr(message, "additional_kwargs", None) or {}).get(INCOMPLETE))
+
+
+def chunk_text(chunk) -> str:
+    """Return the text carried by a chat model chunk, ignoring tool-use blocks."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "")
+            for block in content
+            if isinstance(block, dict) and block.get("type") in (None, "text")
+        )
+    return ""
+
+
+def message_text(message) -> str:
+    return chunk_text(message) if isinstance(message, AIMessage) else ""
+
+
+def is_tool_node(node: Optional[str]) -> bool:
+    return bool(node) and (node == "tools" or node.endswith("_tools"))
+
+
+async def stream_agent_events(
+    graph: Runnable, input: dict, config: Optional[RunnableConfig] = None
+) -> AsyncIterator[AgentEvent]:
+    """
+    Run the agent graph and yield tokens and tool progress as they happen.
+
+    LLM tokens from the assistant nodes are yielded as "token" events (chat models
+    called from inside a tool, like the chart vision call, are not). Every tool run
+    yields a "tool_start" and a "tool_end" with its duration. The run ends with one
+    "final" event holding the last assistant message, with `incomplete` set in its
+    metadata if that message is a stand-in (see INCOMPLETE).
+
+    Args:
+        graph (Runnable): The compiled agent graph.
+        input (dict): The graph input, e.g. {"messages": ("user", question)}.
+        config (RunnableConfig): The run config, including the thread_id.
+
+    Returns:
+        AsyncIterator[AgentEvent]: The normalized events.
+    """
+    start = time.perf_counter()
+    root_run_id = None
+    tool_started = {}
+    answer = None
+
+    async for event in graph.astream_events(input, config, version="v1"):
+        kind = event["event"]
+        run_id = event["run_id"]
+        node = event.get("metadata", {}).get("langgraph_node")
+        elapsed = time.perf_counter() - start
+
+        if root_run_id is None:
+            root_run_id = run_id
+
+        if kind == "on_chat_model_stream" and not is_tool_node(node):
+            text = chunk_text(event["data"].get("chunk"))
+            if text:
+                yield AgentEvent(
+                    "token", name=node, data=text, run_id=run_id, elapsed=elapsed
+                )
+
+        elif kind == "on_tool_start":
+            tool_started[run_id] = elapsed
+            yield AgentEvent(
+                "tool_start",
+                name=event["name"],
+                data=event["data"].get("input"),
+                run_id=run_id,
+                elapsed=elapsed,
+            )
+
+        elif kind == "on_tool_end":
+            yield AgentEvent(
+                "tool_end",
+                name=event["name"],
+                data=event["data"].get("output"),
+                run_id=run_id,
+                elapsed=elapsed,
+                duration=elapsed - tool_started.pop(run_id, elapsed),
+            )
+
+        elif kind == "on_chain_end" and event["name"] == "render_chart":
+            output = event["data"].get("output") or {}
+            yield AgentEvent(
+                "chart",
+                name=event["data"].get("input"),
+                data={"url": output.get("url"), "error": output.get("error")},
+                run_id=run_id,
+                elapsed=elapsed,
+            )
+
+        elif kind == "on_chain_stream" and run_id == root_run_id:
+            for node, update in event["data"]["chunk"].items():
+                messages = (update or {}).get("messages", [])
+                if not isinstance(messages, list):
+                    messages = [messages]
+                for message in messages:
+                    if message_text(message):
+                        answer = message
+                yield AgentEvent("node_end", name=node, elapsed=elapsed)
+
+    yield AgentEvent(
+        "final",
+        data=message_text(answer) if answer is not None else "",
+        elapsed=time.perf_counter() - start,
+        metadata={"incomplete": True} if is_incomplete(answer) else {},
+    )
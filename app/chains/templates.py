@@ -9,6 +9,9 @@ PREPROCESSING:
 Before processing the query, you will preprocess it as follows:
 1. Correct any spelling errors using a spell checker or fuzzy matching technique.
 2. If the stock symbol or company name is a partial match, find the closest matching stock symbol or company name.
+3. If the user gives a company name or a misspelled symbol, resolve it with the symbol lookup tool. Only search the web if the lookup finds nothing.
+
+If the user asks for several kinds of work at once (for example a full analysis, a chart and a risk plan), delegate all of them in the same response with one function call each so they can run in parallel.
 
 The user is not aware of the different specialized assistants, so do not mention them; just quietly delegate through function calls."""
 
@@ -41,6 +44,16 @@ Rules for bullish setups based on the stock's most recent closing price:
 12. Stock's relative strength rank is above 80."""
 
 
+MERGE_TEMPLATE = """
+You are a specialized financial advisor. Several specialized assistants have just worked on parts of the user's request in parallel,
+and their results are in the function results above.
+
+Combine them into one complete answer for the user. Keep every number, level and conclusion they reported, remove repetition,
+and resolve any disagreements by explaining them. Do not perform any math on your own.
+
+The user is not aware of the different specialized assistants, so do not mention them."""
+
+
 FULL_ANALYSIS_TEMPLATE = f"""
 You will perform a full analysis of the requested stock.
 
@@ -81,6 +94,9 @@ STEPS:
 1. Scan the stock market universe and return a list of stocks.
 2. Get the latest price history for the first 5 stocks in the list. Each stock must use a separate function call.
 3. Calculate fundamental metrics using QuantStats for the first 5 stocks in the list. Each stock must use a separate function call.
+4. Analyze the first 5 stocks together as a portfolio with a single call, and point out stocks that are highly correlated or fall in the same cluster.
+
+If the user asks how these setups have performed historically, backtest the criteria on the symbols in question with a single call instead, and report the win rates and R multiples against the baseline return, noting that the test only covers symbols that still trade.
 
 {END_TEMPLATE}"""
 
@@ -91,9 +107,9 @@ STEPS:
 ------
 
 1. Get the latest price history for the requested stock.
-2. Calculate technical stop loss levels.
-3. Calulate R multiples for 1R, 2R, 3R, and 4R.
-4. Calculate position size. 
+2. Calculate the risk plan with a single call for all the requested stocks. It returns the technical stop levels, the 1R, 2R, 3R and 4R targets and the position sizes together. Pass entry or stop prices only if the user gave them.
+3. Simulate the trade outcomes to give the probability of reaching each R target before the stop and the expected R.
+4. Use the individual stop, R multiple and position size tools only for follow-up questions about a single trade.
 
 Use $100,000 account size and 1% risk percentage unless the user provides these values.
 
@@ -102,4 +118,6 @@ Use $100,000 account size and 1% risk percentage unless the user provides these
 GAINERS_LOSERS_TEMPLATE = f"""
 You will fetch gainers and losers from the stock market.
 
+The lists are refreshed every minute during market hours; mention how old they are. For questions about how the movers changed during the day, or when a stock joined the lists, use the intraday movers history instead.
+
 {END_TEMPLATE}"""
@@ -0,0 +1,266 @@
+"""
+Historical backtest of the bullish-setup criteria in CRITERIA_TEMPLATE.
+
+Prices are laid out as wide frames (dates x symbols) and every rule is evaluated for
+every symbol and day at once with rolling window operations, so there is no Python
+loop over bars or symbols. An entry signal fires on the first day all the required
+rules hold. Each signal is then measured by its forward return and its R multiple
+with a stop `STOP_ATR` ATRs below the close, over several holding periods.
+
+    python -m app.features.backtest --years 10 --symbols AAPL MSFT NVDA
+    python -m app.features.backtest --min-rules 10 --symbols AAPL MSFT NVDA  # looser
+
+Rule 6 ("200 SMA trending up for at least 1 month") is read as the 200 SMA being
+above its value 21 sessions earlier, rule 11 as a positive 50-day regression slope
+that is higher than 5 sessions earlier, and rule 12 as the symbol's IBD-style
+weighted 3/6/9/12-month return ranking in the top 20% of the tested universe.
+Exits at the stop assume a fill at the stop price, so gaps through it are not
+modelled.
+
+The universe must be given explicitly. Any list chosen today is biased: it holds only
+symbols that still trade (survivorship) and, if taken from a current screen, ones
+picked because they did well (hindsight). Both inflate the results, which are only as
+fair as the chosen universe; there is no point-in-time constituent data to correct
+for either.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+HORIZONS = (5, 21, 63)
+STOP_ATR = 2.0
+MIN_VOLUME = 750_000
+TREND_WINDOW = 50
+TREND_RISING_LAG = 5
+SMA_RISING_LAG = 21
+RS_MIN_RANK = 80
+
+RULES = [
+    "close_above_sma20",
+    "close_above_sma50",
+    "close_above_sma200",
+    "sma50_above_sma150",
+    "sma150_above_sma200",
+    "sma200_rising",
+    "above_52wk_low",
+    "near_52wk_high",
+    "volume",
+    "adr_pct",
+    "trendline_rising",
+    "rs_rank",
+]
+
+
+def wide_prices(panel: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Turn a `fetch_many` panel into one (dates x symbols) frame per OHLCV column."""
+    return {
+        column: panel[column].unstack("symbol").sort_index().astype(float)
+        for column in ["open", "high", "low", "close", "volume"]
+    }
+
+
+def rolling_slope(y: pd.DataFrame, window: int) -> pd.DataFrame:
+    """Least-squares slope of each column over a trailing window, from rolling sums."""
+    t = np.arange(len(y), dtype=float)[:, None]
+    sum_y = y.rolling(window).sum()
+    sum_ty = (y * t).rolling(window).sum()
+    t_mean = t - (window - 1) / 2
+    return (sum_ty - t_mean * sum_y) / (window * (window**2 - 1) / 12)
+
+
+def rs_rank(close: pd.DataFrame) -> pd.DataFrame:
+    """Percentile (0-100) of each symbol's weighted 3/6/9/12-month return, per day."""
+    score = (
+        0.4 * close.pct_change(63, fill_method=None)
+        + 0.2 * close.pct_change(126, fill_method=None)
+        + 0.2 * close.pct_change(189, fill_method=None)
+        + 0.2 * close.pct_change(252, fill_method=None)
+    )
+    return score.rank(axis=1, pct=True) * 100
+
+
+def atr(prices: Dict[str, pd.DataFrame], length: int = 14) -> pd.DataFrame:
+    """Wilder's average true range, as pandas_ta computes it for `add_technicals`."""
+    high, low, close = prices["high"], prices["low"], prices["close"]
+    prev = close.shift(1)
+    true_range = np.maximum(high - low, np.maximum(abs(high - prev), abs(low - prev)))
+    return true_range.ewm(alpha=1 / length, adjust=False, min_periods=length).mean()
+
+
+def evaluate_rules(prices: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Every bullish-setup rule as a boolean (dates x symbols) frame."""
+    close, high, low = prices["close"], prices["high"], prices["low"]
+    sma = {n: close.rolling(n).mean() for n in (20, 50, 150, 200)}
+    adr_pct = (high - low).rolling(20).mean() / close * 100
+    slope = rolling_slope(close, TREND_WINDOW)
+
+    return {
+        "close_above_sma20": close > sma[20],
+        "close_above_sma50": close > sma[50],
+        "close_above_sma200": close > sma[200],
+        "sma50_above_sma150": sma[50] > sma[150],
+        "sma150_above_sma200": sma[150] > sma[200],
+        "sma200_rising": sma[200] > sma[200].shift(SMA_RISING_LAG),
+        "above_52wk_low": close >= 1.3 * close.rolling(252).min(),
+        "near_52wk_high": close >= 0.75 * close.rolling(252).max(),
+        "volume": prices["volume"].rolling(30).mean() > MIN_VOLUME,
+        "adr_pct": (adr_pct > 1) & (adr_pct < 5),
+        "trendline_rising": (slope > 0) & (slope > slope.shift(TREND_RISING_LAG)),
+        "rs_rank": rs_rank(close) > RS_MIN_RANK,
+    }
+
+
+def entry_signals(
+    rules: Dict[str, pd.DataFrame], min_rules: int = len(RULES)
+) -> pd.DataFrame:
+    """True on the first day at least `min_rules` of the rules hold."""
+    passed = sum(rule.astype(np.int8) for rule in rules.values())
+    setup = passed >= min_rules
+    return setup & ~setup.shift(1, fill_value=False)
+
+
+def forward_outcomes(
+    prices: Dict[str, pd.DataFrame],
+    signals: pd.DataFrame,
+    horizons: Sequence[int] = HORIZONS,
+    stop_atr: float = STOP_ATR,
+) -> pd.DataFrame:
+    """
+    Forward return and R multiple of every signal, one row per (date, symbol).
+
+    The trade enters at the signal day's close with a stop `stop_atr` ATRs lower. For
+    each horizon it is stopped out at -1R if any low before then touches the stop,
+    and otherwise exits at that day's close. `return_<h>d` is the plain buy-and-hold
+    return, without the stop. Signals without a full horizon of data after them get
+    NaN for it.
+    """
+    close, low = prices["close"], prices["low"]
+    stop = close - stop_atr * atr(prices)
+    risk = close - stop
+
+    columns = {"entry": close, "stop": stop}
+    for h in horizons:
+        exit_close = close.shift(-h)
+        # The lowest low of the next h sessions.
+        next_low = low.rolling(h).min().shift(-h)
+        stopped = next_low <= stop
+        columns[f"return_{h}d"] = (exit_close / close - 1).where(exit_close.notna())
+        columns[f"r_{h}d"] = (
+            ((exit_close - close) / risk).mask(stopped, -1.0).where(exit_close.notna())
+        )
+
+    mask = signals.to_numpy()
+    dates, symbols = np.nonzero(mask)
+    return pd.DataFrame(
+        {name: frame.to_numpy()[mask] for name, frame in columns.items()},
+        index=pd.MultiIndex.from_arrays(
+            [signals.index[dates], signals.columns[symbols]], names=["date", "symbol"]
+        ),
+    ).sort_index()
+
+
+def summarize(trades: pd.DataFrame, horizons: Sequence[int] = HORIZONS) -> pd.DataFrame:
+    """Count, win rate and return/R distribution per holding period."""
+    rows = []
+    for h in horizons:
+        returns = trades[f"return_{h}d"].dropna()
+        r = trades[f"r_{h}d"].dropna()
+        rows.append(
+            {
+                "horizon": f"{h}d",
+                "trades": len(returns),
+                "win_rate": (returns > 0).mean() if len(returns) else np.nan,
+                "mean_return": returns.mean(),
+                "median_return": returns.median(),
+                "p10_return": returns.quantile(0.1),
+                "p90_return": returns.quantile(0.9),
+                "mean_r": r.mean(),
+                "stopped": (r == -1).mean() if len(r) else np.nan,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def baseline_returns(
+    prices: Dict[str, pd.DataFrame], horizons: Sequence[int] = HORIZONS
+) -> Dict[int, float]:
+    """Mean forward return over every symbol and day, to compare the setups against."""
+    close = prices["close"]
+    return {
+        h: float(np.nanmean((close.shift(-h) / close - 1).to_numpy())) for h in horizons
+    }
+
+
+def run_backtest(
+    panel: pd.DataFrame,
+    horizons: Sequence[int] = HORIZONS,
+    min_rules: int = len(RULES),
+    stop_atr: float = STOP_ATR,
+) -> dict:
+    """
+    Backtest the bullish setups over a price panel.
+
+    Args:
+        panel (pd.DataFrame): Adjusted daily OHLCV indexed by (symbol, date).
+        horizons (Sequence[int]): Holding periods in sessions.
+        min_rules (int): How many of the 12 rules must hold for a setup.
+        stop_atr (float): Stop distance in ATRs.
+
+    Returns:
+        dict: "summary" per horizon, "trades" per signal, "rule_pass_rate" per rule
+        and the unconditional "baseline" mean return per horizon.
+    """
+    prices = wide_prices(panel)
+    rules = evaluate_rules(prices)
+    signals = entry_signals(rules, min_rules)
+    trades = forward_outcomes(prices, signals, horizons, stop_atr)
+
+    # Pass rates only over days with a full year of history, when every rule can hold.
+    warm = (prices["close"].rolling(252).count() >= 252).to_numpy()
+    return {
+        "summary": summarize(trades, horizons),
+        "trades": trades,
+        "rule_pass_rate": pd.Series(
+            {name: rule.to_numpy()[warm].mean() for name, rule in rules.items()}
+        ),
+        "baseline": baseline_returns(prices, horizons),
+    }
+
+
+def backtest_symbols(
+    symbols: Iterable[str],
+    years: int = 5,
+    horizons: Sequence[int] = HORIZONS,
+    min_rules: int = len(RULES),
+) -> dict:
+    """Fetch `years` of adjusted prices (plus a year of warm-up) and backtest them."""
+    from app.tools.utils import fetch_many
+
+    start_date = datetime.now() - timedelta(days=365 * (years + 1))
+    panel = fetch_many(list(symbols), start_date, adjusted=True)
+    return run_backtest(panel, horizons, min_rules)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Backtest the bullish-setup rules.")
+    parser.add_argument(
+        "--symbols", nargs="+", required=True, help="The universe to test."
+    )
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--horizons", type=int, nargs="*", default=list(HORIZONS))
+    parser.add_argument("--min-rules", type=int, default=len(RULES))
+    args = parser.parse_args()
+
+    result = backtest_symbols(args.symbols, args.years, args.horizons, args.min_rules)
+    print(result["summary"].to_string(index=False))
+    print("\nBaseline mean return:", result["baseline"])
+    print("\nRule pass rates:")
+    print(result["rule_pass_rate"].round(3).to_string())
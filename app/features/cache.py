@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import threading
+import functools
+from typing import Any, Callable, Optional
+
+from app.features.market_calendar import next_market_close
+
+CACHE_DB = os.environ.get("CACHE_DB", ".data/cache.sqlite")
+
+_MISSING = object()
+
+
+class MarketDayCache:
+    """
+    A small SQLite key/value store whose entries expire at the next market close.
+
+    It is shared by every process on the host (API workers, the Streamlit app and the
+    cache warmer), so a value computed once is reused until the data behind it changes.
+    """
+
+    def __init__(self, path: str = CACHE_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self.conn.commit()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        if expires_at is None:
+            expires_at = next_market_close().timestamp()
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (namespace, key, pickle.dumps(value), expires_at),
+            )
+            self.conn.commit()
+
+    def add(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        expires_at: Optional[float] = None,
+    ) -> bool:
+        """Store `value` only if the key is missing or expired. Returns True if stored."""
+        if expires_at is None:
+            expires_at = next_market_close().timestamp()
+
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                (namespace, key, time.time()),
+            )
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO cache (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (namespace, key, pickle.dumps(value), expires_at),
+            )
+            self.conn.commit()
+        return cur.rowcount == 1
+
+    def purge_expired(self) -> int:
+        with self.lock:
+            cur = self.conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ?", (time.time(),)
+            )
+            self.conn.commit()
+        return cur.rowcount
+
+
+_cache: Optional[MarketDayCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> MarketDayCache:
+    """Return the process-wide cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MarketDayCache()
+            _cache.purge_expired()
+        return _cache
+
+
+def make_key(*args, **kwargs) -> str:
+    return json.dumps([args, kwargs], sort_keys=True, default=str)
+
+
+def cached_until_close(
+    namespace: str, should_cache: Callable[[Any], bool] = lambda result: True
+) -> Callable:
+    """
+    Cache a function's results until the next market close, keyed by its arguments.
+
+    Args:
+        namespace (str): The cache namespace, usually the function name.
+        should_cache (Callable[[Any], bool]): Returns False for results that must not be stored.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            key = make_key(*args, **kwargs)
+
+            result = cache.get(namespace, key, _MISSING)
+            if result is not _MISSING:
+                return result
+
+            result = fn(*args, **kwargs)
+            if should_cache(result):
+                cache.set(namespace, key, result)
+            return result
+
+        return wrapper
+
+    return decorator
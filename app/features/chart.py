@@ -2,28 +2,29 @@ import io
 import os
 import base64
 import tempfile
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import TYPE_CHECKING
 
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.subplots as sp
-import pyimgur
-import seaborn as sns
 
 from dotenv import load_dotenv
-from openbb import obb
 
-from app.features.technical import add_technicals
+from app.features.deadline import UPSTREAM_TIMEOUT_SECONDS
+from app.features.scheduler import schedule_fetch
+from app.features.timeframes import lookback_start, timeframe_technicals
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 load_dotenv()
 
 IMGUR_CLIENT_ID = os.environ.get("IMGUR_CLIENT_ID")
 IMGUR_CLIENT_SECRET = os.environ.get("IMGUR_CLIENT_SECRET")
 
-sns.set_style("whitegrid")
-
 
-def create_plotly_chart(df: pd.DataFrame, symbol: str) -> go.Figure:
+def create_plotly_chart(
+    df: pd.DataFrame, symbol: str, timeframe: str = "daily"
+) -> "go.Figure":
     """
     Generate a Plotly chart for stock data visualization.
 
@@ -33,10 +34,16 @@ def create_plotly_chart(df: pd.DataFrame, symbol: str) -> go.Figure:
     Parameters:
     - df (pd.DataFrame): The DataFrame containing stock data with columns like 'open', 'high', 'low', 'close', 'SMA_50', 'SMA_200', 'RSI', 'ATR'.
     - symbol (str): The stock symbol.
+    - timeframe (str): The bar size of `df`: 'daily', 'weekly' or 'monthly'.
 
     Returns:
     - go.Figure: A Plotly figure object that can be used to display the chart.
     """
+    import plotly.graph_objects as go
+    import plotly.subplots as sp
+
+    unit = {"daily": "day", "weekly": "week", "monthly": "month"}[timeframe]
+
     fig = sp.make_subplots(
         rows=3,
         cols=1,
@@ -63,7 +70,11 @@ def create_plotly_chart(df: pd.DataFrame, symbol: str) -> go.Figure:
     # SMA_50 trace
     fig.add_trace(
         go.Scatter(
-            x=df.index, y=df["SMA_50"], mode="lines", name="50-day SMA", line=dict(color="blue")
+            x=df.index,
+            y=df["SMA_50"],
+            mode="lines",
+            name=f"50-{unit} SMA",
+            line=dict(color="blue"),
         ),
         row=1,
         col=1,
@@ -71,7 +82,11 @@ def create_plotly_chart(df: pd.DataFrame, symbol: str) -> go.Figure:
     # SMA_200 trace
     fig.add_trace(
         go.Scatter(
-            x=df.index, y=df["SMA_200"], mode="lines", name="200-day SMA", line=dict(color="red")
+            x=df.index,
+            y=df["SMA_200"],
+            mode="lines",
+            name=f"200-{unit} SMA",
+            line=dict(color="red"),
         ),
         row=1,
         col=1,
@@ -101,7 +116,11 @@ def create_plotly_chart(df: pd.DataFrame, symbol: str) -> go.Figure:
     fig.update_layout(
         height=600,
         width=800,
-        title_text=f"{symbol} | {now}",
+        title_text=(
+            f"{symbol} | {now}"
+            if timeframe == "daily"
+            else f"{symbol} ({timeframe}) | {now}"
+        ),
         title_y=0.98,
         plot_bgcolor="lightgray",
         xaxis_rangebreaks=[
@@ -139,18 +158,27 @@ def upload_image_to_imgur(buffer, symbol) -> str:
     Returns:
         str: The URL of the uploaded image on Imgur.
     """
-    im = pyimgur.Imgur(
-        IMGUR_CLIENT_ID, client_secret=IMGUR_CLIENT_SECRET, refresh_token=True
-    )
-
     with tempfile.NamedTemporaryFile(suffix=".png") as tmp:
         tmp.write(buffer.getvalue())
-        temp_path = tmp.name
+        tmp.flush()
         now = datetime.now().strftime("%m/%d/%Y")
-        uploaded_image = im.upload_image(
-            temp_path, title=f"{symbol} chart for {now}"
+        return schedule_fetch(
+            "imgur", upload_image, tmp.name, title=f"{symbol} chart for {now}"
         )
-        return uploaded_image.link
+
+
+def upload_image(path, title):
+    """Upload the image file at `path` to Imgur and return its URL."""
+    import pyimgur
+    import pyimgur.request
+
+    # Older pyimgur releases send their requests without a timeout.
+    pyimgur.request.TIMEOUT_SECONDS = UPSTREAM_TIMEOUT_SECONDS
+
+    im = pyimgur.Imgur(
+        IMGUR_CLIENT_ID, client_secret=IMGUR_CLIENT_SECRET, refresh_token=True
+    )
+    return im.upload_image(path, title=title).link
 
 
 def plotly_fig_to_bytes(fig, filename="temp_plot.png"):
@@ -174,29 +202,27 @@ def plotly_fig_to_bytes(fig, filename="temp_plot.png"):
     return img_bytes
 
 
-def get_chart_base64(symbol: str) -> dict:
+def get_chart_base64(symbol: str, timeframe: str = "daily") -> dict:
     """
     Generate a base64 encoded string of the chart image for a given stock symbol.
     Returns the base64 string and the figure object.
 
     Args:
     symbol (str): The stock symbol to generate the chart for.
+    timeframe (str): 'daily', 'weekly' or 'monthly' bars, resampled from the daily prices.
 
     Returns:
     dict: A dictionary containing the base64 encoded string and the URL of the uploaded image on Imgur.
     """
     try:
-        start = datetime.now() - timedelta(days=365 * 2)
-        start_date = start.strftime("%Y-%m-%d")
-        df = obb.equity.price.historical(
-            symbol, start_date=start_date, provider="yfinance"
-        ).to_df()
+        end = datetime.now()
+        start = lookback_start(timeframe, end_date=end)
+        df = timeframe_technicals(symbol, timeframe, start, end)
 
         if df.empty:
             return {"error": "Stock data not found"}
 
-        df = add_technicals(df)
-        chart_data = create_plotly_chart(df, symbol)
+        chart_data = create_plotly_chart(df, symbol, timeframe)
         chart_bytes = plotly_fig_to_bytes(chart_data)
         chart_url = upload_image_to_imgur(chart_bytes, symbol)
 
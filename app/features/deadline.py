@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FuturesTimeout,
+)
+from typing import Any, Callable, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "120"))
+# Hard limits on the calls themselves, set on each client (the model clients, OpenBB,
+# FinViz, Imgur, Tavily). A call abandoned at the deadline keeps its worker thread until
+# it returns, so without these a hung provider would hold it forever.
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "90"))
+UPSTREAM_TIMEOUT_SECONDS = float(os.environ.get("UPSTREAM_TIMEOUT_SECONDS", "30"))
+
+# How often a blocked call re-checks for cancellation when no deadline is closer.
+CANCEL_POLL_SECONDS = 0.25
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = (
+    contextvars.ContextVar("cancel_event", default=None)
+)
+
+# Data calls and LLM calls wait on separate pools, so calls stuck on a slow provider
+# cannot take the workers the assistants need.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DEADLINE_WORKERS", "32")),
+    thread_name_prefix="deadline",
+)
+_llm_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LLM_WORKERS", "16")),
+    thread_name_prefix="deadline-llm",
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's deadline passes or the request is cancelled."""
+
+
+def deadline_after(seconds: float = REQUEST_DEADLINE_SECONDS) -> float:
+    """Return the epoch time `seconds` from now, for `configurable["deadline"]`."""
+    return time.time() + seconds
+
+
+def get_deadline(config: Optional[RunnableConfig] = None) -> Optional[float]:
+    if config is not None:
+        return (config.get("configurable") or {}).get("deadline")
+    return _deadline.get()
+
+
+def get_cancel_event(
+    config: Optional[RunnableConfig] = None,
+) -> Optional[threading.Event]:
+    if config is not None:
+        return (config.get("configurable") or {}).get("cancel_event")
+    return _cancel_event.get()
+
+
+def remaining(config: Optional[RunnableConfig] = None) -> Optional[float]:
+    """Seconds left before the deadline, or None if the request has no deadline."""
+    deadline = get_deadline(config)
+    return None if deadline is None else deadline - time.time()
+
+
+def check_deadline(config: Optional[RunnableConfig] = None) -> None:
+    """Raise DeadlineExceeded if the request was cancelled or its deadline passed."""
+    cancel_event = get_cancel_event(config)
+    if cancel_event is not None and cancel_event.is_set():
+        raise DeadlineExceeded("Request was cancelled")
+
+    left = remaining(config)
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+@contextmanager
+def deadline_scope(config: Optional[RunnableConfig]):
+    """
+    Make the deadline and cancel event in `config` visible to code that has no config.
+
+    Tools are plain functions, so the tool node opens this scope around them and the
+    provider calls underneath read it through `call_with_deadline`.
+    """
+    deadline_token = _deadline.set(get_deadline(config or {}))
+    cancel_token = _cancel_event.set(get_cancel_event(config or {}))
+    try:
+        yield
+    finally:
+        _deadline.reset(deadline_token)
+        _cancel_event.reset(cancel_token)
+
+
+def call_with_deadline(fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """
+    Call a blocking function, giving up when the current request's deadline passes.
+
+    The call runs on a worker thread while the caller waits for at most the remaining
+    time, re-checking for cancellation. On expiry DeadlineExceeded is raised right
+    away; the worker thread is abandoned and finishes the call in the background.
+    Without a deadline or cancel event in scope, `fn` is simply called inline.
+
+    Args:
+        fn (Callable): The blocking call, usually a network request.
+        *args: Positional arguments for `fn`.
+        **kwargs: Keyword arguments for `fn`.
+
+    Returns:
+        Any: Whatever `fn` returns.
+    """
+    return _call(_executor, fn, args, kwargs)
+
+
+def call_llm_with_deadline(fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """`call_with_deadline` for LLM calls, on their own worker pool."""
+    return _call(_llm_executor, fn, args, kwargs)
+
+
+def call_with_deadline_then(
+    on_done: Callable[[], None], fn: Callable[..., Any], /, *args, **kwargs
+) -> Any:
+    """
+    `call_with_deadline` that calls `on_done()` once `fn` has actually finished.
+
+    When the caller gives up at the deadline, `fn` keeps running on its worker, so
+    whatever it holds (e.g. a scheduler slot) is released only when it returns.
+    """
+    return _call(_executor, fn, args, kwargs, on_done)
+
+
+def _call(
+    executor: ThreadPoolExecutor,
+    fn: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+    on_done: Callable[[], None] = lambda: None,
+) -> Any:
+    try:
+        check_deadline()
+    except DeadlineExceeded:
+        on_done()
+        raise
+    if get_deadline() is None and get_cancel_event() is None:
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            on_done()
+
+    context = contextvars.copy_context()
+    try:
+        future = executor.submit(context.run, fn, *args, **kwargs)
+    except BaseException:
+        on_done()
+        raise
+    future.add_done_callback(lambda _: on_done())
+    return _wait(future)
+
+
+def _wait(future: Future) -> Any:
+    """Wait for `future` until the deadline, re-checking for cancellation."""
+    while True:
+        left = remaining()
+        timeout = (
+            CANCEL_POLL_SECONDS if left is None else min(left, CANCEL_POLL_SECONDS)
+        )
+        try:
+            return future.result(timeout=max(timeout, 0))
+        except FuturesTimeout:
+            try:
+                check_deadline()
+            except DeadlineExceeded:
+                future.cancel()
+                raise
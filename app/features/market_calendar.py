@@ -0,0 +1,46 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# Regular US equity session. Exchange holidays are not modelled, so on a holiday
+# caches simply roll over at the usual close time.
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    now = (now or market_now()).astimezone(MARKET_TZ)
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def market_data_date(now: Optional[datetime] = None) -> date:
+    """Return the date of the most recent completed trading session."""
+    now = (now or market_now()).astimezone(MARKET_TZ)
+    day = now.date()
+    if is_trading_day(day) and now.time() >= MARKET_CLOSE:
+        return day
+
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def next_market_close(now: Optional[datetime] = None) -> datetime:
+    """Return the next regular-session close after `now`."""
+    now = (now or market_now()).astimezone(MARKET_TZ)
+    day = now.date()
+    if not is_trading_day(day) or now.time() >= MARKET_CLOSE:
+        day += timedelta(days=1)
+        while not is_trading_day(day):
+            day += timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
@@ -0,0 +1,215 @@
+"""
+Shared, periodically refreshed snapshots of the market's top gainers and losers.
+
+The lists are market-wide and the same for every user, so one background task fetches
+both every MOVERS_INTERVAL_SECONDS while the market is open (MOVERS_IDLE_SECONDS
+otherwise). `get_gainers` and `get_losers` then answer every session from memory,
+saying how old the data is. Without the background task (the Streamlit UI, or
+MOVERS_REFRESH=false) a tool call refreshes the lists itself once they are older than
+twice the interval; concurrent callers share that one fetch.
+
+Each snapshot is also kept in a session history (MOVERS_HISTORY snapshots, a full
+trading day at the default interval), so questions about how the movers changed during
+the day are answered without going upstream again.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Deque, List, Optional
+
+import pandas as pd
+
+from app.features.market_calendar import MARKET_TZ, is_market_open, market_now
+from app.features.scheduler import Priority, fetch_priority, schedule_fetch
+
+logger = logging.getLogger(__name__)
+
+MOVERS_REFRESH = os.environ.get("MOVERS_REFRESH", "true").lower() == "true"
+MOVERS_INTERVAL_SECONDS = float(os.environ.get("MOVERS_INTERVAL_SECONDS", "60"))
+MOVERS_IDLE_SECONDS = float(os.environ.get("MOVERS_IDLE_SECONDS", "1800"))
+MOVERS_HISTORY = int(os.environ.get("MOVERS_HISTORY", "400"))
+
+KINDS = ("gainers", "losers")
+
+
+@dataclass
+class MoversSnapshot:
+    taken_at: datetime
+    gainers: pd.DataFrame
+    losers: pd.DataFrame
+
+    def age(self, now: Optional[datetime] = None) -> timedelta:
+        return (now or market_now()) - self.taken_at
+
+    def describe_age(self, now: Optional[datetime] = None) -> str:
+        minutes = int(self.age(now).total_seconds() // 60)
+        ago = "just now" if minutes < 1 else f"{minutes} min ago"
+        return f"As of {self.taken_at:%Y-%m-%d %H:%M} ET ({ago})."
+
+
+def fetch_movers(kind: str) -> pd.DataFrame:
+    from app.features.obb_session import get_obb
+
+    discovery = get_obb().equity.discovery
+    return schedule_fetch("fmp", getattr(discovery, kind), sort="desc").to_df()
+
+
+class MoversService:
+    """The latest gainers/losers snapshot and the history of earlier ones."""
+
+    def __init__(self, history: int = MOVERS_HISTORY):
+        self.snapshots: Deque[MoversSnapshot] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    @staticmethod
+    def interval(now: Optional[datetime] = None) -> float:
+        return MOVERS_INTERVAL_SECONDS if is_market_open(now) else MOVERS_IDLE_SECONDS
+
+    def latest(self) -> Optional[MoversSnapshot]:
+        with self._lock:
+            return self.snapshots[-1] if self.snapshots else None
+
+    def is_stale(self, snapshot: Optional[MoversSnapshot]) -> bool:
+        """Older than two refresh intervals, so the background task is not keeping up."""
+        if snapshot is None:
+            return True
+        return snapshot.age().total_seconds() > 2 * self.interval()
+
+    def refresh(self) -> MoversSnapshot:
+        """Fetch both lists and record them as the newest snapshot."""
+        try:
+            gainers, losers = (fetch_movers(kind) for kind in KINDS)
+        except Exception:
+            self.failures += 1
+            raise
+        snapshot = MoversSnapshot(market_now(), gainers, losers)
+        with self._lock:
+            self.snapshots.append(snapshot)
+            self.refreshes += 1
+        return snapshot
+
+    def current(self) -> MoversSnapshot:
+        """
+        The latest snapshot, refreshed first if it is stale.
+
+        Only one caller refreshes; the others wait for it and use its result. If the
+        refresh fails, an older snapshot is served (its age says how old) and the
+        error is raised only when there is none.
+        """
+        snapshot = self.latest()
+        if not self.is_stale(snapshot):
+            return snapshot
+
+        with self._refresh_lock:
+            snapshot = self.latest()
+            if not self.is_stale(snapshot):
+                return snapshot
+            try:
+                return self.refresh()
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                logger.warning("Movers refresh failed, serving older data: %s", e)
+                return snapshot
+
+    def session_snapshots(self, now: Optional[datetime] = None) -> List[MoversSnapshot]:
+        """Today's snapshots, oldest first."""
+        today = (now or market_now()).astimezone(MARKET_TZ).date()
+        with self._lock:
+            return [s for s in self.snapshots if s.taken_at.date() == today]
+
+    def history(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        """
+        Every appearance in today's snapshots as rows of (taken_at, list, rank, ...).
+
+        Args:
+            symbol (str): Only this symbol's rows.
+
+        Returns:
+            pd.DataFrame: The snapshot columns plus taken_at, list and rank (1 = top).
+        """
+        frames = []
+        for snapshot in self.session_snapshots():
+            for kind in KINDS:
+                df = getattr(snapshot, kind).reset_index(drop=True)
+                if "symbol" not in df.columns:
+                    continue
+                if symbol is not None:
+                    df = df[df["symbol"].str.upper() == symbol.upper()]
+                frames.append(
+                    df.assign(
+                        taken_at=snapshot.taken_at.strftime("%H:%M"),
+                        list=kind,
+                        rank=df.index + 1,
+                    )
+                )
+        if not frames:
+            return pd.DataFrame(columns=["taken_at", "list", "rank", "symbol"])
+
+        df = pd.concat(frames, ignore_index=True)
+        first = ["taken_at", "list", "rank", "symbol"]
+        return df[first + [c for c in df.columns if c not in first]]
+
+    def summary(self) -> pd.DataFrame:
+        """
+        One row per symbol that made either list today: when it was first and last
+        seen, its best rank and its first and latest percent change.
+        """
+        history = self.history()
+        if history.empty:
+            return history
+
+        change = "percent_change" if "percent_change" in history.columns else None
+        grouped = history.groupby(["list", "symbol"], sort=False)
+        summary = grouped.agg(
+            first_seen=("taken_at", "first"),
+            last_seen=("taken_at", "last"),
+            snapshots=("taken_at", "size"),
+            best_rank=("rank", "min"),
+        )
+        if change:
+            summary["first_change"] = grouped[change].first()
+            summary["latest_change"] = grouped[change].last()
+        return summary.reset_index().sort_values(["list", "best_rank"])
+
+    def status(self) -> dict:
+        snapshot = self.latest()
+        return {
+            "snapshots": len(self.snapshots),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "latest": snapshot.taken_at.isoformat() if snapshot else None,
+            "age_seconds": (
+                round(snapshot.age().total_seconds(), 1) if snapshot else None
+            ),
+        }
+
+
+_service = MoversService()
+
+
+def get_movers_service() -> MoversService:
+    return _service
+
+
+def refresh_in_background() -> None:
+    with fetch_priority(Priority.BACKGROUND):
+        _service.refresh()
+
+
+async def run_movers_refresher() -> None:
+    """Refresh the movers on the market-hours schedule for as long as the server runs."""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_in_background)
+        except Exception as e:
+            logger.warning("Movers refresh failed: %s", e)
+        await asyncio.sleep(MoversService.interval())
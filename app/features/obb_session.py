@@ -0,0 +1,66 @@
+import os
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+from app.features.deadline import UPSTREAM_TIMEOUT_SECONDS
+from app.features.replay import REPLAY_MODE, ReplayNamespace
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_obb = None
+_lock = threading.Lock()
+
+
+def _apply_credentials(obb) -> None:
+    obb.user.credentials.tiingo_token = os.environ.get("TIINGO_API_KEY")
+    obb.user.credentials.fmp_api_key = os.environ.get("FMP_API_KEY")
+    obb.user.credentials.intrinio_api_key = os.environ.get("INTRINIO_API_KEY")
+    obb.user.credentials.fred_api_key = os.environ.get("FRED_API_KEY")
+    if hasattr(obb.user.preferences, "request_timeout"):
+        obb.user.preferences.request_timeout = int(UPSTREAM_TIMEOUT_SECONDS)
+
+
+def get_obb():
+    """
+    Return the OpenBB client, importing it and applying API keys on first use.
+
+    Importing `openbb` loads every installed extension, so it is deferred until a tool
+    actually needs market data instead of happening at server or UI startup. With
+    REPLAY_MODE=replay every call is answered from fixtures, so it is not imported at all.
+    """
+    global _obb
+    with _lock:
+        if _obb is None and REPLAY_MODE == "replay":
+            _obb = ReplayNamespace()
+        elif _obb is None:
+            from openbb import obb
+
+            _apply_credentials(obb)
+            _obb = obb
+    return _obb
+
+
+def login_openbb() -> None:
+    """Log in to the OpenBB Hub, then re-apply the local API keys on top of the Hub's."""
+    token = os.environ.get("OPENBB_TOKEN")
+    obb = get_obb()
+    if not token or REPLAY_MODE == "replay":
+        return
+
+    try:
+        obb.account.login(pat=token, remember_me=True)
+    except Exception as e:
+        logger.warning("OpenBB login failed: %s", e)
+
+    _apply_credentials(obb)
+
+
+def start_background_login() -> threading.Thread:
+    """Run `login_openbb` on a daemon thread so startup does not wait on the network."""
+    thread = threading.Thread(target=login_openbb, name="openbb-login", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,259 @@
+"""
+An array-backed daily price panel for the whole universe, shared by every worker.
+
+Per-request pandas frames hold OHLCV as float64 with a datetime index, and every
+worker keeps its own copy. The panel stores the universe once on disk and every
+process maps the same pages:
+
+    <PANEL_DIR>/<raw|adjusted>/CURRENT         name of the published panel
+    <PANEL_DIR>/<raw|adjusted>/<session>-<stamp>/
+        ohlcv.f32      float32, (rows, 5) open/high/low/close/volume, C order
+        dates.i8       int64 days since epoch, (rows,)
+        index.json     symbol -> [offset, length], session, start date
+
+Rows are grouped by symbol and sorted by date, so one symbol's history is a single
+contiguous block and `PricePanel.prices` returns a view of it without copying.
+
+Memory per symbol is 28 bytes per trading day (5 x float32 + int64 date), about 14 KB
+per two years of history. The warmer keeps five years (for weekly bars), so 5,000
+symbols take about 175 MB of page cache, shared by all workers. Two years as a float64
+DataFrame is about 28 KB per symbol per worker, plus 56 KB more once `add_technicals`
+has run (see `benchmarks/price_panel.py`). float32 keeps about 7 significant digits, so 123.45 is
+stored as 123.4499969...; `PricePanel.select` rounds raw prices back to the cent (four
+places below $1), which is exact for prices below $65,536. Adjusted prices are not
+whole cents and keep the float32 error, about one part in 10 million. Volumes above
+16.7M are off by at most a few shares in 100M.
+
+The cache warmer writes both panels after the close; `fetch_many` serves the symbols
+they hold while the panel is for the latest completed session.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.features.market_calendar import market_data_date
+from app.features.providers import PRICE_COLUMNS, empty_panel
+from app.features.snapshot import publish
+
+logger = logging.getLogger(__name__)
+
+PANEL_DIR = os.environ.get("PANEL_DIR", ".data/panel")
+
+
+def panel_root(adjusted: bool, root: str = PANEL_DIR) -> str:
+    return os.path.join(root, "adjusted" if adjusted else "raw")
+
+
+def write_panel(
+    panel: pd.DataFrame,
+    start_date: datetime,
+    adjusted: bool,
+    root: str = PANEL_DIR,
+) -> Optional[str]:
+    """
+    Write a `fetch_many` frame (indexed by symbol and date) as a memory-mappable panel.
+
+    Args:
+        panel (pd.DataFrame): OHLCV indexed by (symbol, date).
+        start_date (datetime): The first date that was requested for every symbol.
+        adjusted (bool): Whether the prices are split- and dividend-adjusted.
+        root (str): The panel directory.
+
+    Returns:
+        str: The published panel's directory, or None if `panel` is empty.
+    """
+    if panel.empty:
+        return None
+
+    panel = panel.sort_index()
+    symbols = panel.index.get_level_values("symbol")
+    names, offsets, lengths = np.unique(
+        symbols.to_numpy(), return_index=True, return_counts=True
+    )
+
+    session = market_data_date().isoformat()
+    directory = panel_root(adjusted, root)
+    path = os.path.join(directory, f"{session}-{int(time.time())}")
+    os.makedirs(path)
+
+    panel[PRICE_COLUMNS].to_numpy(dtype=np.float32).tofile(
+        os.path.join(path, "ohlcv.f32")
+    )
+    panel.index.get_level_values("date").values.astype("datetime64[D]").astype(
+        np.int64
+    ).tofile(os.path.join(path, "dates.i8"))
+
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(
+            {
+                "session": session,
+                "start_date": pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+                "adjusted": adjusted,
+                "rows": len(panel),
+                "columns": PRICE_COLUMNS,
+                "symbols": {
+                    str(name): [int(offset), int(length)]
+                    for name, offset, length in zip(names, offsets, lengths)
+                },
+            },
+            f,
+        )
+
+    publish(directory, path)
+    logger.info("Published %s panel %s: %d symbols", directory, path, len(names))
+    return path
+
+
+class PricePanel:
+    """
+    Read-only, memory-mapped view of a published panel.
+
+    It answers `fetch_many` the same way an in-memory PriceSnapshot does.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.index = json.load(f)
+
+        self.session = self.index["session"]
+        self.adjusted = self.index["adjusted"]
+        self.start_date = pd.Timestamp(self.index["start_date"])
+        self.offsets: Dict[str, List[int]] = self.index["symbols"]
+        self.symbols = set(self.offsets)
+
+        rows = self.index["rows"]
+        self.values = np.memmap(
+            os.path.join(path, "ohlcv.f32"),
+            dtype=np.float32,
+            mode="r",
+            shape=(rows, len(PRICE_COLUMNS)),
+        )
+        self.dates = np.memmap(
+            os.path.join(path, "dates.i8"), dtype=np.int64, mode="r", shape=(rows,)
+        )
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.offsets
+
+    def is_current(self) -> bool:
+        return self.session == market_data_date().isoformat()
+
+    def covers(self, start_date: datetime, adjusted: bool) -> bool:
+        return (
+            adjusted == self.adjusted
+            and self.is_current()
+            and pd.Timestamp(start_date).normalize() >= self.start_date
+        )
+
+    def block(self, symbol: str, start_date=None, end_date=None) -> slice:
+        """The rows of `symbol` between the two dates (inclusive)."""
+        offset, length = self.offsets[symbol.upper()]
+        dates = self.dates[offset : offset + length]
+        lo = 0 if start_date is None else np.searchsorted(dates, _day(start_date))
+        hi = (
+            length
+            if end_date is None
+            else np.searchsorted(dates, _day(end_date), side="right")
+        )
+        return slice(offset + lo, offset + hi)
+
+    def prices(self, symbol: str, start_date=None, end_date=None) -> pd.DataFrame:
+        """One symbol's float32 OHLCV as a frame over the mapped pages (no copy)."""
+        rows = self.block(symbol, start_date, end_date)
+        return pd.DataFrame(
+            self.values[rows],
+            columns=PRICE_COLUMNS,
+            index=pd.DatetimeIndex(
+                self.dates[rows].astype("datetime64[D]"), name="date"
+            ),
+            copy=False,
+        )
+
+    def select(
+        self,
+        symbols: Iterable[str],
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Rows for `symbols` as a float64 frame indexed by (symbol, date), like fetch_many.
+
+        This copies only the requested rows, upcast (and volume back to integers) so
+        callers see the same dtypes as an upstream download. Raw prices are rounded
+        back to the cent, so they are the same values too; adjusted prices keep the
+        float32 error.
+        """
+        blocks = [
+            (symbol, self.block(symbol, start_date, end_date)) for symbol in symbols
+        ]
+        blocks = [(symbol, rows) for symbol, rows in blocks if rows.stop > rows.start]
+        if not blocks:
+            return empty_panel()
+
+        values = np.concatenate([self.values[rows] for _, rows in blocks])
+        dates = np.concatenate([self.dates[rows] for _, rows in blocks])
+        index = pd.MultiIndex.from_arrays(
+            [
+                np.repeat(
+                    [symbol for symbol, _ in blocks],
+                    [rows.stop - rows.start for _, rows in blocks],
+                ),
+                pd.DatetimeIndex(dates.astype("datetime64[D]")),
+            ],
+            names=["symbol", "date"],
+        )
+        df = pd.DataFrame(values.astype(np.float64), columns=PRICE_COLUMNS, index=index)
+        if not self.adjusted:
+            prices = df.columns != "volume"
+            df.loc[:, prices] = round_prices(df.loc[:, prices].to_numpy())
+        if df["volume"].notna().all():
+            df["volume"] = df["volume"].round().astype(np.int64)
+        return df
+
+
+def round_prices(values: np.ndarray) -> np.ndarray:
+    """Undo float32 storage error in raw quotes: cents, or four places below $1."""
+    return np.where(np.abs(values) >= 1, values.round(2), values.round(4))
+
+
+def _day(value) -> int:
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+
+_panels: Dict[str, PricePanel] = {}
+_panels_lock = threading.Lock()
+
+
+def get_price_panel(adjusted: bool, root: str = PANEL_DIR) -> Optional[PricePanel]:
+    """
+    Return the published panel for the latest session, or None.
+
+    Like `get_snapshot`, CURRENT is re-read on every call so a new panel is picked up
+    without a restart.
+    """
+    directory = panel_root(adjusted, root)
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            path = os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+    with _panels_lock:
+        panel = _panels.get(directory)
+        if panel is None or panel.path != path:
+            try:
+                panel = _panels[directory] = PricePanel(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not open price panel %s: %s", path, e)
+                return None
+
+    return panel if panel.is_current() else None
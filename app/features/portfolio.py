@@ -0,0 +1,241 @@
+"""
+Correlation, clustering and risk-based weights for a basket of symbols.
+
+Scans pick candidates one by one, so five semiconductor names can look like five
+separate ideas. This module treats them as one portfolio: daily returns for every
+symbol come from a single batched fetch and go into one (dates x symbols) matrix,
+and everything after that is matrix algebra on it.
+
+- correlation and annualized covariance of daily returns
+- hierarchical clusters of symbols that move together (average linkage on the
+  correlation distance sqrt((1 - rho) / 2))
+- inverse-volatility and equal-risk-contribution (risk-parity) weights
+
+A few hundred names take well under a second once the prices are local (see
+`benchmarks/portfolio.py`).
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+# Symbols with returns on fewer than this share of the dates are left out.
+MIN_COVERAGE = 0.8
+# Symbols in one cluster have at least about this average pairwise correlation.
+CLUSTER_CORRELATION = 0.6
+RISK_PARITY_ITERATIONS = 100
+RISK_PARITY_TOLERANCE = 1e-12
+# Risk-parity weights whose risk contributions are further than this from equal, as a
+# share of the target, are reported as unsolved.
+RISK_PARITY_MAX_ERROR = 1e-4
+
+
+def returns_matrix(
+    panel: pd.DataFrame, min_coverage: float = MIN_COVERAGE
+) -> pd.DataFrame:
+    """
+    Daily close-to-close returns as a (dates x symbols) frame with no gaps.
+
+    Symbols missing too many dates are dropped, then any date where a remaining
+    symbol has no return, so every statistic uses the same days.
+    """
+    close = panel["close"].unstack("symbol").sort_index().astype(float)
+    returns = close.pct_change(fill_method=None).iloc[1:]
+    coverage = returns.notna().mean()
+    return returns.loc[:, coverage >= min_coverage].dropna()
+
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    return np.corrcoef(returns, rowvar=False)
+
+
+def covariance_matrix(returns: np.ndarray) -> np.ndarray:
+    """Annualized sample covariance of daily returns."""
+    return np.cov(returns, rowvar=False) * TRADING_DAYS
+
+
+def cluster_symbols(
+    corr: np.ndarray, min_correlation: float = CLUSTER_CORRELATION
+) -> np.ndarray:
+    """
+    Cluster label (1, 2, ...) per symbol, from average-linkage clustering.
+
+    Clusters are cut where the average correlation distance would exceed the one for
+    `min_correlation`, so each cluster holds names that tend to move together.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(corr) < 2:
+        return np.ones(len(corr), dtype=int)
+
+    distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+    np.fill_diagonal(distance, 0)
+    tree = linkage(squareform(distance, checks=False), method="average")
+    return fcluster(tree, t=np.sqrt((1 - min_correlation) / 2), criterion="distance")
+
+
+def inverse_volatility_weights(cov: np.ndarray) -> np.ndarray:
+    inverse = 1 / np.sqrt(np.diag(cov))
+    return inverse / inverse.sum()
+
+
+def risk_contributions(weights: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """Each position's share of the portfolio variance; they sum to 1."""
+    marginal = cov @ weights
+    return weights * marginal / (weights @ marginal)
+
+
+def risk_parity_weights(
+    cov: np.ndarray,
+    iterations: int = RISK_PARITY_ITERATIONS,
+    tolerance: float = RISK_PARITY_TOLERANCE,
+) -> np.ndarray:
+    """
+    Long-only weights where every position contributes the same risk.
+
+    Solves Spinu's convex form, minimize f(y) = y' cov y / 2 - sum(log y) / n over
+    y > 0, by damped Newton steps; w = y / sum(y). Each step is one linear solve
+    with the Hessian cov + diag(1 / (n y^2)), cut back to stay positive and to
+    decrease f, so hedges (negative covariances) are handled and convergence is
+    quadratic near the solution. Check the result with `risk_parity_error`: a
+    covariance that is singular along a hedged direction has no solution.
+    """
+    n = len(cov)
+    budget = 1 / n
+
+    def objective(y: np.ndarray) -> float:
+        return y @ cov @ y / 2 - budget * np.log(y).sum()
+
+    y = inverse_volatility_weights(cov)
+    y /= np.sqrt(y @ cov @ y)
+    value = objective(y)
+    for _ in range(iterations):
+        gradient = cov @ y - budget / y
+        hessian = cov + np.diag(budget / (y * y))
+        step = -np.linalg.solve(hessian, gradient)
+        decrement = -gradient @ step
+        if decrement / 2 <= tolerance:
+            break
+
+        # Largest step that keeps y > 0, then backtrack until f decreases enough.
+        shrinking = step < 0
+        size = min(1.0, 0.99 * np.min(-y[shrinking] / step[shrinking], initial=np.inf))
+        while size > 1e-12:
+            candidate = y + size * step
+            candidate_value = objective(candidate)
+            if candidate_value <= value - 0.25 * size * decrement:
+                break
+            size /= 2
+        else:
+            break
+        y, value = candidate, candidate_value
+    return y / y.sum()
+
+
+def risk_parity_error(weights: np.ndarray, cov: np.ndarray) -> float:
+    """The largest gap between a risk contribution and 1 / n, relative to 1 / n."""
+    n = len(weights)
+    return float(np.abs(risk_contributions(weights, cov) * n - 1).max())
+
+
+def top_pairs(corr: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """The `n` most correlated pairs of symbols."""
+    upper = np.triu_indices(len(corr), k=1)
+    values = corr.to_numpy()[upper]
+    order = np.argsort(values)[::-1][:n]
+    return pd.DataFrame(
+        {
+            "symbol_a": corr.index[upper[0][order]],
+            "symbol_b": corr.columns[upper[1][order]],
+            "correlation": values[order],
+        }
+    )
+
+
+def analyze_returns(
+    returns: pd.DataFrame, min_correlation: float = CLUSTER_CORRELATION
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Portfolio analytics for a returns matrix.
+
+    Returns:
+        tuple: A per-symbol table (cluster, volatility, average correlation to the
+        others, weights and risk contributions), the correlation matrix, and
+        portfolio-level statistics for the risk-parity weights. If the risk-parity
+        solve fails, inverse-volatility weights stand in for it and
+        `risk_parity_fallback` is set in the statistics.
+    """
+    values = returns.to_numpy()
+    symbols = returns.columns
+    corr = correlation_matrix(values)
+    cov = covariance_matrix(values)
+    volatility = np.sqrt(np.diag(cov))
+
+    inverse_vol = inverse_volatility_weights(cov)
+    parity = risk_parity_weights(cov)
+    fallback = (
+        not np.isfinite(parity).all()
+        or risk_parity_error(parity, cov) > RISK_PARITY_MAX_ERROR
+    )
+    if fallback:
+        parity = inverse_vol
+    equal = np.full(len(symbols), 1 / len(symbols))
+    n = len(symbols)
+    avg_corr = (corr.sum(axis=1) - 1) / (n - 1) if n > 1 else np.full(n, np.nan)
+
+    table = pd.DataFrame(
+        {
+            "symbol": symbols,
+            "cluster": cluster_symbols(corr, min_correlation),
+            "volatility": volatility,
+            "avg_correlation": avg_corr,
+            "weight_inverse_vol": inverse_vol,
+            "weight_risk_parity": parity,
+            "risk_share_equal": risk_contributions(equal, cov),
+            "risk_share_risk_parity": risk_contributions(parity, cov),
+        }
+    ).sort_values(["cluster", "symbol"], ignore_index=True)
+
+    portfolio_vol = np.sqrt(parity @ cov @ parity)
+    stats = {
+        "symbols": n,
+        "days": len(returns),
+        "clusters": int(table["cluster"].nunique()),
+        "average_correlation": float(np.nanmean(avg_corr)),
+        "risk_parity_volatility": float(portfolio_vol),
+        "equal_weight_volatility": float(np.sqrt(equal @ cov @ equal)),
+        # Weighted average volatility over portfolio volatility; 1 is no
+        # diversification at all.
+        "diversification_ratio": float(parity @ volatility / portfolio_vol),
+        "risk_parity_fallback": fallback,
+    }
+    return table, pd.DataFrame(corr, index=symbols, columns=symbols), stats
+
+
+def portfolio_analytics(
+    symbols: Iterable[str],
+    years: int = 1,
+    min_correlation: float = CLUSTER_CORRELATION,
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Fetch `years` of adjusted daily prices for `symbols` in one batch and analyze them.
+
+    See `analyze_returns` for what is returned. Symbols with too little history are
+    left out of all three.
+    """
+    from app.tools.utils import fetch_many
+
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    start_date = datetime.now() - timedelta(days=365 * years)
+    panel = fetch_many(symbols, start_date, adjusted=True)
+    if panel.empty:
+        raise ValueError("No price data for the given symbols")
+
+    returns = returns_matrix(panel)
+    if returns.shape[1] < 2 or len(returns) < 20:
+        raise ValueError("Need at least two symbols with overlapping price history")
+    return analyze_returns(returns, min_correlation)
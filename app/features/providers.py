@@ -0,0 +1,407 @@
+import os
+import time
+import random
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.features.deadline import check_deadline, remaining
+from app.features.obb_session import get_obb
+from app.features.scheduler import schedule_fetch
+
+logger = logging.getLogger(__name__)
+
+# OpenBB providers for daily prices, in order of preference. Providers whose API key is
+# missing are skipped.
+PRICE_PROVIDERS = os.environ.get("PRICE_PROVIDERS", "yfinance,fmp,tiingo,intrinio")
+PROVIDER_API_KEYS = {
+    "fmp": "FMP_API_KEY",
+    "tiingo": "TIINGO_API_KEY",
+    "intrinio": "INTRINIO_API_KEY",
+}
+
+# A hedge is sent once the first request has taken longer than this quantile of its
+# provider's recent latencies.
+HEDGE_QUANTILE = float(os.environ.get("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.25"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", "2.0"))
+
+# Symbols per upstream request. Intrinio only accepts one symbol per call.
+PROVIDER_BATCH_SIZES = {"yfinance": 50, "fmp": 20, "tiingo": 20, "intrinio": 1}
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def normalize_prices(df: pd.DataFrame, adjusted: bool = False) -> pd.DataFrame:
+    """
+    Bring a provider's price frame to one shape: a sorted, tz-naive DatetimeIndex named
+    `date` and lower-case open/high/low/close/volume columns (plus `adj_close` when the
+    provider has it).
+
+    With `adjusted=True`, providers that report separate adjusted prices (Tiingo,
+    Intrinio) have their `adj_*` columns swapped in for OHLCV; missing adjusted
+    columns are scaled by `adj_close / close`.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    df = df.copy()
+    df.columns = [str(col).lower().replace(" ", "_") for col in df.columns]
+    if "date" in df.columns:
+        df = df.set_index("date")
+
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = "date"
+
+    if adjusted and "adj_close" in df.columns and df["adj_close"].notna().all():
+        factor = df["adj_close"] / df["close"]
+        for col in ["open", "high", "low"]:
+            adj = f"adj_{col}"
+            df[col] = df[adj] if adj in df.columns else df[col] * factor
+        df["close"] = df["adj_close"]
+        if "adj_volume" in df.columns:
+            df["volume"] = df["adj_volume"]
+
+    columns = [col for col in PRICE_COLUMNS + ["adj_close"] if col in df.columns]
+    df = df[columns].sort_index()
+    return df[~df.index.duplicated(keep="last")]
+
+
+def empty_panel() -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays(
+        [pd.Index([], dtype=object), pd.DatetimeIndex([])], names=["symbol", "date"]
+    )
+    return pd.DataFrame(columns=PRICE_COLUMNS, index=index)
+
+
+def to_panel(df: pd.DataFrame, symbols: List[str], adjusted: bool = False):
+    """
+    Turn a provider response for `symbols` into a tidy frame indexed by (symbol, date).
+
+    Multi-symbol responses carry a `symbol` column; single-symbol ones do not.
+    """
+    if df is None or df.empty:
+        return empty_panel()
+
+    if "symbol" not in df.columns:
+        df = df.assign(symbol=symbols[0])
+
+    frames = {
+        str(symbol).upper(): normalize_prices(group.drop(columns="symbol"), adjusted)
+        for symbol, group in df.groupby("symbol", sort=False)
+    }
+    frames = {symbol: frame for symbol, frame in frames.items() if not frame.empty}
+    if not frames:
+        return empty_panel()
+    return pd.concat(frames, names=["symbol", "date"])
+
+
+class PriceProvider:
+    """A source of daily OHLCV history for one or more symbols."""
+
+    name: str = "provider"
+
+    def fetch(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        adjusted: bool = False,
+    ) -> pd.DataFrame:
+        """Return normalized prices for `symbols`, indexed by (symbol, date)."""
+        raise NotImplementedError
+
+
+class OpenBBPriceProvider(PriceProvider):
+    """Daily prices from one of OpenBB's equity.price.historical providers."""
+
+    def __init__(self, name: str, batch_size: Optional[int] = None):
+        self.name = name
+        self.batch_size = batch_size or PROVIDER_BATCH_SIZES.get(name, 1)
+
+    def fetch(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        adjusted: bool = False,
+    ) -> pd.DataFrame:
+        kwargs = {"start_date": start_date, "provider": self.name}
+        if end_date:
+            kwargs["end_date"] = end_date
+        if adjusted and self.name in ("yfinance", "fmp"):
+            kwargs["adjustment"] = "splits_and_dividends"
+
+        frames = []
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i : i + self.batch_size]
+            df = schedule_fetch(
+                self.name,
+                get_obb().equity.price.historical,
+                ",".join(batch),
+                **kwargs,
+            ).to_df()
+            frames.append(to_panel(df.reset_index(), batch, adjusted))
+        return pd.concat(frames) if frames else empty_panel()
+
+
+class FakePriceProvider(PriceProvider):
+    """
+    A local provider for tests and benchmarks that returns synthetic prices after an
+    injected delay, with optional latency spikes and failures.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        delay: float = 0.0,
+        spike_delay: float = 0.0,
+        spike_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.delay = delay
+        self.spike_delay = spike_delay
+        self.spike_rate = spike_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def fetch(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        adjusted: bool = False,
+    ) -> pd.DataFrame:
+        self.calls += 1
+        spike = self.random.random() < self.spike_rate
+        time.sleep(self.spike_delay if spike else self.delay)
+        if self.random.random() < self.error_rate:
+            raise ConnectionError(f"{self.name} failed to fetch {','.join(symbols)}")
+
+        dates = pd.bdate_range(start_date, end_date or datetime.now(), name="date")
+        frames = {}
+        for seed, symbol in enumerate(symbols):
+            returns = np.random.default_rng(seed).normal(0, 0.01, len(dates))
+            close = 100 * np.exp(np.cumsum(returns))
+            frames[symbol] = pd.DataFrame(
+                {
+                    "open": close,
+                    "high": close * 1.01,
+                    "low": close * 0.99,
+                    "close": close,
+                    "volume": 1_000_000,
+                },
+                index=dates,
+            )
+        return pd.concat(frames, names=["symbol", "date"])
+
+
+class ProviderStats:
+    """Recent latencies and error counts for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies.append(latency)
+            self.outcomes.append(ok)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < min_samples:
+                return None
+            return float(np.quantile(self.latencies, q))
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def summary(self) -> dict:
+        return {
+            "requests": len(self.outcomes),
+            "p50": self.quantile(0.5, min_samples=1),
+            "p95": self.quantile(0.95, min_samples=1),
+            "error_rate": self.error_rate(),
+        }
+
+
+class HedgedPriceFetcher:
+    """
+    Fetch prices from a list of providers with hedging and failover.
+
+    The first healthy provider is asked first. If it has not answered within the
+    `hedge_quantile` of its recent latencies (HEDGE_DEFAULT_DELAY until there are
+    enough samples), the same request is sent to the next provider and whichever
+    answers first wins. Errors and empty results fail over to the next provider right
+    away. Requests that lose the race still finish in the background and are recorded,
+    so the latency statistics include the slow tail.
+
+    Providers with an error rate above `max_error_rate` are tried last.
+    """
+
+    def __init__(
+        self,
+        providers: List[PriceProvider],
+        hedge_quantile: float = HEDGE_QUANTILE,
+        min_delay: float = HEDGE_MIN_DELAY,
+        default_delay: float = HEDGE_DEFAULT_DELAY,
+        max_error_rate: float = 0.5,
+        max_workers: int = 16,
+    ):
+        if not providers:
+            raise ValueError("HedgedPriceFetcher needs at least one provider")
+
+        self.providers = providers
+        self.hedge_quantile = hedge_quantile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.max_error_rate = max_error_rate
+        self.stats = {provider.name: ProviderStats() for provider in providers}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prices"
+        )
+
+    def hedge_delay(self, provider: PriceProvider) -> float:
+        delay = self.stats[provider.name].quantile(self.hedge_quantile)
+        return max(self.min_delay, self.default_delay if delay is None else delay)
+
+    def ordered_providers(self) -> List[PriceProvider]:
+        healthy = [
+            p
+            for p in self.providers
+            if self.stats[p.name].error_rate() <= self.max_error_rate
+        ]
+        return healthy + [p for p in self.providers if p not in healthy]
+
+    def _submit(self, provider: PriceProvider, *args) -> Future:
+        def run():
+            start = time.perf_counter()
+            try:
+                df = provider.fetch(*args)
+            except Exception:
+                self.stats[provider.name].record(time.perf_counter() - start, False)
+                raise
+            self.stats[provider.name].record(time.perf_counter() - start, True)
+            return df
+
+        context = contextvars.copy_context()
+        return self.executor.submit(context.run, run)
+
+    def fetch(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: Optional[str] = None,
+        adjusted: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Fetch daily prices for a group of symbols from the fastest healthy provider.
+
+        Args:
+            symbols (List[str]): The tickers, fetched in as few upstream calls as the
+                provider allows.
+            start_date (str): First date, 'YYYY-MM-DD'.
+            end_date (str): Last date, 'YYYY-MM-DD'. Defaults to today.
+            adjusted (bool): Return split- and dividend-adjusted prices.
+
+        Returns:
+            pd.DataFrame: Normalized prices indexed by (symbol, date); empty if no
+            provider has data for the symbols.
+        """
+        symbol = ",".join(symbols)
+        waiting = list(self.ordered_providers())
+        in_flight = {}
+        last_error = None
+        empty = None
+
+        def launch_next() -> float:
+            provider = waiting.pop(0)
+            in_flight[
+                self._submit(provider, symbols, start_date, end_date, adjusted)
+            ] = provider
+            return self.hedge_delay(provider)
+
+        hedge_delay = launch_next()
+        while in_flight:
+            check_deadline()
+            timeout = hedge_delay if waiting else None
+            left = remaining()
+            if left is not None:
+                timeout = left if timeout is None else min(timeout, left)
+
+            done, _ = wait(
+                list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED
+            )
+            if not done:
+                if waiting:
+                    logger.info(
+                        "hedging %s after %.2fs: %s -> %s",
+                        symbol,
+                        hedge_delay,
+                        ", ".join(p.name for p in in_flight.values()),
+                        waiting[0].name,
+                    )
+                    hedge_delay = launch_next()
+                continue
+
+            for future in done:
+                provider = in_flight.pop(future)
+                try:
+                    df = future.result()
+                except Exception as e:
+                    logger.warning("%s failed for %s: %s", provider.name, symbol, e)
+                    last_error = e
+                    continue
+
+                if not df.empty:
+                    return df
+                empty = df
+
+            if not in_flight and waiting:
+                hedge_delay = launch_next()
+
+        if empty is not None:
+            return empty
+        raise last_error
+
+    def stats_summary(self) -> dict:
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+
+def configured_providers() -> List[PriceProvider]:
+    names = [name.strip() for name in PRICE_PROVIDERS.split(",") if name.strip()]
+    return [
+        OpenBBPriceProvider(name)
+        for name in names
+        if name not in PROVIDER_API_KEYS or os.environ.get(PROVIDER_API_KEYS[name])
+    ]
+
+
+_fetcher: Optional[HedgedPriceFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_price_fetcher() -> HedgedPriceFetcher:
+    """Return the process-wide price fetcher over the configured providers."""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HedgedPriceFetcher(configured_providers())
+        return _fetcher
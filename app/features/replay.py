@@ -0,0 +1,393 @@
+"""
+Record upstream responses to fixture files once, then replay them offline.
+
+Every market data, screener, chart upload and web search call goes through
+`schedule_fetch`, and every LLM call through `get_llm`, so those two places are all of
+the app's network traffic. REPLAY_MODE decides what they do:
+
+- off: call upstream (the default)
+- record: call upstream and save each result under REPLAY_DIR
+- replay: answer from REPLAY_DIR only; a call without a fixture raises ReplayMiss
+- auto: replay when there is a fixture, otherwise record one
+
+A replayed call sleeps as long as the recorded one took, or REPLAY_LATENCY_MS if that
+is a number, so timings look like the real thing without its variance. A streamed LLM
+call yields the recorded message in pieces spread over that time. In replay mode
+the OpenBB client is never imported and no API keys are needed, so the whole agent
+graph runs on a machine with no network access.
+
+A fixture is keyed by the provider, the function name and the arguments. Dates in the
+arguments are stored relative to today, so what was recorded as "two years of history
+up to today" still matches on a later day. For LLM calls the key is the node, the bound
+tool names and the messages, with ids, dates and clock times masked and images left out.
+Fixtures are pickles: only replay ones you recorded yourself.
+"""
+
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+REPLAY_MODES = ("off", "record", "replay", "auto")
+REPLAY_MODE = os.environ.get("REPLAY_MODE", "off").lower()
+REPLAY_DIR = os.environ.get("REPLAY_DIR", ".data/replay")
+# "recorded" sleeps as long as the recorded call took; a number of milliseconds
+# replaces that for every call (0 replays as fast as possible).
+REPLAY_LATENCY_MS = os.environ.get("REPLAY_LATENCY_MS", "recorded")
+
+ISO_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+US_DATE = re.compile(r"\b\d{2}/\d{2}/\d{4}\b")
+CLOCK = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b")
+AGO = re.compile(r"\b\d+ min ago\b|\bjust now\b")
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode for a call that has no recorded fixture."""
+
+
+class ReplayResult:
+    """A recorded OpenBB result, reduced to the DataFrame its callers take from it."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def to_df(self) -> pd.DataFrame:
+        return self.df.copy()
+
+
+class ReplayNamespace:
+    """
+    Stands in for the OpenBB client in replay mode.
+
+    `obb.equity.price.historical` is an object named "historical", which is all a
+    fixture key needs; calling it means the fixture is missing.
+    """
+
+    def __init__(self, path: tuple = ()):
+        self._path = path
+
+    def __getattr__(self, name: str) -> "ReplayNamespace":
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return ReplayNamespace(self._path + (name,))
+
+    @property
+    def __name__(self) -> str:
+        return self._path[-1] if self._path else "obb"
+
+    def __call__(self, *args, **kwargs):
+        raise ReplayMiss(f"obb.{'.'.join(self._path)} has no recorded response")
+
+
+def relative_date(value: date, today: date) -> str:
+    return f"<today{(value - today).days:+d}d>"
+
+
+def relative_dates(text: str, today: date) -> str:
+    """Replace ISO and US dates in `text` with their offset from `today`."""
+
+    def replace(match: re.Match, fmt: str) -> str:
+        try:
+            return relative_date(datetime.strptime(match.group(), fmt).date(), today)
+        except ValueError:
+            return match.group()
+
+    text = ISO_DATE.sub(lambda m: replace(m, "%Y-%m-%d"), text)
+    return US_DATE.sub(lambda m: replace(m, "%m/%d/%Y"), text)
+
+
+def normalize(value: Any, today: date) -> Any:
+    """
+    A JSON-able stand-in for a call argument that is the same whenever the call is.
+
+    Dates become offsets from `today` and temporary file paths a placeholder. Frames
+    and indexes (e.g. a price index passed back in) come from earlier results, which
+    replay returns unchanged, so they are described by their length and endpoints.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        labels = value if isinstance(value, pd.Index) else value.index
+        ends = f" {labels[0]}..{labels[-1]}" if len(labels) else ""
+        return f"<{type(value).__name__} {len(labels)}{ends}>"
+    if isinstance(value, datetime):
+        return relative_date(value.date(), today)
+    if isinstance(value, date):
+        return relative_date(value, today)
+    if isinstance(value, str):
+        if len(value) < 1024 and os.path.isfile(value):
+            return f"<file{os.path.splitext(value)[1]}>"
+        return relative_dates(value, today)
+    if isinstance(value, dict):
+        return {str(k): normalize(v, today) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [normalize(v, today) for v in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+def mask(value: Any) -> Any:
+    """`value` with dates, clock times, ids and images masked, for LLM message keys."""
+    if isinstance(value, str):
+        value = ISO_DATE.sub("<date>", US_DATE.sub("<date>", value))
+        return AGO.sub("<ago>", CLOCK.sub("<time>", value))
+    if isinstance(value, dict):
+        if value.get("type") in ("image", "image_url"):
+            return "<image>"
+        return {k: mask(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, (list, tuple)):
+        return [mask(v) for v in value]
+    return value
+
+
+def message_key(message: BaseMessage) -> dict:
+    calls = getattr(message, "tool_calls", None) or []
+    return {
+        "type": message.type,
+        "content": mask(message.content),
+        "tool_calls": [mask({"name": c["name"], "args": c["args"]}) for c in calls],
+    }
+
+
+def fixture_key(namespace: str, name: str, parts: Any) -> str:
+    payload = json.dumps(
+        [namespace, name, normalize(parts, date.today())], sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def freeze(result: Any) -> Any:
+    """What gets recorded: OpenBB results keep only their DataFrame."""
+    if hasattr(result, "to_df"):
+        return ReplayResult(result.to_df())
+    return result
+
+
+class Replayer:
+    """Records and replays calls as pickles under `root`/<namespace>/."""
+
+    def __init__(
+        self,
+        mode: str = REPLAY_MODE,
+        root: str = REPLAY_DIR,
+        latency_ms: str = REPLAY_LATENCY_MS,
+    ):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"REPLAY_MODE must be one of {', '.join(REPLAY_MODES)}")
+        self.mode = mode
+        self.root = root
+        self.latency = (
+            None if str(latency_ms) in ("", "recorded") else float(latency_ms) / 1000
+        )
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def path(self, namespace: str, name: str, parts: Any) -> str:
+        key = fixture_key(namespace, name, parts)
+        return os.path.join(self.root, namespace, f"{name}-{key}.pkl")
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def load(self, path: str) -> Optional[dict]:
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str, fixture: dict) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(fixture, f)
+        os.replace(tmp, path)
+
+    def call(self, namespace: str, name: str, parts: Any, fn: Callable[[], Any]) -> Any:
+        """
+        Replay the fixture for (`namespace`, `name`, `parts`), or record `fn()`.
+
+        Args:
+            namespace (str): The provider, or "llm/<node>".
+            name (str): The function being called.
+            parts (Any): Everything else the result depends on, usually the arguments.
+            fn (Callable): Makes the real call.
+
+        Returns:
+            Any: The recorded result; a live result goes through `freeze` first, so
+            recording and replaying return the same kind of object.
+        """
+        result, delay = self.fetch(namespace, name, parts, fn)
+        time.sleep(delay)
+        return result
+
+    def fetch(
+        self, namespace: str, name: str, parts: Any, fn: Callable[[], Any]
+    ) -> Tuple[Any, float]:
+        """
+        `call` without the wait: the result, and how many seconds replaying it should
+        take (0 for a live call, which has already taken its time).
+        """
+        path = self.path(namespace, name, parts)
+        if self.mode in ("replay", "auto"):
+            fixture = self.load(path)
+            if fixture is not None:
+                self._count("replayed")
+                latency = self.latency
+                return fixture["result"], (
+                    fixture["seconds"] if latency is None else latency
+                )
+            if self.mode == "replay":
+                self._count("missed")
+                raise ReplayMiss(
+                    f"No recorded {namespace} response for {name} at {path}; "
+                    "record one with REPLAY_MODE=record or auto"
+                )
+
+        start = time.perf_counter()
+        result = freeze(fn())
+        self.save(
+            path,
+            {
+                "namespace": namespace,
+                "name": name,
+                "parts": normalize(parts, date.today()),
+                "result": result,
+                "seconds": time.perf_counter() - start,
+                "recorded_at": datetime.now().isoformat(),
+            },
+        )
+        self._count("recorded")
+        return result, 0.0
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "dir": self.root, **self.counts}
+
+
+_replayer = Replayer()
+
+
+def get_replayer() -> Replayer:
+    return _replayer
+
+
+def replay_fetch(provider: str, fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """Call `fn(*args, **kwargs)` for `provider`, through the fixtures when enabled."""
+    if not _replayer.enabled:
+        return fn(*args, **kwargs)
+    name = getattr(fn, "__name__", type(fn).__name__)
+    return _replayer.call(provider, name, [args, kwargs], lambda: fn(*args, **kwargs))
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Records and replays the responses of the chat model for one graph node.
+
+    In replay mode `model` is None: no client is created and no API key is needed.
+    """
+
+    node: str
+    model: Optional[Any] = None
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools: list, **kwargs) -> "ReplayChatModel":
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+
+        return ReplayChatModel(
+            node=self.node,
+            model=self.model.bind_tools(tools, **kwargs) if self.model else None,
+            tool_names=[convert_to_openai_tool(t)["function"]["name"] for t in tools],
+        )
+
+    def _fetch(
+        self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs
+    ) -> Tuple[BaseMessage, float]:
+        if self.model is None and _replayer.mode != "replay":
+            raise ValueError("ReplayChatModel needs a model to record from")
+
+        return _replayer.fetch(
+            f"llm/{self.node}",
+            "chat",
+            [self.tool_names, [message_key(m) for m in messages]],
+            lambda: self.model.invoke(messages, stop=stop, **kwargs),
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs,
+    ) -> ChatResult:
+        message, delay = self._fetch(messages, stop, **kwargs)
+        time.sleep(delay)
+        # The recorded run id would make every replay of this turn the same message.
+        return ChatResult(
+            generations=[ChatGeneration(message=message.copy(update={"id": None}))]
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        The recorded message in pieces, spread evenly over the recorded latency.
+
+        Text content comes a word at a time and block content (a tool-use turn) a
+        block at a time; the tool calls and metadata come with the last piece, so the
+        pieces add up to the recorded message.
+        """
+        message, delay = self._fetch(messages, stop, **kwargs)
+        content = message.content
+        if isinstance(content, str):
+            pieces: list = re.split(r"(?<=\s)(?=\S)", content)
+        else:
+            pieces = [[block] for block in content] or [[]]
+
+        tool_call_chunks = [
+            {
+                "name": call["name"],
+                "args": json.dumps(call["args"]),
+                "id": call["id"],
+                "index": index,
+            }
+            for index, call in enumerate(getattr(message, "tool_calls", []))
+        ]
+        for i, piece in enumerate(pieces):
+            time.sleep(delay / len(pieces))
+            if i < len(pieces) - 1:
+                chunk = AIMessageChunk(content=piece)
+            else:
+                chunk = AIMessageChunk(
+                    content=piece,
+                    tool_call_chunks=tool_call_chunks,
+                    response_metadata=message.response_metadata,
+                    usage_metadata=getattr(message, "usage_metadata", None),
+                )
+            if run_manager and isinstance(piece, str):
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
@@ -0,0 +1,238 @@
+"""
+Vectorized risk calculations for many symbols or candidate trades at once.
+
+Every function takes and returns arrays (or frames indexed by symbol), so a whole
+watchlist goes through in one call: technical stop levels, the R-multiple ladder,
+position sizes, and a portfolio-level cap on the total amount at risk.
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.features.snapshot import LEVEL_COLUMNS, get_snapshot
+
+R_MULTIPLES = (1, 2, 3, 4)
+# Levels a default stop is chosen from, nearest one below the entry first.
+STOP_CANDIDATES = ["support", "sma_20", "sma_50", "sma_200"]
+# Total risk across all planned positions, and the largest single position, as a
+# percentage of the account.
+MAX_PORTFOLIO_RISK_PERCENT = 6.0
+MAX_POSITION_PERCENT = 25.0
+
+
+def compute_levels(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    Last close, 20-day support/resistance and SMA 20/50/200 for every symbol in a
+    `fetch_many` panel, matching `calculate_technical_levels` for each one.
+    """
+    columns = ["close"] + LEVEL_COLUMNS
+    if panel.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="symbol"))
+
+    by_symbol = panel.groupby(level="symbol")
+
+    def tail_mean(n: int) -> pd.Series:
+        tail = by_symbol.tail(n).groupby(level="symbol")["close"]
+        return tail.mean().where(tail.count() >= n)
+
+    tail_20 = by_symbol.tail(20).groupby(level="symbol")
+    return pd.DataFrame(
+        {
+            "close": by_symbol["close"].last(),
+            "support": tail_20["low"].min(),
+            "resistance": tail_20["high"].max(),
+            "sma_20": tail_mean(20),
+            "sma_50": tail_mean(50),
+            "sma_200": tail_mean(200),
+        }
+    )[columns]
+
+
+def latest_levels(symbols: Sequence[str]) -> pd.DataFrame:
+    """
+    Stop levels for `symbols`, indexed by symbol.
+
+    Symbols in the current indicator snapshot are read from its arrays; the rest come
+    from one batched year of unadjusted prices.
+    """
+    from app.tools.utils import fetch_many
+
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    frames = []
+
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        hits = [symbol for symbol in symbols if symbol in snapshot]
+        if hits:
+            rows = np.array([snapshot.rows[symbol] for symbol in hits])
+            frames.append(
+                pd.DataFrame(
+                    {
+                        col: snapshot.levels[col][rows]
+                        for col in ["close"] + LEVEL_COLUMNS
+                    },
+                    index=pd.Index(hits, name="symbol"),
+                )
+            )
+            symbols = [symbol for symbol in symbols if symbol not in hits]
+
+    if symbols:
+        end_date = datetime.now()
+        panel = fetch_many(symbols, end_date - timedelta(days=365), end_date)
+        frames.append(compute_levels(panel))
+
+    return pd.concat(frames) if frames else compute_levels(pd.DataFrame())
+
+
+def nearest_stop(entries: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """
+    The highest level below each entry, or NaN if none is.
+
+    Args:
+        entries (np.ndarray): Entry prices, shape (n,).
+        levels (np.ndarray): Candidate stop levels, shape (n, k).
+
+    Returns:
+        np.ndarray: One stop per entry.
+    """
+    below = np.where(levels < entries[:, None], levels, -np.inf)
+    stops = below.max(axis=1)
+    return np.where(np.isfinite(stops), stops, np.nan)
+
+
+def r_ladder(
+    entries: np.ndarray, stops: np.ndarray, multiples: Sequence[float] = R_MULTIPLES
+) -> np.ndarray:
+    """
+    Profit targets at each R multiple, shape (n, len(multiples)).
+
+    A stop below the entry is a long trade and targets go up; a stop above it is a
+    short and targets go down.
+    """
+    risk = np.abs(entries - stops)
+    direction = np.sign(entries - stops)
+    return entries[:, None] + (direction * risk)[:, None] * np.asarray(multiples)
+
+
+def position_sizes(
+    entries: np.ndarray,
+    stops: np.ndarray,
+    account_size: float,
+    risk_percent: float,
+    max_position_percent: float = MAX_POSITION_PERCENT,
+    max_portfolio_risk_percent: Optional[float] = MAX_PORTFOLIO_RISK_PERCENT,
+) -> np.ndarray:
+    """
+    Whole shares per trade so each risks `risk_percent` of the account.
+
+    Positions are capped at `max_position_percent` of the account each. If all of them
+    together would risk more than `max_portfolio_risk_percent`, every position is
+    scaled down by the same factor.
+
+    Returns:
+        np.ndarray: Shares per trade, 0 where the risk per share is 0 or unknown.
+    """
+    risk_per_share = np.abs(entries - stops)
+    valid = np.isfinite(risk_per_share) & (risk_per_share > 0) & (entries > 0)
+    safe_risk = np.where(valid, risk_per_share, 1.0)
+    safe_entries = np.where(valid, entries, 1.0)
+
+    shares = account_size * risk_percent / 100 / safe_risk
+    shares = np.minimum(
+        shares, account_size * max_position_percent / 100 / safe_entries
+    )
+    shares = np.where(valid, shares, 0.0)
+
+    if max_portfolio_risk_percent is not None:
+        total_risk = (shares * safe_risk).sum()
+        limit = account_size * max_portfolio_risk_percent / 100
+        if total_risk > limit:
+            shares *= limit / total_risk
+
+    return np.floor(shares)
+
+
+def fill_missing(values: Optional[Sequence[Optional[float]]], default: np.ndarray):
+    """Use `values` where given (not None) and `default` elsewhere; also return the mask."""
+    given = np.full(default.shape, np.nan)
+    if values is not None:
+        values = list(values)[: len(default)]
+        given[: len(values)] = [np.nan if v is None else v for v in values]
+    return np.where(np.isnan(given), default, given), ~np.isnan(given)
+
+
+def risk_plan(
+    symbols: Iterable[str],
+    entry_prices: Optional[Sequence[Optional[float]]] = None,
+    stop_prices: Optional[Sequence[Optional[float]]] = None,
+    account_size: float = 100000.0,
+    risk_percent: float = 1.0,
+    multiples: Sequence[float] = R_MULTIPLES,
+    max_position_percent: float = MAX_POSITION_PERCENT,
+    max_portfolio_risk_percent: Optional[float] = MAX_PORTFOLIO_RISK_PERCENT,
+) -> pd.DataFrame:
+    """
+    Stops, R targets and position sizes for a list of symbols in one table.
+
+    Missing entries default to the last close, and missing stops to the nearest of
+    support and the 20/50/200-day SMAs below the entry.
+
+    Args:
+        symbols (Iterable[str]): The symbols to plan, one row each.
+        entry_prices (Sequence[float]): Entry per symbol; None entries use the last close.
+        stop_prices (Sequence[float]): Stop per symbol; None entries use the nearest level.
+        account_size (float): The account size in dollars.
+        risk_percent (float): The percentage of the account risked per trade.
+        multiples (Sequence[float]): The R multiples to compute targets for.
+        max_position_percent (float): The largest position, as a percentage of the account.
+        max_portfolio_risk_percent (float): The total risk cap, or None for no cap.
+
+    Returns:
+        pd.DataFrame: One row per symbol.
+    """
+    symbols = [symbol.upper() for symbol in symbols]
+    levels = latest_levels(symbols).reindex(symbols)
+
+    candidates = levels[STOP_CANDIDATES].to_numpy(float)
+    entries, _ = fill_missing(entry_prices, levels["close"].to_numpy(float))
+    stops, stop_given = fill_missing(stop_prices, nearest_stop(entries, candidates))
+
+    matches = np.isclose(candidates, stops[:, None])
+    basis = np.where(
+        matches.any(axis=1), np.array(STOP_CANDIDATES)[matches.argmax(axis=1)], "-"
+    )
+    basis = np.where(stop_given, "given", basis)
+
+    shares = position_sizes(
+        entries,
+        stops,
+        account_size,
+        risk_percent,
+        max_position_percent,
+        max_portfolio_risk_percent,
+    )
+    risk_per_share = np.abs(entries - stops)
+    targets = r_ladder(entries, stops, multiples)
+
+    plan = pd.DataFrame(
+        {
+            "symbol": symbols,
+            "entry": entries,
+            "stop": stops,
+            "stop_basis": basis,
+            "risk_per_share": risk_per_share,
+            "shares": shares.astype(int),
+            "position_value": shares * entries,
+            "position_pct": shares * entries / account_size * 100,
+            "dollar_risk": shares * risk_per_share,
+            "risk_pct": shares * risk_per_share / account_size * 100,
+        }
+    )
+    for i, multiple in enumerate(multiples):
+        plan[f"target_{multiple:g}R"] = targets[:, i]
+    for col in ["support", "resistance", "sma_50", "sma_200"]:
+        plan[col] = levels[col].to_numpy(float)
+    return plan
@@ -0,0 +1,261 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.features.deadline import call_with_deadline_then, check_deadline, remaining
+from app.features.replay import replay_fetch
+
+SCHEDULER_CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "8"))
+# Slots that only interactive requests may use, so a scan or cache warm can never take
+# every connection.
+SCHEDULER_RESERVED_INTERACTIVE = int(
+    os.environ.get("SCHEDULER_RESERVED_INTERACTIVE", "2")
+)
+
+# Requests per second and burst size per upstream provider. Override with e.g.
+# RATE_LIMIT_YFINANCE="2/5".
+DEFAULT_RATE_LIMITS = {
+    "yfinance": (2.0, 5),
+    "fmp": (5.0, 10),
+    "tiingo": (1.0, 5),
+    "intrinio": (2.0, 5),
+    "finviz": (0.5, 2),
+    "imgur": (1.0, 3),
+    "default": (5.0, 10),
+}
+
+# Wake up at least this often to re-check the deadline while queued.
+POLL_SECONDS = 0.25
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    SCAN = 1
+    BACKGROUND = 2
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "fetch_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def fetch_priority(priority: Priority):
+    """Run the fetches made inside this block (and threads it spawns) at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+def load_rate_limits() -> Dict[str, Tuple[float, int]]:
+    limits = dict(DEFAULT_RATE_LIMITS)
+    for provider in list(limits):
+        value = os.environ.get(f"RATE_LIMIT_{provider.upper()}")
+        if value:
+            rate, burst = value.split("/")
+            limits[provider] = (float(rate), int(burst))
+    return limits
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def wait_time(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class FetchScheduler:
+    """
+    Admission control for every upstream data request.
+
+    Callers block in `run()` until three things hold: a concurrency slot is free, the
+    provider's token bucket has a token, and no higher-priority (or older, same
+    priority) request is waiting that could take that slot. Interactive requests always
+    go first; scans and background work only use slots beyond the
+    `reserved_interactive` ones. The request itself then runs on the caller's thread
+    under the current deadline.
+
+    Queue times are recorded per provider and priority for `metrics()`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SCHEDULER_CONCURRENCY,
+        reserved_interactive: int = SCHEDULER_RESERVED_INTERACTIVE,
+        rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.reserved_interactive = min(reserved_interactive, max_concurrency - 1)
+        self.rate_limits = rate_limits or load_rate_limits()
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.active = 0
+
+        self.queue_times = defaultdict(lambda: deque(maxlen=500))
+        self.counts = defaultdict(int)
+
+    def bucket(self, provider: str) -> TokenBucket:
+        if provider not in self.buckets:
+            rate, burst = self.rate_limits.get(provider, self.rate_limits["default"])
+            self.buckets[provider] = TokenBucket(rate, burst)
+        return self.buckets[provider]
+
+    def _slots_for(self, priority: Priority) -> int:
+        if priority == Priority.INTERACTIVE:
+            return self.max_concurrency
+        return self.max_concurrency - self.reserved_interactive
+
+    def _can_start(self, ticket: tuple) -> bool:
+        priority, _, provider = ticket
+        if self.active >= self._slots_for(priority):
+            return False
+        if not self.bucket(provider).available():
+            return False
+
+        # Let an earlier ticket go first if it could start now too.
+        for other in self.waiting:
+            if other >= ticket:
+                continue
+            if (
+                self.active < self._slots_for(other[0])
+                and self.bucket(other[2]).available()
+            ):
+                return False
+        return True
+
+    def _wait_timeout(self, provider: str) -> float:
+        # Slots are handed back through notify_all, so only a token refill needs a
+        # timed wake-up.
+        refill = self.bucket(provider).wait_time()
+        timeout = min(POLL_SECONDS, refill) if refill > 0 else POLL_SECONDS
+        left = remaining()
+        return timeout if left is None else max(0.0, min(timeout, left))
+
+    def acquire(self, provider: str, priority: Optional[Priority] = None) -> float:
+        """Wait for permission to call `provider`. Returns the time spent queued."""
+        priority = current_priority() if priority is None else priority
+        ticket = (priority, next(self.sequence), provider)
+        start = time.perf_counter()
+
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while not self._can_start(ticket):
+                    check_deadline()
+                    self.cond.wait(self._wait_timeout(provider))
+            except BaseException:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.counts[(provider, priority.name, "expired")] += 1
+                self.cond.notify_all()
+                raise
+
+            self.waiting.remove(ticket)
+            heapq.heapify(self.waiting)
+            self.bucket(provider).take()
+            self.active += 1
+
+            queued = time.perf_counter() - start
+            self.queue_times[(provider, priority.name)].append(queued)
+            self.counts[(provider, priority.name, "started")] += 1
+        return queued
+
+    def release(self) -> None:
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def run(self, provider: str, fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """
+        Call `fn` once the scheduler admits a request to `provider`.
+
+        Args:
+            provider (str): The upstream the call hits, e.g. "yfinance" or "finviz".
+            fn (Callable): The blocking call.
+            *args: Positional arguments for `fn`.
+            **kwargs: Keyword arguments for `fn`.
+
+        Returns:
+            Any: Whatever `fn` returns, or its recorded result under REPLAY_MODE.
+        """
+        self.acquire(provider)
+        # The slot is held until the call really returns, not just until this caller
+        # gives up on it at the deadline.
+        return call_with_deadline_then(
+            self.release, replay_fetch, provider, fn, *args, **kwargs
+        )
+
+    def metrics(self) -> dict:
+        """Queue-time percentiles and request counts per provider and priority."""
+        with self.cond:
+            queue_times = {
+                key: list(values) for key, values in self.queue_times.items()
+            }
+            counts = dict(self.counts)
+            snapshot = {"active": self.active, "waiting": len(self.waiting)}
+
+        snapshot["queues"] = {
+            f"{provider}/{priority}": {
+                "started": counts.get((provider, priority, "started"), 0),
+                "expired": counts.get((provider, priority, "expired"), 0),
+                "queue_p50": float(np.quantile(times, 0.5)),
+                "queue_p95": float(np.quantile(times, 0.95)),
+            }
+            for (provider, priority), times in queue_times.items()
+            if times
+        }
+        return snapshot
+
+
+_scheduler: Optional[FetchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FetchScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler()
+        return _scheduler
+
+
+def schedule_fetch(provider: str, fn: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """Run an upstream call through the process-wide scheduler at the current priority."""
+    return get_scheduler().run(provider, fn, *args, **kwargs)
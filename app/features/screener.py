@@ -1,8 +1,10 @@
 import warnings
 
-warnings.filterwarnings("ignore", category=FutureWarning)
+from app.features.cache import cached_until_close
+from app.features.deadline import UPSTREAM_TIMEOUT_SECONDS
+from app.features.scheduler import schedule_fetch
 
-from finvizfinance.screener.overview import Overview
+warnings.filterwarnings("ignore", category=FutureWarning)
 
 # Custom universe criteria, please see FinViz for all available filters
 UNIVERSE_CRITERIA = {
@@ -22,16 +24,28 @@ UNIVERSE_CRITERIA = {
 }
 
 
+def screener_view(filters):
+    from finvizfinance import util
+    from finvizfinance.screener.overview import Overview
+
+    if hasattr(util, "set_timeout"):
+        util.set_timeout(UPSTREAM_TIMEOUT_SECONDS)
+
+    view = Overview()
+    view.set_filter(filters_dict=filters)
+    return view.screener_view(verbose=0)
+
+
 def screener(filters):
     """
     Returns a dataframe of the screener view with the given filters, sorted by Market Cap.
     """
-    view = Overview()
-    view.set_filter(filters_dict=filters)
-    df = view.screener_view(verbose=0)
+    # The filters are arguments of the scheduled call so recorded responses are keyed by them.
+    df = schedule_fetch("finviz", screener_view, filters)
     return df.sort_values(by="Market Cap", ascending=False)
 
 
+@cached_until_close("screener:custom_universe", lambda df: not df.empty)
 def fetch_custom_universe():
     """
     Returns a custom universe of stocks based on the UNIVERSE_CRITERIA dictionary.
@@ -0,0 +1,291 @@
+"""
+A nightly snapshot of the indicator table for every symbol in the universe.
+
+`get_stock_price_history` used to run `add_technicals` over two years of prices and
+then keep only the last 30 rows. The snapshot stage does that work once after the
+close for the whole universe and stores the result as one `.npy` file per column:
+
+    <SNAPSHOT_DIR>/CURRENT                  name of the published snapshot
+    <SNAPSHOT_DIR>/<session>-<stamp>/
+        index.json                          session, symbols, column names
+        window/<i>.npy                      float64, (symbols, WINDOW), oldest first,
+                                            one per entry of index.json "columns"
+        window/date.npy                     int64 days since epoch, -1 for padding
+        levels/<column>.npy                 float64, (symbols,), the risk tool's stops
+                                            and the last unadjusted close
+
+Readers open the arrays with `mmap_mode="r"`, so every API worker shares the same page
+cache and a lookup only touches the rows it reads. Symbols with fewer than WINDOW rows
+are left-padded with NaN, which keeps the latest row in the last column.
+
+    python -m app.features.snapshot AAPL MSFT   # or no symbols for the warm universe
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.features.market_calendar import market_data_date
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", ".data/snapshot")
+# Rows kept per symbol; the price history tool returns the last 30.
+WINDOW = 30
+# Published snapshots kept on disk besides the current one.
+KEEP_SNAPSHOTS = 2
+
+HISTORY_DAYS = 365 * 2 + 7
+LEVEL_COLUMNS = ["support", "resistance", "sma_20", "sma_50", "sma_200"]
+# Stored with the stop levels: the same levels plus the last unadjusted close.
+SNAPSHOT_LEVELS = LEVEL_COLUMNS + ["close"]
+
+
+def compute_indicator_window(prices: pd.DataFrame, window: int = WINDOW):
+    """Run `add_technicals` over one symbol's prices and keep the last `window` rows."""
+    from app.features.technical import add_technicals
+
+    return add_technicals(prices.copy())[-window:]
+
+
+def build_snapshot(
+    symbols: Iterable[str],
+    root: str = SNAPSHOT_DIR,
+    window: int = WINDOW,
+) -> Optional[str]:
+    """
+    Compute the indicator window and stop levels for `symbols` and publish them.
+
+    Prices come from two batched `fetch_many` calls (adjusted for the indicators, as
+    in the price history tool, and raw for the stops, as in the risk tool), so inside
+    the cache warmer they are served from its prefetched download. The stop levels
+    for all symbols come from one vectorized `risk.compute_levels` over the raw panel.
+
+    Args:
+        symbols (Iterable[str]): The tickers to include.
+        root (str): The snapshot directory.
+        window (int): Rows kept per symbol.
+
+    Returns:
+        str: The published snapshot's directory, or None if no symbol had data.
+    """
+    from app.features.risk import compute_levels
+    from app.tools.utils import fetch_many, select_symbol
+
+    start = time.perf_counter()
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    history_start = datetime.now() - timedelta(days=HISTORY_DAYS)
+    adjusted = fetch_many(symbols, history_start, adjusted=True)
+    raw = fetch_many(symbols, datetime.now() - timedelta(days=365))
+    stop_levels = compute_levels(raw)
+
+    frames: Dict[str, pd.DataFrame] = {}
+    levels: Dict[str, List[float]] = {}
+    for symbol in symbols:
+        prices = select_symbol(adjusted, symbol)
+        if prices.empty:
+            continue
+        try:
+            frames[symbol] = compute_indicator_window(prices, window)
+            levels[symbol] = (
+                stop_levels.loc[symbol, SNAPSHOT_LEVELS].astype(float).tolist()
+                if symbol in stop_levels.index
+                else [np.nan] * len(SNAPSHOT_LEVELS)
+            )
+        except Exception as e:
+            logger.warning("Snapshot skipped %s: %s", symbol, e)
+            frames.pop(symbol, None)
+
+    if not frames:
+        logger.warning("No data for any of the %d snapshot symbols", len(symbols))
+        return None
+
+    included = list(frames)
+    columns = list(dict.fromkeys(col for df in frames.values() for col in df.columns))
+    # Stored as float64, so remember which columns (volume) to turn back into ints.
+    int_columns = [
+        col
+        for col in columns
+        if all(
+            pd.api.types.is_integer_dtype(df[col])
+            for df in frames.values()
+            if col in df
+        )
+    ]
+    session = market_data_date().isoformat()
+    path = os.path.join(root, f"{session}-{int(time.time())}")
+    os.makedirs(os.path.join(path, "window"))
+    os.makedirs(os.path.join(path, "levels"))
+
+    dates = np.full((len(included), window), -1, dtype=np.int64)
+    values = {col: np.full((len(included), window), np.nan) for col in columns}
+    for row, symbol in enumerate(included):
+        df = frames[symbol]
+        offset = window - len(df)
+        dates[row, offset:] = (
+            pd.DatetimeIndex(df.index).values.astype("datetime64[D]").astype(np.int64)
+        )
+        for col in df.columns:
+            values[col][row, offset:] = pd.to_numeric(df[col], errors="coerce")
+
+    np.save(os.path.join(path, "window", "date.npy"), dates)
+    for i, col in enumerate(columns):
+        np.save(os.path.join(path, "window", f"{i}.npy"), values[col])
+
+    level_values = np.array([levels[symbol] for symbol in included], dtype=np.float64)
+    for i, col in enumerate(SNAPSHOT_LEVELS):
+        np.save(os.path.join(path, "levels", f"{col}.npy"), level_values[:, i])
+
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(
+            {
+                "session": session,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "window": window,
+                "symbols": included,
+                # Indicator names such as 52_WK_HIGH are not safe file names, so
+                # window columns are stored by position.
+                "columns": columns,
+                "int_columns": int_columns,
+                "levels": SNAPSHOT_LEVELS,
+            },
+            f,
+        )
+
+    publish(root, path)
+    logger.info(
+        "Published snapshot %s: %d symbols in %.1fs",
+        path,
+        len(included),
+        time.perf_counter() - start,
+    )
+    return path
+
+
+def publish(root: str, path: str) -> None:
+    """Point CURRENT at `path` atomically and remove older snapshots."""
+    tmp = os.path.join(root, "CURRENT.tmp")
+    with open(tmp, "w") as f:
+        f.write(os.path.basename(path))
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+
+    published = sorted(
+        name
+        for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and name != os.path.basename(path)
+    )
+    for name in published[:-KEEP_SNAPSHOTS]:
+        # Open memory maps keep their pages; the files go away once they are closed.
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+class IndicatorSnapshot:
+    """Read-only, memory-mapped view of a published snapshot."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.index = json.load(f)
+
+        self.session = self.index["session"]
+        self.symbols: List[str] = self.index["symbols"]
+        self.columns: List[str] = self.index["columns"]
+        self.rows = {symbol: row for row, symbol in enumerate(self.symbols)}
+
+        self.dates = np.load(os.path.join(path, "window", "date.npy"), mmap_mode="r")
+        self.window = [
+            np.load(os.path.join(path, "window", f"{i}.npy"), mmap_mode="r")
+            for i in range(len(self.columns))
+        ]
+        self.levels = {
+            col: np.load(os.path.join(path, "levels", f"{col}.npy"), mmap_mode="r")
+            for col in self.index["levels"]
+        }
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self.rows
+
+    def is_current(self) -> bool:
+        """True while the snapshot's session is still the latest completed one."""
+        return self.session == market_data_date().isoformat()
+
+    def history(self, symbol: str) -> pd.DataFrame:
+        """The symbol's indicator rows, oldest first, indexed by date."""
+        row = self.rows[symbol.upper()]
+        dates = self.dates[row]
+        valid = dates >= 0
+        df = pd.DataFrame(
+            {col: self.window[i][row][valid] for i, col in enumerate(self.columns)},
+            index=pd.DatetimeIndex(dates[valid].astype("datetime64[D]"), name="date"),
+        )
+        for col in self.index.get("int_columns", []):
+            df[col] = df[col].astype(np.int64)
+        return df
+
+    def latest(self, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """The latest indicator row for `symbols` (default all), indexed by symbol."""
+        symbols = (
+            self.symbols
+            if symbols is None
+            else [s.upper() for s in symbols if s.upper() in self.rows]
+        )
+        rows = np.array([self.rows[symbol] for symbol in symbols], dtype=np.int64)
+        return pd.DataFrame(
+            {col: self.window[i][rows, -1] for i, col in enumerate(self.columns)},
+            index=pd.Index(symbols, name="symbol"),
+        )
+
+    def stop_levels(self, symbol: str) -> Dict[str, float]:
+        row = self.rows[symbol.upper()]
+        return {col: float(values[row]) for col, values in self.levels.items()}
+
+
+_snapshot: Optional[IndicatorSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(root: str = SNAPSHOT_DIR) -> Optional[IndicatorSnapshot]:
+    """
+    Return the published snapshot if it is for the latest session, else None.
+
+    CURRENT is re-read on every call (one small file), so a snapshot published by the
+    nightly job is picked up without restarting the API.
+    """
+    global _snapshot
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            path = os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.path != path:
+            try:
+                _snapshot = IndicatorSnapshot(path)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not open snapshot %s: %s", path, e)
+                return None
+        snapshot = _snapshot
+
+    return snapshot if snapshot.is_current() else None
+
+
+if __name__ == "__main__":
+    import sys
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.features.warmer import warm_universe
+
+    print(build_snapshot([s.upper() for s in sys.argv[1:]] or warm_universe()))
@@ -0,0 +1,415 @@
+"""
+A local symbol master and a trigram index for resolving company names to tickers.
+
+The master lists every ticker with its company name, a few aliases and its sector. It
+is stored as JSON at SYMBOLS_PATH and refreshed every SYMBOLS_REFRESH_DAYS by the cache
+warmer (or `python -m app.features.symbols --refresh`) from:
+
+- the SEC company ticker list, through `obb.equity.search`, for every listed name
+- the FinViz screener universe, for sectors and industries
+- SEED_SYMBOLS below, for aliases such as share classes and former names
+
+Until a master has been downloaded the seed list is used on its own.
+
+Names and aliases are normalized (lower case, no punctuation, no "Inc."/"Corp."
+suffixes) and indexed by their character trigrams. A query scores every name's
+trigram overlap at once from the postings with one `np.bincount`, then ranks the best
+few by edit similarity. "appel", "nvidea" and "Alphabet class A" resolve in about
+0.25 ms against 10,000 names, without the LLM or a web search (see
+`benchmarks/symbol_lookup.py`).
+
+    python -m app.features.symbols appel nvidea "alphabet class a"
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import argparse
+import threading
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS_PATH = os.environ.get("SYMBOLS_PATH", ".data/symbols.json")
+SYMBOLS_REFRESH_DAYS = float(os.environ.get("SYMBOLS_REFRESH_DAYS", "7"))
+# Names with the highest trigram overlap that are re-ranked by edit similarity.
+CANDIDATES = 8
+# Lowest similarity for a name found inside a free-text question.
+MIN_TEXT_SCORE = 0.8
+# A query that matches only the first words of a name ("ford" for "ford motor")
+# scores this much of its similarity to those words, so a full match ranks higher.
+PREFIX_WEIGHT = 0.95
+
+# (symbol, name, aliases, sector) for the most asked-about names. The SEC list has
+# one name per ticker, so share classes and brand names only come from here.
+SEED_SYMBOLS = [
+    ("AAPL", "Apple Inc.", [], "Technology"),
+    ("MSFT", "Microsoft Corporation", [], "Technology"),
+    ("NVDA", "NVIDIA Corporation", [], "Technology"),
+    ("AMZN", "Amazon.com, Inc.", ["amazon"], "Consumer Cyclical"),
+    (
+        "GOOGL",
+        "Alphabet Inc. Class A",
+        ["google", "alphabet"],
+        "Communication Services",
+    ),
+    ("GOOG", "Alphabet Inc. Class C", ["google class c"], "Communication Services"),
+    ("META", "Meta Platforms, Inc.", ["facebook", "meta"], "Communication Services"),
+    ("TSLA", "Tesla, Inc.", [], "Consumer Cyclical"),
+    ("BRK-B", "Berkshire Hathaway Inc. Class B", ["berkshire"], "Financial"),
+    ("BRK-A", "Berkshire Hathaway Inc. Class A", [], "Financial"),
+    ("AVGO", "Broadcom Inc.", [], "Technology"),
+    ("TSM", "Taiwan Semiconductor Manufacturing", ["tsmc"], "Technology"),
+    ("AMD", "Advanced Micro Devices, Inc.", ["amd"], "Technology"),
+    ("INTC", "Intel Corporation", [], "Technology"),
+    ("QCOM", "QUALCOMM Incorporated", [], "Technology"),
+    ("MU", "Micron Technology, Inc.", ["micron"], "Technology"),
+    ("ARM", "Arm Holdings plc", [], "Technology"),
+    ("ASML", "ASML Holding N.V.", [], "Technology"),
+    ("SMCI", "Super Micro Computer, Inc.", ["supermicro"], "Technology"),
+    ("ORCL", "Oracle Corporation", [], "Technology"),
+    ("CRM", "Salesforce, Inc.", [], "Technology"),
+    ("ADBE", "Adobe Inc.", [], "Technology"),
+    ("PLTR", "Palantir Technologies Inc.", ["palantir"], "Technology"),
+    ("NFLX", "Netflix, Inc.", [], "Communication Services"),
+    ("DIS", "The Walt Disney Company", ["disney"], "Communication Services"),
+    ("JPM", "JPMorgan Chase & Co.", ["jp morgan", "chase"], "Financial"),
+    ("BAC", "Bank of America Corporation", [], "Financial"),
+    ("GS", "The Goldman Sachs Group, Inc.", ["goldman"], "Financial"),
+    ("V", "Visa Inc.", [], "Financial"),
+    ("MA", "Mastercard Incorporated", [], "Financial"),
+    ("COIN", "Coinbase Global, Inc.", ["coinbase"], "Financial"),
+    ("LLY", "Eli Lilly and Company", ["lilly"], "Healthcare"),
+    ("UNH", "UnitedHealth Group Incorporated", ["united health"], "Healthcare"),
+    ("JNJ", "Johnson & Johnson", ["j&j"], "Healthcare"),
+    ("XOM", "Exxon Mobil Corporation", ["exxon"], "Energy"),
+    ("WMT", "Walmart Inc.", [], "Consumer Defensive"),
+    ("COST", "Costco Wholesale Corporation", ["costco"], "Consumer Defensive"),
+    ("PG", "The Procter & Gamble Company", ["p&g"], "Consumer Defensive"),
+    ("KO", "The Coca-Cola Company", ["coke"], "Consumer Defensive"),
+    ("PEP", "PepsiCo, Inc.", ["pepsi"], "Consumer Defensive"),
+    ("HD", "The Home Depot, Inc.", [], "Consumer Cyclical"),
+    ("MCD", "McDonald's Corporation", [], "Consumer Cyclical"),
+    ("NKE", "NIKE, Inc.", [], "Consumer Cyclical"),
+    ("SBUX", "Starbucks Corporation", [], "Consumer Cyclical"),
+    ("BA", "The Boeing Company", [], "Industrials"),
+    ("SPY", "SPDR S&P 500 ETF Trust", ["s&p 500", "s&p"], "ETF"),
+    ("QQQ", "Invesco QQQ Trust", ["nasdaq 100", "nasdaq"], "ETF"),
+]
+
+# Words dropped from names before indexing: they are in most names and say nothing.
+NAME_SUFFIXES = set(
+    "inc incorporated corp corporation co company companies ltd limited plc llc lp "
+    "sa nv ag se holdings holding group the com".split()
+)
+# Question words that never start a company name when scanning free text.
+QUERY_STOPWORDS = set(
+    "a an and analysis analyze about account all any are at buy can chart charts "
+    "company could daily deep dive do does entry for from full give how i in "
+    "is it latest loss me monthly my of on or plan please position price prices "
+    "risk run sell share shares should show size sizing stock stocks stop target "
+    "technical the to today vs weekly what with would you".split()
+)
+
+_WORD = re.compile(r"[a-z0-9&]+")
+
+
+def normalize(name: str) -> str:
+    """Lower case, punctuation and corporate suffixes removed: "Apple Inc." -> "apple"."""
+    words = _WORD.findall(name.lower().replace("'", ""))
+    kept = [word for word in words if word not in NAME_SUFFIXES]
+    return " ".join(kept or words)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SymbolMatch:
+    symbol: str
+    name: str
+    sector: str
+    score: float
+    matched: str
+
+
+class SymbolIndex:
+    """Exact ticker lookup plus trigram search over normalized names and aliases."""
+
+    def __init__(self, records: List[dict]):
+        self.records = records
+        self.by_symbol = {record["symbol"]: i for i, record in enumerate(records)}
+
+        keys, owners = [], []
+        for i, record in enumerate(records):
+            for text in [record["name"], *record.get("aliases", [])]:
+                key = normalize(text)
+                if key:
+                    keys.append(key)
+                    owners.append(i)
+        self.keys = keys
+        self.owners = np.array(owners, dtype=np.int32)
+        self.gram_counts = np.array([len(trigrams(key)) for key in keys])
+
+        postings: Dict[str, List[int]] = {}
+        for k, key in enumerate(keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(k)
+        self.postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _match(self, i: int, score: float, matched: str) -> SymbolMatch:
+        record = self.records[i]
+        return SymbolMatch(
+            record["symbol"], record["name"], record.get("sector", ""), score, matched
+        )
+
+    def search(
+        self, query: str, limit: int = 5, tickers: bool = True
+    ) -> List[SymbolMatch]:
+        """
+        The best matches for a ticker, company name or alias, highest score first.
+
+        An exact ticker scores 1. Names score their edit similarity to the query,
+        from 0 to 1, or PREFIX_WEIGHT times the similarity to the name's first words
+        if that is higher. Ties go to the record listed first (the seed list, then the
+        SEC list, which is ordered by size).
+        """
+        matches: List[SymbolMatch] = []
+        ticker = query.strip().lstrip("$").upper().replace(".", "-")
+        if tickers and ticker in self.by_symbol:
+            matches.append(self._match(self.by_symbol[ticker], 1.0, ticker))
+
+        text = normalize(query)
+        postings = [self.postings[g] for g in trigrams(text) if g in self.postings]
+        if not text or not postings:
+            return matches[:limit]
+
+        grams = len(trigrams(text))
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.keys))
+        # Dice coefficient of the trigram sets, for every name at once.
+        dice = 2 * shared / (grams + self.gram_counts)
+        top = min(CANDIDATES, np.count_nonzero(shared))
+        candidates = np.argpartition(dice, -top)[-top:]
+
+        n_words = text.count(" ") + 1
+        best: Dict[int, tuple] = {}
+        for k in candidates:
+            key = self.keys[k]
+            score = SequenceMatcher(None, text, key).ratio()
+            prefix = " ".join(key.split()[:n_words])
+            if prefix != key:
+                score = max(
+                    score, PREFIX_WEIGHT * SequenceMatcher(None, text, prefix).ratio()
+                )
+            owner = int(self.owners[k])
+            if score > best.get(owner, (-1.0,))[0]:
+                best[owner] = (score, key)
+
+        seen = {match.symbol for match in matches}
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+        for owner, (score, key) in ranked:
+            if self.records[owner]["symbol"] not in seen:
+                matches.append(self._match(owner, round(score, 3), key))
+        return matches[:limit]
+
+    def find_in_text(
+        self, text: str, min_score: float = MIN_TEXT_SCORE
+    ) -> Optional[SymbolMatch]:
+        """
+        The company a free-text question is about, or None.
+
+        Runs of one to three words that are not common question words are looked up
+        as names, and matches at or above `min_score` are taken best first (longer
+        runs first on a tie), skipping any that overlap words already taken. If that
+        leaves more than one company, e.g. "compare apple and microsoft", the text is
+        ambiguous and None is returned. Bare tickers are left to the caller, since
+        many are ordinary words.
+        """
+        words = _WORD.findall(text.lower())
+        runs: List[List[int]] = [[]]
+        for position, word in enumerate(words):
+            if word in QUERY_STOPWORDS or word.isdigit():
+                if runs[-1]:
+                    runs.append([])
+            else:
+                runs[-1].append(position)
+
+        found = []
+        for run in runs:
+            for size in (3, 2, 1):
+                for start in range(len(run) - size + 1):
+                    span = run[start : start + size]
+                    phrase = " ".join(words[i] for i in span)
+                    if len(phrase) < 3:
+                        continue
+                    for match in self.search(phrase, limit=1, tickers=False):
+                        if match.score >= min_score:
+                            found.append((match, set(span)))
+
+        found.sort(key=lambda item: (-item[0].score, -len(item[1])))
+        taken: set = set()
+        companies: Dict[str, SymbolMatch] = {}
+        for match, span in found:
+            if span & taken:
+                continue
+            taken |= span
+            companies.setdefault(match.symbol, match)
+        if len(companies) != 1:
+            return None
+        return next(iter(companies.values()))
+
+
+def seed_records() -> List[dict]:
+    return [
+        {"symbol": symbol, "name": name, "aliases": aliases, "sector": sector}
+        for symbol, name, aliases, sector in SEED_SYMBOLS
+    ]
+
+
+def merge_records(*sources: Iterable[dict]) -> List[dict]:
+    """Merge record lists by symbol; the first source to name a field keeps it."""
+    merged: Dict[str, dict] = {}
+    for source in sources:
+        for record in source:
+            symbol = record["symbol"].upper().replace(".", "-")
+            current = merged.setdefault(symbol, {"symbol": symbol, "aliases": []})
+            for field in ("name", "sector", "industry"):
+                if record.get(field) and not current.get(field):
+                    current[field] = record[field]
+            current["aliases"] += [
+                alias
+                for alias in record.get("aliases", [])
+                if alias not in current["aliases"]
+            ]
+    return [record for record in merged.values() if record.get("name")]
+
+
+def fetch_sec_records() -> List[dict]:
+    """Every ticker in the SEC company list, in the SEC's order."""
+    from app.features.obb_session import get_obb
+    from app.features.scheduler import schedule_fetch
+
+    df = schedule_fetch(
+        "sec", get_obb().equity.search, query="", provider="sec"
+    ).to_df()
+    return [
+        {"symbol": row["symbol"], "name": row["name"]}
+        for _, row in df.iterrows()
+        if row.get("symbol") and row.get("name")
+    ]
+
+
+def fetch_screener_records() -> List[dict]:
+    """Names, sectors and industries of the FinViz screener universe."""
+    from app.features.screener import fetch_custom_universe
+
+    df = fetch_custom_universe()
+    return [
+        {
+            "symbol": row["Ticker"],
+            "name": row["Company"],
+            "sector": row.get("Sector", ""),
+            "industry": row.get("Industry", ""),
+        }
+        for _, row in df.iterrows()
+    ]
+
+
+def refresh_symbols(path: str = SYMBOLS_PATH) -> int:
+    """
+    Download the symbol master and replace the file at `path` atomically.
+
+    A source that fails is logged and skipped; the seed list is always included.
+
+    Returns:
+        int: The number of symbols written.
+    """
+    sources = [seed_records()]
+    for fetch in (fetch_screener_records, fetch_sec_records):
+        try:
+            sources.append(fetch())
+        except Exception as e:
+            logger.warning("Symbol source %s failed: %s", fetch.__name__, e)
+
+    records = merge_records(*sources)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"created": time.time(), "symbols": records}, f)
+    os.replace(tmp, path)
+    logger.info("Wrote %d symbols to %s", len(records), path)
+    return len(records)
+
+
+def symbols_stale(path: str = SYMBOLS_PATH) -> bool:
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return True
+    return age > SYMBOLS_REFRESH_DAYS * 86400
+
+
+_index: Optional[SymbolIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index(path: str = SYMBOLS_PATH) -> SymbolIndex:
+    """
+    The index over the symbol master at `path`, or over the seed list if there is none.
+
+    The file's mtime is checked on every call, so a refresh by another process is
+    picked up without a restart.
+    """
+    global _index, _index_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            records = seed_records()
+            if mtime is not None:
+                try:
+                    with open(path) as f:
+                        records = merge_records(records, json.load(f)["symbols"])
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning("Could not load symbols from %s: %s", path, e)
+            _index, _index_mtime = SymbolIndex(records), mtime
+        return _index
+
+
+def resolve_symbols(query: str, limit: int = 5) -> List[SymbolMatch]:
+    return get_symbol_index().search(query, limit)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Resolve company names to tickers.")
+    parser.add_argument("queries", nargs="*")
+    parser.add_argument("--refresh", action="store_true", help="Download the master.")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_symbols()
+    for query in args.queries:
+        for match in resolve_symbols(query):
+            print(f"{query!r}: {match}")
@@ -1,9 +1,9 @@
-import pandas_ta as ta
 import numpy as np
-from sklearn.linear_model import LinearRegression
 
 
 def detect_trendline(df):
+    from sklearn.linear_model import LinearRegression
+
     X = np.array(range(len(df))).reshape((-1, 1))
     y = df["close"].values.reshape((-1, 1))
 
@@ -14,7 +14,9 @@ def detect_trendline(df):
     return slope
 
 
-def add_technicals(df):
+def add_technicals(df, bars_per_year=252):
+    import pandas_ta as ta
+
     df["pct_change"] = df["close"].pct_change() * 100
     df["SMA_20"] = ta.sma(df["close"], length=20)
     df["SMA_50"] = ta.sma(df["close"], length=50)
@@ -22,8 +24,8 @@ def add_technicals(df):
     df["SMA_200"] = ta.sma(df["close"], length=200)
     df["ATR"] = ta.atr(df["high"], df["low"], df["close"], length=14)
     df["RSI"] = ta.rsi(df["close"], length=14)
-    df["52_WK_HIGH"] = df["close"].rolling(window=252).max()
-    df["52_WK_LOW"] = df["close"].rolling(window=252).min()
+    df["52_WK_HIGH"] = df["close"].rolling(window=bars_per_year).max()
+    df["52_WK_LOW"] = df["close"].rolling(window=bars_per_year).min()
 
     daily_range = df["high"] - df["low"]
     adr = daily_range.rolling(window=20).mean()
@@ -0,0 +1,249 @@
+"""
+Weekly and monthly bars derived from daily prices, without another download.
+
+Daily bars come from `fetch_many`, which serves them from the shared price panel or a
+PriceSnapshot whenever one covers the request, and are aggregated per calendar week
+(ending Friday) or month. Each bar is dated by its last trading day, so the current,
+still-open period shows up as a partial bar dated today.
+
+Resampled bars are kept per symbol. When newer daily bars arrive, only the last
+(partial) period is rebuilt and new periods are appended; the completed ones are
+reused as they are. The first requested date is moved forward to the start of a
+period, so the oldest bar is always a complete one and a window that slides by a day
+drops whole periods instead of changing the first bar.
+
+`lookback_start` scales the history with the bar size, up to what the cache warmer
+keeps locally (LOCAL_HISTORY_DAYS, enough for LOOKBACK_BARS weekly bars): two years
+for daily bars and about five for weekly and monthly ones, so every timeframe is served
+from the price panel. Weekly bars then have values for every SMA. Monthly bars have
+about 60, so their 150- and 200-bar SMAs stay empty.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.features.providers import PRICE_COLUMNS
+
+# Period alias per timeframe; None keeps the daily bars as they are.
+TIMEFRAMES = {"daily": None, "weekly": "W-FRI", "monthly": "M"}
+# Bars per year, for the 52-week high/low in `add_technicals`.
+BARS_PER_YEAR = {"daily": 252, "weekly": 52, "monthly": 12}
+# Bars fetched for technicals: the 200-bar SMA plus warm-up, so it has values to show.
+LOOKBACK_BARS = 260
+# Daily history has always been two years, more than LOOKBACK_BARS.
+MIN_LOOKBACK_DAYS = 365 * 2
+# The daily history the cache warmer downloads and the price panel holds: enough for
+# LOOKBACK_BARS weekly bars. Longer lookbacks are cut to it.
+LOCAL_HISTORY_DAYS = math.ceil((LOOKBACK_BARS + 1) / BARS_PER_YEAR["weekly"] * 365.25)
+# Resampled symbols kept in memory, least recently used dropped first.
+MAX_CACHED_BARS = 1024
+
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+
+def check_timeframe(timeframe: str) -> str:
+    timeframe = timeframe.lower()
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(
+            f"Unknown timeframe {timeframe!r}, expected one of {', '.join(TIMEFRAMES)}"
+        )
+    return timeframe
+
+
+def lookback_start(
+    timeframe: str, bars: int = LOOKBACK_BARS, end_date: Optional[datetime] = None
+) -> datetime:
+    """
+    The start date that gives at least `bars` whole `timeframe` bars up to `end_date`.
+
+    Args:
+        timeframe (str): "daily", "weekly" or "monthly".
+        bars (int): How many bars are needed. Defaults to LOOKBACK_BARS.
+        end_date (datetime): The last date. Defaults to now.
+
+    Returns:
+        datetime: `end_date` minus the lookback, between MIN_LOOKBACK_DAYS and
+        LOCAL_HISTORY_DAYS; monthly bars get fewer than `bars`.
+    """
+    # One extra bar for the partial first period that `period_start` drops.
+    years = (bars + 1) / BARS_PER_YEAR[check_timeframe(timeframe)]
+    days = min(max(MIN_LOOKBACK_DAYS, math.ceil(years * 365.25)), LOCAL_HISTORY_DAYS)
+    return (end_date or datetime.now()) - timedelta(days=days)
+
+
+def period_start(date: datetime, timeframe: str) -> datetime:
+    """The first day of the first whole `timeframe` period on or after `date`."""
+    rule = TIMEFRAMES[check_timeframe(timeframe)]
+    day = pd.Timestamp(date).normalize()
+    if rule is None:
+        return day.to_pydatetime()
+
+    period = day.to_period(rule)
+    if day > period.start_time:
+        period += 1
+    return period.start_time.to_pydatetime()
+
+
+def resample_ohlcv(daily: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate daily OHLCV (indexed by date) into `timeframe` bars.
+
+    Returns:
+        pd.DataFrame: One row per period, indexed by the period's last trading day.
+    """
+    rule = TIMEFRAMES[check_timeframe(timeframe)]
+    if rule is None or daily.empty:
+        return daily
+
+    daily = daily[PRICE_COLUMNS]
+    periods = daily.index.to_period(rule)
+    bars = daily.groupby(periods).agg(AGGREGATIONS)
+    bars.index = pd.DatetimeIndex(
+        daily.index.to_series().groupby(periods).last().to_numpy(), name="date"
+    )
+    return bars
+
+
+def update_resampled(
+    bars: pd.DataFrame, daily: pd.DataFrame, timeframe: str
+) -> pd.DataFrame:
+    """
+    Bring `bars` up to date with `daily`: rebuild the last period, append new ones.
+
+    Only the daily rows from the start of the last cached period on are aggregated.
+    """
+    if bars.empty:
+        return resample_ohlcv(daily, timeframe)
+
+    rule = TIMEFRAMES[check_timeframe(timeframe)]
+    last_period = bars.index[-1].to_period(rule)
+    recent = daily[daily.index >= last_period.start_time]
+    return pd.concat([bars.iloc[:-1], resample_ohlcv(recent, timeframe)])
+
+
+class ResampledBars:
+    """Per-symbol resampled bars, updated incrementally as daily bars arrive."""
+
+    def __init__(self, max_size: int = MAX_CACHED_BARS):
+        self.max_size = max_size
+        self._bars: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.updates = self.rebuilds = 0
+
+    def get(self, key: Tuple, daily: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """The bars for `daily`, reusing what is cached under `key` where possible."""
+        if daily.empty:
+            return resample_ohlcv(daily, timeframe)
+
+        rule = TIMEFRAMES[check_timeframe(timeframe)]
+        first = daily.index[0].to_period(rule)
+        with self._lock:
+            cached = self._bars.get(key)
+
+        if cached is not None:
+            # Drop periods before the requested window, which starts on a boundary.
+            cached = cached[cached.index.to_period(rule) >= first]
+
+        if self._reusable(cached, daily, first, rule):
+            if cached.index[-1] == daily.index[-1]:
+                bars, counter = cached, "hits"
+            else:
+                bars, counter = update_resampled(cached, daily, timeframe), "updates"
+        else:
+            bars, counter = resample_ohlcv(daily, timeframe), "rebuilds"
+
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._bars[key] = bars
+            self._bars.move_to_end(key)
+            while len(self._bars) > self.max_size:
+                self._bars.popitem(last=False)
+        return bars
+
+    @staticmethod
+    def _reusable(cached, daily: pd.DataFrame, first: pd.Period, rule: str) -> bool:
+        """
+        Whether `cached` can be extended with `daily`: it starts at the same period,
+        ends no later, and its first close is unchanged. Adjusted prices are rescaled
+        back through history after a split or dividend, so a changed close means
+        rebuild.
+        """
+        if (
+            cached is None
+            or cached.empty
+            or cached.index[0].to_period(rule) != first
+            or cached.index[-1] > daily.index[-1]
+        ):
+            return False
+        date = cached.index[0]
+        return date in daily.index and np.isclose(
+            daily.at[date, "close"], cached["close"].iloc[0]
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bars.clear()
+
+
+_resampled = ResampledBars()
+
+
+def get_timeframe_prices(
+    symbol: str,
+    timeframe: str,
+    start_date: datetime,
+    end_date: Optional[datetime] = None,
+    adjusted: bool = False,
+) -> pd.DataFrame:
+    """
+    A symbol's OHLCV in `timeframe` bars, built from the locally held daily bars.
+
+    Args:
+        symbol (str): The ticker.
+        timeframe (str): "daily", "weekly" or "monthly".
+        start_date (datetime): The earliest date wanted; moved forward to a period start.
+        end_date (datetime): The last date. Defaults to today.
+        adjusted (bool): Use split- and dividend-adjusted prices.
+
+    Returns:
+        pd.DataFrame: OHLCV indexed by date.
+    """
+    from app.tools.utils import fetch_many, select_symbol
+
+    timeframe = check_timeframe(timeframe)
+    symbol = symbol.upper()
+    daily = select_symbol(
+        fetch_many([symbol], period_start(start_date, timeframe), end_date, adjusted),
+        symbol,
+    )
+    if TIMEFRAMES[timeframe] is None:
+        return daily
+    return _resampled.get((symbol, timeframe, adjusted), daily, timeframe)
+
+
+def timeframe_technicals(
+    symbol: str,
+    timeframe: str,
+    start_date: datetime,
+    end_date: Optional[datetime] = None,
+    adjusted: bool = False,
+) -> pd.DataFrame:
+    """`get_timeframe_prices` with `add_technicals` computed over the resampled bars."""
+    from app.features.technical import add_technicals
+
+    bars = get_timeframe_prices(symbol, timeframe, start_date, end_date, adjusted)
+    if bars.empty:
+        return bars
+    return add_technicals(bars.copy(), BARS_PER_YEAR[check_timeframe(timeframe)])
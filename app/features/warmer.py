@@ -0,0 +1,274 @@
+"""
+Warm the tool caches after the market close.
+
+Most questions are about a short list of large caps and the names in the screener
+universe. Once the session's data is final, this job downloads their price history
+in a few batched requests, publishes it as the shared price panel (panel.py) and the
+indicator snapshot (snapshot.py), and runs the per-symbol tools (price history with
+technicals, relative strength, quantstats, fundamentals, stops and chart analysis) so
+their observations are already cached when the first question of the next day comes
+in. Everything runs at background priority, so a live request is never queued behind
+it.
+
+    python -m app.features.warmer                  # watchlist + screener universe
+    python -m app.features.warmer --symbols AAPL MSFT --no-charts
+"""
+
+import os
+import time
+import asyncio
+import logging
+import argparse
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from app.features.cache import get_cache
+from app.features.market_calendar import (
+    MARKET_CLOSE,
+    MARKET_TZ,
+    market_data_date,
+    market_now,
+    next_market_close,
+)
+from app.features.scheduler import Priority, fetch_priority
+from app.features.timeframes import LOCAL_HISTORY_DAYS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCHLIST = (
+    "SPY,QQQ,AAPL,MSFT,NVDA,AMZN,GOOGL,META,TSLA,BRK-B,"
+    "AVGO,JPM,LLY,V,UNH,XOM,MA,COST,HD,NFLX"
+)
+WARM_WATCHLIST = [
+    symbol.strip().upper()
+    for symbol in os.environ.get("WARM_WATCHLIST", DEFAULT_WATCHLIST).split(",")
+    if symbol.strip()
+]
+# Symbols warmed at once; the fetch scheduler still applies each provider's limits.
+WARM_CONCURRENCY = int(os.environ.get("WARM_CONCURRENCY", "4"))
+# Minutes after the close before the scheduled run, so providers have final bars.
+WARM_DELAY_MINUTES = int(os.environ.get("WARM_DELAY_MINUTES", "30"))
+WARM_CHARTS = os.environ.get("WARM_CHARTS", "true").lower() == "true"
+WARM_ON_CLOSE = os.environ.get("WARM_ON_CLOSE", "false").lower() == "true"
+
+# Covers the longest lookback of the price history, quantstats and chart tools (the
+# weekly bars), plus a week so the panel still covers requests made days later.
+HISTORY_DAYS = LOCAL_HISTORY_DAYS + 7
+
+
+def warm_universe(watchlist: Iterable[str] = WARM_WATCHLIST) -> List[str]:
+    """Return the watchlist followed by the current screener universe."""
+    from app.features.screener import fetch_custom_universe
+
+    symbols = [symbol.upper() for symbol in watchlist]
+    try:
+        symbols += fetch_custom_universe()["Ticker"].str.upper().tolist()
+    except Exception as e:
+        logger.warning("Could not load the screener universe: %s", e)
+    return list(dict.fromkeys(symbols))
+
+
+def symbol_tools(charts: bool = WARM_CHARTS) -> list:
+    """The per-symbol tools whose observations are warmed."""
+    from app.tools.stock_stats import (
+        get_stock_price_history,
+        get_stock_quantstats,
+        get_stock_ratios,
+        get_key_metrics,
+        get_stock_sector_info,
+        get_valuation_multiples,
+    )
+    from app.tools.stock_relative_strength import get_relative_strength
+    from app.tools.risk_management import calculate_technical_stops
+    from app.tools.stock_charts import get_stock_chart_analysis
+
+    tools = [
+        get_stock_price_history,
+        get_relative_strength,
+        get_stock_quantstats,
+        get_stock_ratios,
+        get_key_metrics,
+        get_stock_sector_info,
+        get_valuation_multiples,
+        calculate_technical_stops,
+    ]
+    if charts:
+        # One vision model call per symbol.
+        tools.append(get_stock_chart_analysis)
+    return tools
+
+
+def warm_symbol(symbol: str, tools: list) -> dict:
+    """Run every tool for `symbol`, storing the observations in the tool cache."""
+    from app.tools.utils import is_cacheable_observation
+
+    result = {"symbol": symbol, "warmed": 0, "failed": []}
+    for tool in tools:
+        try:
+            # Invoke with keyword input, as the agent does, so the cache keys match.
+            observation = tool.invoke({"symbol": symbol})
+        except Exception as e:
+            observation = f"Error: {e}"
+        if is_cacheable_observation(observation):
+            result["warmed"] += 1
+        else:
+            result["failed"].append(tool.name)
+    return result
+
+
+def warm_caches(
+    symbols: Optional[Iterable[str]] = None,
+    charts: bool = WARM_CHARTS,
+    concurrency: int = WARM_CONCURRENCY,
+) -> dict:
+    """
+    Warm the tool caches for `symbols` (by default the watchlist and screener universe).
+
+    Args:
+        symbols (Iterable[str]): The tickers to warm.
+        charts (bool): Also render and analyze charts, which calls the vision model.
+        concurrency (int): How many symbols are warmed at once.
+
+    Returns:
+        dict: A summary with the symbol count, failures and elapsed seconds.
+    """
+    from app.features.panel import write_panel
+    from app.features.snapshot import build_snapshot
+    from app.features.symbols import refresh_symbols, symbols_stale
+    from app.tools.stock_stats import get_stock_universe
+    from app.tools.utils import PriceSnapshot, fetch_many, use_price_snapshots
+
+    start = time.perf_counter()
+    with fetch_priority(Priority.BACKGROUND):
+        if symbols is None:
+            get_stock_universe.invoke({})
+            symbols = warm_universe()
+        symbols = list(symbols)
+
+        if symbols_stale():
+            try:
+                refresh_symbols()
+            except Exception as e:
+                logger.warning("Symbol master refresh failed: %s", e)
+
+        # Two batched downloads (raw and adjusted) feed every per-symbol tool.
+        history_start = datetime.now() - timedelta(days=HISTORY_DAYS)
+        snapshots = []
+        for adjusted in (False, True):
+            try:
+                panel = fetch_many(
+                    symbols + ["^GSPC"], history_start, adjusted=adjusted
+                )
+                snapshots.append(PriceSnapshot(panel, history_start, adjusted))
+            except Exception as e:
+                logger.warning(
+                    "Price prefetch failed, tools will fetch their own: %s", e
+                )
+
+        # Publish the download as the shared price panels for the API workers.
+        for snapshot in snapshots:
+            try:
+                write_panel(snapshot.panel, history_start, snapshot.adjusted)
+            except Exception as e:
+                logger.warning("Price panel failed: %s", e)
+
+        # The indicator snapshot answers price history and stops from here on.
+        try:
+            with use_price_snapshots(*snapshots):
+                build_snapshot(symbols)
+        except Exception as e:
+            logger.warning("Indicator snapshot failed: %s", e)
+
+        tools = symbol_tools(charts)
+        with use_price_snapshots(*snapshots), ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="warmer"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, warm_symbol, symbol, tools
+                )
+                for symbol in symbols
+            ]
+            results = [future.result() for future in futures]
+
+    failed = {r["symbol"]: r["failed"] for r in results if r["failed"]}
+    summary = {
+        "symbols": len(symbols),
+        "observations": sum(r["warmed"] for r in results),
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+    logger.info(
+        "Warmed %d observations for %d symbols in %.1fs (%d symbols with failures)",
+        summary["observations"],
+        summary["symbols"],
+        summary["seconds"],
+        len(failed),
+    )
+    return summary
+
+
+def warm_session_once(**kwargs) -> Optional[dict]:
+    """
+    Warm the caches for the latest completed session unless another process already has.
+
+    The claim lives in the shared cache until the next close, so several API workers
+    can all run the schedule and only one of them does the work.
+    """
+    session = market_data_date().isoformat()
+    if not get_cache().add("warmer", session, os.getpid()):
+        logger.info("Caches for the %s session are already warm", session)
+        return None
+    return warm_caches(**kwargs)
+
+
+def next_warm_time(now: Optional[datetime] = None) -> datetime:
+    """Return when the next scheduled warm-up is due (a past time means now)."""
+    now = (now or market_now()).astimezone(MARKET_TZ)
+    delay = timedelta(minutes=WARM_DELAY_MINUTES)
+    last_close = datetime.combine(market_data_date(now), MARKET_CLOSE, MARKET_TZ)
+    if now < last_close + delay or not get_cache().get(
+        "warmer", market_data_date(now).isoformat()
+    ):
+        return last_close + delay
+    return next_market_close(now) + delay
+
+
+async def run_after_close() -> None:
+    """Warm the caches after every close, for as long as the server runs."""
+    while True:
+        wait = (next_warm_time() - market_now()).total_seconds()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            await asyncio.to_thread(warm_session_once)
+        except Exception:
+            logger.exception("Cache warm-up failed")
+            # Do not retry in a tight loop; the claim stays until the next close.
+            await asyncio.sleep(60)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Warm the tool caches.")
+    parser.add_argument(
+        "--symbols", nargs="*", help="Tickers to warm instead of the default universe."
+    )
+    parser.add_argument(
+        "--no-charts", action="store_true", help="Skip chart rendering and analysis."
+    )
+    parser.add_argument("--concurrency", type=int, default=WARM_CONCURRENCY)
+    args = parser.parse_args()
+
+    summary = warm_caches(
+        symbols=[s.upper() for s in args.symbols] if args.symbols else None,
+        charts=WARM_CHARTS and not args.no_charts,
+        concurrency=args.concurrency,
+    )
+    print(summary)
@@ -1,29 +1,48 @@
-from typing import List, Any, Union
+from typing import List, Any, Optional, Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.messages import HumanMessage, AIMessage
 from langserve import add_routes
-from openbb import obb
+from sse_starlette.sse import EventSourceResponse
 from dotenv import load_dotenv
 
 import os
+import json
+import uuid
+import asyncio
+import logging
+import threading
 import warnings
+import pydantic
 import pandas as pd
 
 from app.chains.agent import create_anthropic_agent_graph
+from app.chains.checkpoint import create_checkpointer
+from app.chains.response_cache import ResponseCache
+from app.chains.streaming import AgentEvent
+from app.features.deadline import deadline_after
+from app.features.movers import (
+    MOVERS_REFRESH,
+    get_movers_service,
+    run_movers_refresher,
+)
+from app.features.providers import get_price_fetcher
+from app.features.replay import get_replayer
+from app.features.scheduler import get_scheduler
+from app.features.obb_session import start_background_login
+from app.features.warmer import WARM_ON_CLOSE, run_after_close
 
 warnings.filterwarnings("ignore")
 
 load_dotenv()
 
-obb.account.login(pat=os.environ.get("OPENBB_TOKEN"), remember_me=True)
-obb.user.credentials.tiingo_token = os.environ.get("TIINGO_API_KEY")
-obb.user.credentials.fmp_api_key = os.environ.get("FMP_API_KEY")
-obb.user.credentials.intrinio_api_key = os.environ.get("INTRINIO_API_KEY")
-obb.user.credentials.fred_api_key = os.environ.get("FRED_API_KEY")
+logger = logging.getLogger(__name__)
+
+# Events buffered per SSE client before the graph run waits for the client to catch up.
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", "64"))
 
 pd.set_option("display.max_columns", None)
 pd.set_option("display.max_rows", None)
@@ -44,13 +63,14 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-graph = create_anthropic_agent_graph()
+graph = create_anthropic_agent_graph(checkpointer=create_checkpointer())
+response_cache = ResponseCache(graph)
 
 
 class AgentInput(BaseModel):
     messages: List[Union[HumanMessage, AIMessage]] = Field(
         ...,
-        description="The chat messages representing the current conversation.",
+        description="The new chat messages for the conversation. Prior turns are restored from the thread's checkpoint.",
         extra={"widget": {"type": "chat", "input": "messages"}},
     )
 
@@ -59,6 +79,50 @@ class AgentOutput(BaseModel):
     output: Any
 
 
+class ChatEventsRequest(pydantic.BaseModel):
+    message: str
+    thread_id: Optional[str] = None
+
+
+def per_request_config(config: dict, request: Request) -> dict:
+    """
+    Make sure every run has a thread id so it can be checkpointed, and a deadline.
+
+    Clients continue a conversation by sending the same `thread_id` in
+    `config.configurable` (or the `X-Thread-Id` header) with only the new messages.
+    A client may ask for an earlier `deadline` (epoch seconds), but never a later one
+    than REQUEST_DEADLINE_SECONDS from now.
+    """
+    configurable = config.setdefault("configurable", {})
+    if not configurable.get("thread_id"):
+        configurable["thread_id"] = request.headers.get("X-Thread-Id") or str(
+            uuid.uuid4()
+        )
+
+    deadline = deadline_after()
+    if configurable.get("deadline"):
+        deadline = min(float(configurable["deadline"]), deadline)
+    configurable["deadline"] = deadline
+    return config
+
+
+@app.on_event("startup")
+async def start_openbb_login():
+    start_background_login()
+
+
+@app.on_event("startup")
+async def start_cache_warmer():
+    if WARM_ON_CLOSE:
+        app.state.cache_warmer = asyncio.create_task(run_after_close())
+
+
+@app.on_event("startup")
+async def start_movers_refresher():
+    if MOVERS_REFRESH:
+        app.state.movers_refresher = asyncio.create_task(run_movers_refresher())
+
+
 @app.get("/")
 async def redirect_root_to_docs():
     return RedirectResponse("/docs")
@@ -69,12 +133,80 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics/fetch")
+async def fetch_metrics():
+    """Scheduler queue times, price provider stats, movers freshness and replay counts."""
+    return {
+        "scheduler": get_scheduler().metrics(),
+        "price_providers": get_price_fetcher().stats_summary(),
+        "movers": get_movers_service().status(),
+        "replay": get_replayer().status(),
+    }
+
+
+@app.post("/chat/events")
+async def chat_events(body: ChatEventsRequest, request: Request):
+    """
+    Stream one agent turn as server-sent events.
+
+    Emits a `thread` event with the thread id, then `tool_start`, `tool_end` (with the
+    tool's observation), `chart`, `node_end` and `token` events as the graph runs, and
+    finally a `final` event with the answer. Each event's data is a JSON AgentEvent.
+
+    The graph runs in its own task and writes into a bounded queue, so a slow client
+    pauses the run instead of buffering without limit. If the client disconnects, the
+    run is cancelled, including provider calls still waiting inside tools.
+    """
+    cancel_event = threading.Event()
+    config = {
+        "recursion_limit": 150,
+        "configurable": {"thread_id": body.thread_id, "cancel_event": cancel_event},
+    }
+    config = per_request_config(config, request)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+
+    async def produce():
+        try:
+            async for event in response_cache.astream_events(
+                {"messages": ("user", body.message)}, config
+            ):
+                await queue.put(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("chat_events run failed")
+            await queue.put(AgentEvent("error", data=str(e)))
+        await queue.put(None)
+
+    async def publish():
+        task = asyncio.create_task(produce())
+        try:
+            yield {
+                "event": "thread",
+                "data": json.dumps({"thread_id": config["configurable"]["thread_id"]}),
+            }
+            while (event := await queue.get()) is not None:
+                yield {"event": event.type, "data": event.to_json()}
+        finally:
+            if not task.done():
+                logger.info(
+                    "client disconnected, cancelling thread %s",
+                    config["configurable"]["thread_id"],
+                )
+                cancel_event.set()
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    return EventSourceResponse(publish())
+
+
 add_routes(
     app,
-    graph,
+    response_cache.as_runnable(),
     path="/chat",
     input_type=AgentInput,
     output_type=AgentOutput,
+    per_req_config_modifier=per_request_config,
 )
 
 if __name__ == "__main__":
@@ -0,0 +1,57 @@
+from typing import List
+
+from langchain.agents import tool
+
+from app.features.portfolio import portfolio_analytics, top_pairs
+from app.tools.utils import wrap_dataframe, cache_tool_output
+from app.tools.types import PortfolioInput
+
+# Beyond this many symbols only the cluster summary is shown, not every row.
+MAX_SYMBOL_ROWS = 50
+
+
+@tool(args_schema=PortfolioInput)
+@cache_tool_output
+def analyze_portfolio(symbols: List[str], years: int = 1) -> str:
+    """Analyze stocks together as a portfolio: correlations, clusters of stocks that move together, and inverse-volatility and risk-parity weights."""
+
+    try:
+        table, corr, stats = portfolio_analytics(symbols, years)
+
+        clusters = (
+            table.groupby("cluster")
+            .agg(
+                symbols=("symbol", ", ".join),
+                size=("symbol", "size"),
+                avg_correlation=("avg_correlation", "mean"),
+                weight_risk_parity=("weight_risk_parity", "sum"),
+            )
+            .reset_index()
+        )
+        summary = (
+            f"{stats['symbols']} symbols over {stats['days']} days in"
+            f" {stats['clusters']} clusters. Average pairwise correlation"
+            f" {stats['average_correlation']:.2f}. Annualized volatility: risk parity"
+            f" {stats['risk_parity_volatility']:.2%}, equal weight"
+            f" {stats['equal_weight_volatility']:.2%}. Diversification ratio"
+            f" {stats['diversification_ratio']:.2f}."
+        )
+        if stats["risk_parity_fallback"]:
+            summary += (
+                " Risk parity could not be solved for this covariance, so the risk"
+                " parity columns show the inverse-volatility weights."
+            )
+        missing = sorted({s.upper() for s in symbols} - set(table["symbol"]))
+        if missing:
+            summary += f" Left out for lack of history: {', '.join(missing)}."
+
+        result = (
+            f"\n<observation>\n{summary}\n</observation>\n"
+            + wrap_dataframe(clusters.round(3))
+            + wrap_dataframe(top_pairs(corr, 5).round(3))
+        )
+        if len(table) <= MAX_SYMBOL_ROWS:
+            result += wrap_dataframe(table.round(4))
+        return result
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
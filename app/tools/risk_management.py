@@ -1,14 +1,31 @@
-from datetime import date, timedelta
-
-import pandas_ta as ta
+import math
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
 from langchain.agents import tool
 
-from app.tools.utils import fetch_stock_data
-from app.tools.types import StockStatsInput, RMultipleInput, PositionSizingInput
+from app.features.risk import risk_plan
+from app.features.simulation import simulate_trade
+from app.features.snapshot import LEVEL_COLUMNS, get_snapshot
+from app.tools.utils import (
+    fetch_stock_data,
+    fetch_many,
+    select_symbol,
+    cache_tool_output,
+    wrap_dataframe,
+)
+from app.tools.types import (
+    StockStatsInput,
+    RMultipleInput,
+    PositionSizingInput,
+    RiskPlanInput,
+    TradeSimulationInput,
+)
 
 
 def calculate_technical_levels(df):
+    import pandas_ta as ta
+
     df["SMA_20"] = ta.sma(df["close"], length=20)
     df["SMA_50"] = ta.sma(df["close"], length=50)
     df["SMA_200"] = ta.sma(df["close"], length=200)
@@ -26,15 +43,26 @@ def calculate_technical_levels(df):
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def calculate_technical_stops(symbol: str) -> str:
     """Calculate stops at key technical levels for a given stock."""
 
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=365)
-
-        df = fetch_stock_data(symbol, start_date, end_date)
-        support, resistance, sma_20, sma_50, sma_200 = calculate_technical_levels(df)
+        snapshot = get_snapshot()
+        levels = snapshot.stop_levels(symbol) if snapshot and symbol in snapshot else {}
+
+        if levels and not any(math.isnan(levels[column]) for column in LEVEL_COLUMNS):
+            support, resistance, sma_20, sma_50, sma_200 = (
+                levels[column] for column in LEVEL_COLUMNS
+            )
+        else:
+            end_date = date.today()
+            start_date = end_date - timedelta(days=365)
+
+            df = fetch_stock_data(symbol, start_date, end_date)
+            support, resistance, sma_20, sma_50, sma_200 = calculate_technical_levels(
+                df
+            )
 
         stop_levels = [
             ("Support", support),
@@ -87,3 +115,66 @@ def calculate_position_size(
         return f"\n<observation>\nOptimal position size for {symbol}: {position_size:.2f} shares\nEntry Price: {entry_price:.2f}\nStop Price: {stop_price:.2f}\nPotential Loss Per Share: {potential_loss:.2f}\n</observation>\n"
     except Exception as e:
         return f"\n<observation>\nError: {e}\n</observation>\n"
+
+
+@tool(args_schema=RiskPlanInput)
+@cache_tool_output
+def calculate_risk_plan(
+    symbols: List[str],
+    entry_prices: Optional[List[Optional[float]]] = None,
+    stop_prices: Optional[List[Optional[float]]] = None,
+    account_size: float = 100000.00,
+    risk_percent: float = 1.0,
+    max_portfolio_risk_percent: float = 6.0,
+) -> str:
+    """Plan trades for one or more stocks in one call: technical stop levels, 1R-4R profit targets and position sizes, with a cap on the total risk across all of them."""
+
+    try:
+        plan = risk_plan(
+            symbols,
+            entry_prices,
+            stop_prices,
+            account_size=account_size,
+            risk_percent=risk_percent,
+            max_portfolio_risk_percent=max_portfolio_risk_percent,
+        )
+        if plan["entry"].isna().all():
+            return f"\n<observation>\nNo data found for the given symbols {symbols}\n</observation>\n"
+
+        total_risk = plan["risk_pct"].sum()
+        return (
+            wrap_dataframe(plan.round(2))
+            + f"\n<observation>\nTotal risk: {total_risk:.2f}% of the account (limit {max_portfolio_risk_percent:.2f}%)\n</observation>\n"
+        )
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
+
+
+@tool(args_schema=TradeSimulationInput)
+@cache_tool_output
+def simulate_trade_outcomes(
+    symbol: str,
+    entry_price: Optional[float] = None,
+    stop_price: Optional[float] = None,
+    horizon_days: int = 60,
+) -> str:
+    """Estimate how likely a trade is to reach its 1R-4R targets before the stop, and its expected R, by simulating 50,000 price paths resampled from the stock's own daily history."""
+
+    try:
+        plan = risk_plan([symbol], [entry_price], [stop_price]).iloc[0]
+        start_date = datetime.now() - timedelta(days=365 * 2)
+        prices = select_symbol(fetch_many([symbol], start_date, adjusted=True), symbol)
+
+        if prices.empty or math.isnan(plan["entry"]) or math.isnan(plan["stop"]):
+            return f"\n<observation>\nNo data found for the given symbol {symbol}\n</observation>\n"
+
+        outcomes = simulate_trade(
+            prices, plan["entry"], plan["stop"], horizon=horizon_days
+        )
+        return (
+            f"\n<observation>\n{symbol}: entry {plan['entry']:.2f}, stop {plan['stop']:.2f}"
+            f" ({plan['stop_basis']}), held up to {horizon_days} trading days\n</observation>\n"
+            + wrap_dataframe(outcomes.round(3))
+        )
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
@@ -0,0 +1,36 @@
+from typing import List
+
+from langchain.agents import tool
+
+from app.features.backtest import backtest_symbols
+from app.tools.utils import wrap_dataframe, cache_tool_output
+from app.tools.types import BacktestInput
+
+
+@tool(args_schema=BacktestInput)
+@cache_tool_output
+def backtest_bullish_setups(
+    symbols: List[str], years: int = 5, min_rules: int = 12
+) -> str:
+    """Backtest the bullish setup criteria over past years: how often entry signals fired and the forward returns, win rates and R multiples that followed."""
+
+    try:
+        result = backtest_symbols(symbols, years, min_rules=min_rules)
+        if result["trades"].empty:
+            return "\n<observation>\nNo setups found for the given symbols\n</observation>\n"
+
+        baseline = ", ".join(
+            f"{h}d {value:.2%}" for h, value in result["baseline"].items()
+        )
+        pass_rates = result["rule_pass_rate"].rename_axis("rule").rename("pass_rate")
+        return (
+            f"\n<observation>\nBacktest of {len(symbols)} symbols over {years} years,"
+            f" {min_rules} of 12 rules required. Average return of any day: {baseline}."
+            " R multiples use a 2 ATR stop. Only symbols that still trade were tested,"
+            " so delisted losers are missing and the results are biased upward.\n"
+            "</observation>\n"
+            + wrap_dataframe(result["summary"].round(3))
+            + wrap_dataframe(pass_rates.round(3).reset_index())
+        )
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
@@ -1,26 +1,34 @@
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langchain.agents import tool
 
+from app.chains.models import get_llm
 from app.features.chart import get_chart_base64
-from app.tools.types import StockStatsInput
+from app.features.deadline import call_llm_with_deadline
+from app.tools.utils import cache_tool_output
+from app.tools.types import TimeframeInput
 
+# Run as a named runnable so streaming clients get the chart URL before the vision
+# analysis finishes.
+render_chart = RunnableLambda(get_chart_base64, name="render_chart")
 
-@tool(args_schema=StockStatsInput)
-def get_stock_chart_analysis(symbol: str) -> str:
-    """Using the chart data, generate a technical analysis summary."""
+
+@tool(args_schema=TimeframeInput)
+@cache_tool_output
+def get_stock_chart_analysis(symbol: str, timeframe: str = "daily") -> str:
+    """Using the chart data, generate a technical analysis summary. Weekly and monthly charts show the longer-term trend."""
 
     try:
-        chart_data = get_chart_base64(symbol)
-        llm = ChatAnthropic(model_name="claude-3-opus-20240229", max_tokens=4096)
-        analysis = llm.invoke(
+        chart_data = render_chart.invoke(symbol, timeframe=timeframe)
+        llm = get_llm("chart_vision")
+        analysis = call_llm_with_deadline(
+            llm.invoke,
             [
                 HumanMessage(
                     content=[
                         {
                             "type": "text",
-                            "text": "Analyze the following stock chart image and provide a technical analysis summary:",
+                            "text": f"Analyze the following {timeframe} stock chart image for {symbol} and provide a technical analysis summary:",
                         },
                         {
                             "type": "image_url",
@@ -30,7 +38,7 @@ def get_stock_chart_analysis(symbol: str) -> str:
                         },
                     ]
                 )
-            ]
+            ],
         )
         return f"\n<observation>\n{analysis}\n</observation>\n"
     except Exception as e:
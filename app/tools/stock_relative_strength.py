@@ -6,7 +6,12 @@ from langchain.agents import tool
 import pandas as pd
 import numpy as np
 
-from app.tools.utils import wrap_dataframe, fetch_stock_data, fetch_sp500_data
+from app.tools.utils import (
+    wrap_dataframe,
+    fetch_many,
+    select_symbol,
+    cache_tool_output,
+)
 from app.tools.types import StockStatsInput
 
 
@@ -32,14 +37,18 @@ def calculate_rs_rating(
     end_date = datetime.now()
     rs_ratings = []
 
+    # One batched download covers every interval.
+    prices = fetch_many(
+        [symbol, "^GSPC"], end_date - timedelta(days=max(intervals)), end_date
+    )
+    stock_prices = select_symbol(prices, symbol)
+    sp500_prices = select_symbol(prices, "^GSPC")
+
     for interval in intervals:
         start_date = end_date - timedelta(days=interval)
 
-        stock_data = fetch_stock_data(symbol, start_date, end_date)
-        sp500_data = fetch_sp500_data(start_date, end_date)
-
-        stock_data.index = pd.to_datetime(stock_data.index)
-        sp500_data.index = pd.to_datetime(sp500_data.index)
+        stock_data = stock_prices[stock_prices.index >= start_date]
+        sp500_data = sp500_prices[sp500_prices.index >= start_date]
 
         stock_performance = calculate_performance(stock_data)
         sp500_performance = calculate_performance(sp500_data)
@@ -59,6 +68,7 @@ def calculate_rs_rating(
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_relative_strength(symbol: str) -> str:
     """Calculate relative strength for a list of stocks."""
 
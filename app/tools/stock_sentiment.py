@@ -1,8 +1,17 @@
+from functools import lru_cache
+
 from langchain.agents import tool
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from openbb import obb
 
-from app.tools.utils import wrap_dataframe
+from app.features.obb_session import get_obb
+from app.features.scheduler import schedule_fetch
+from app.tools.utils import wrap_dataframe, cache_tool_output
+
+
+@lru_cache(maxsize=None)
+def get_sentiment_analyzer():
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    return SentimentIntensityAnalyzer()
 
 
 def analyze_sentiment(text):
@@ -10,7 +19,7 @@ def analyze_sentiment(text):
         return 0.0
 
     try:
-        analyzer = SentimentIntensityAnalyzer()
+        analyzer = get_sentiment_analyzer()
         sentiment = analyzer.polarity_scores(text)
         if "compound" in sentiment:
             return sentiment["compound"]
@@ -21,11 +30,14 @@ def analyze_sentiment(text):
 
 
 @tool
+@cache_tool_output
 def get_news_sentiment(symbol: str) -> str:
     """Get News Sentiment for a Stock."""
 
     try:
-        df = obb.news.company(symbol=symbol, provider="tiingo", limit=10).to_df()
+        df = schedule_fetch(
+            "tiingo", get_obb().news.company, symbol=symbol, provider="tiingo", limit=10
+        ).to_df()
 
         if df.empty:
             return (
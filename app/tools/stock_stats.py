@@ -1,24 +1,40 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
 from langchain.agents import tool
-from openbb import obb
-from pandas_datareader import data as pdr
 
 from app.features.technical import add_technicals
 from app.features.screener import fetch_custom_universe
-from app.tools.utils import wrap_dataframe
-from app.tools.types import StockStatsInput
+from app.features.obb_session import get_obb
+from app.features.scheduler import schedule_fetch
+from app.features.movers import get_movers_service
+from app.features.snapshot import get_snapshot
+from app.features.timeframes import lookback_start, timeframe_technicals
+from app.tools.utils import (
+    wrap_dataframe,
+    cache_tool_output,
+    fetch_many,
+    select_symbol,
+)
+from app.tools.types import MoversHistoryInput, StockStatsInput, TimeframeInput
 
-import quantstats as qs
 import pandas as pd
-import yfinance as yf
 
-yf.pdr_override()
+# Latest indicators from the nightly snapshot added to each row of the stock universe.
+UNIVERSE_SNAPSHOT_COLUMNS = [
+    "RSI",
+    "ATR",
+    "ADR_PCT",
+    "SMA_50",
+    "SMA_200",
+    "52_WK_HIGH",
+    "52_WK_LOW",
+]
 
 
 def fetch_and_convert_ohlc(symbol: str, start_date: str) -> pd.DataFrame:
     """
-    Fetch stock data using pandas_datareader and convert OHLC columns to lower case.
+    Fetch split- and dividend-adjusted stock data with lower case OHLC columns.
 
     Args:
         symbol (str): The stock symbol to fetch data for.
@@ -28,23 +44,30 @@ def fetch_and_convert_ohlc(symbol: str, start_date: str) -> pd.DataFrame:
         pd.DataFrame: DataFrame with OHLC columns in lower case.
     """
     try:
-        df = pdr.get_data_yahoo(symbol, start=start_date)
-        df.index = pd.to_datetime(df.index)
-
-        df.columns = [col.lower() for col in df.columns]
-        df["close"] = df["adj close"]
-
-        return df
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        return select_symbol(fetch_many([symbol], start, adjusted=True), symbol)
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
         return pd.DataFrame()
 
 
-@tool(args_schema=StockStatsInput)
-def get_stock_price_history(symbol: str) -> str:
-    """Fetch a Stock's Price History by Symbol."""
+@tool(args_schema=TimeframeInput)
+@cache_tool_output
+def get_stock_price_history(symbol: str, timeframe: str = "daily") -> str:
+    """Fetch a Stock's Price History by Symbol, in daily, weekly or monthly bars."""
 
     try:
+        if timeframe != "daily":
+            start_date = lookback_start(timeframe)
+            df = timeframe_technicals(symbol, timeframe, start_date, adjusted=True)
+            if df.empty:
+                return "\n<observation>\nNo data found for the given symbol\n</observation>\n"
+            return wrap_dataframe(df[-30:][::-1])
+
+        snapshot = get_snapshot()
+        if snapshot is not None and symbol in snapshot:
+            return wrap_dataframe(snapshot.history(symbol)[::-1])
+
         start_date = (datetime.now() - timedelta(days=365 * 2)).strftime("%Y-%m-%d")
         df = fetch_and_convert_ohlc(symbol, start_date)
 
@@ -62,9 +85,12 @@ def get_stock_price_history(symbol: str) -> str:
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_stock_quantstats(symbol: str) -> str:
     """Fetch a Stock's Portfolio Analytics For Quants by Symbol."""
 
+    import quantstats as qs
+
     try:
         start_date = (datetime.now() - timedelta(days=365 * 2)).strftime("%Y-%m-%d")
         df = fetch_and_convert_ohlc(symbol, start_date)
@@ -72,8 +98,12 @@ def get_stock_quantstats(symbol: str) -> str:
         if df.empty:
             return f"\n<observation>\nNo data found for the given symbol {symbol}\n</observation>\n"
 
-        stock_ret = qs.utils.download_returns(symbol, period=df.index)
-        bench_ret = qs.utils.download_returns("^GSPC", period=df.index)
+        stock_ret = schedule_fetch(
+            "yfinance", qs.utils.download_returns, symbol, period=df.index
+        )
+        bench_ret = schedule_fetch(
+            "yfinance", qs.utils.download_returns, "^GSPC", period=df.index
+        )
         stats = qs.reports.metrics(
             stock_ret, mode="full", benchmark=bench_ret, display=False
         )
@@ -88,12 +118,14 @@ def get_gainers() -> str:
     """Fetch Top Price Gainers in the Stock Market."""
 
     try:
-        gainers = obb.equity.discovery.gainers(sort="desc").to_df()
-
-        if gainers.empty:
+        snapshot = get_movers_service().current()
+        if snapshot.gainers.empty:
             return "\n<observation>\nNo gainers found\n</observation>\n"
 
-        return wrap_dataframe(gainers)
+        return (
+            f"\n<observation>\n{snapshot.describe_age()}\n</observation>\n"
+            + wrap_dataframe(snapshot.gainers)
+        )
     except Exception as e:
         return f"\n<observation>\nError: {e}\n</observation>\n"
 
@@ -103,22 +135,50 @@ def get_losers() -> str:
     """Fetch Stock Market's Top Losers."""
 
     try:
-        losers = obb.equity.discovery.losers(sort="desc").to_df()
-
-        if losers.empty:
+        snapshot = get_movers_service().current()
+        if snapshot.losers.empty:
             return "\n<observation>\nNo losers found\n</observation>\n"
 
-        return wrap_dataframe(losers)
+        return (
+            f"\n<observation>\n{snapshot.describe_age()}\n</observation>\n"
+            + wrap_dataframe(snapshot.losers)
+        )
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
+
+
+@tool(args_schema=MoversHistoryInput)
+def get_intraday_movers(symbol: Optional[str] = None) -> str:
+    """Show how today's top gainers and losers changed during the session: when each stock joined the lists, its best rank and its first and latest percent change. Pass a symbol for that stock's snapshots only."""
+
+    try:
+        service = get_movers_service()
+        snapshots = service.session_snapshots()
+        if not snapshots:
+            return "\n<observation>\nNo gainers or losers snapshots recorded today\n</observation>\n"
+
+        header = (
+            f"{len(snapshots)} snapshots from {snapshots[0].taken_at:%H:%M} to"
+            f" {snapshots[-1].taken_at:%H:%M} ET."
+        )
+        df = service.history(symbol) if symbol else service.summary()
+        if df.empty:
+            return f"\n<observation>\n{header} {symbol} was not among the gainers or losers.\n</observation>\n"
+
+        return f"\n<observation>\n{header}\n</observation>\n" + wrap_dataframe(df)
     except Exception as e:
         return f"\n<observation>\nError: {e}\n</observation>\n"
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_stock_ratios(symbol: str) -> str:
     """Fetch an Extensive Set of Financial and Accounting Ratios for a Given Company Over Time."""
 
     try:
-        trades = obb.equity.fundamental.ratios(symbol=symbol).to_df()
+        trades = schedule_fetch(
+            "fmp", get_obb().equity.fundamental.ratios, symbol=symbol
+        ).to_df()
 
         if trades.empty:
             return f"\n<observation>\nNo data found for the given symbol {symbol}\n</observation>\n"
@@ -129,12 +189,17 @@ def get_stock_ratios(symbol: str) -> str:
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_key_metrics(symbol: str) -> str:
     """Fetch Fundamental Metrics by Symbol."""
 
     try:
-        metrics = obb.equity.fundamental.metrics(
-            symbol=symbol, with_ttm=True, provider="yfinance"
+        metrics = schedule_fetch(
+            "yfinance",
+            get_obb().equity.fundamental.metrics,
+            symbol=symbol,
+            with_ttm=True,
+            provider="yfinance",
         ).to_df()
 
         if metrics.empty:
@@ -146,11 +211,12 @@ def get_key_metrics(symbol: str) -> str:
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_stock_sector_info(symbol: str) -> str:
     """Fetch a Company's General Information By Symbol. This includes company name, industry, and sector data."""
 
     try:
-        profile = obb.equity.profile(symbol=symbol).to_df()
+        profile = schedule_fetch("fmp", get_obb().equity.profile, symbol=symbol).to_df()
 
         if profile.empty:
             return f"\n<observation>\nNo data found for the given symbol {symbol}\n</observation>\n"
@@ -161,11 +227,14 @@ def get_stock_sector_info(symbol: str) -> str:
 
 
 @tool(args_schema=StockStatsInput)
+@cache_tool_output
 def get_valuation_multiples(symbol: str) -> str:
     """Fetch a Company's Valuation Multiples by Symbol."""
 
     try:
-        df = obb.equity.fundamental.multiples(symbol=symbol).to_df()
+        df = schedule_fetch(
+            "fmp", get_obb().equity.fundamental.multiples, symbol=symbol
+        ).to_df()
 
         if df.empty:
             return f"\n<observation>\nNo data found for the given symbol {symbol}\n</observation>\n"
@@ -176,10 +245,19 @@ def get_valuation_multiples(symbol: str) -> str:
 
 
 @tool
+@cache_tool_output
 def get_stock_universe() -> str:
     """Fetch Bullish Trending Stocks Universe from FinViz."""
 
     try:
-        return wrap_dataframe(fetch_custom_universe())
+        df = fetch_custom_universe()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            latest = snapshot.latest(df["Ticker"])
+            columns = [c for c in UNIVERSE_SNAPSHOT_COLUMNS if c in latest.columns]
+            df = df.merge(
+                latest[columns], left_on="Ticker", right_index=True, how="left"
+            )
+        return wrap_dataframe(df)
     except Exception as e:
         return f"\n<observation>\nError: {e}\n</observation>\n"
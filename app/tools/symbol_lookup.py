@@ -0,0 +1,22 @@
+from dataclasses import asdict
+
+import pandas as pd
+from langchain.agents import tool
+
+from app.features.symbols import resolve_symbols
+from app.tools.utils import wrap_dataframe
+from app.tools.types import SymbolLookupInput
+
+
+@tool(args_schema=SymbolLookupInput)
+def resolve_symbol(query: str) -> str:
+    """Resolve a company name, partial name or misspelling to its stock symbol. Use this instead of a web search to find a ticker."""
+
+    try:
+        matches = resolve_symbols(query)
+        if not matches:
+            return f"\n<observation>\nNo symbol found for {query}\n</observation>\n"
+
+        return wrap_dataframe(pd.DataFrame([asdict(match) for match in matches]))
+    except Exception as e:
+        return f"\n<observation>\nError: {e}\n</observation>\n"
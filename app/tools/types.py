@@ -1,3 +1,5 @@
+from typing import List, Literal, Optional
+
 from langchain_core.pydantic_v1 import BaseModel, Field
 
 
@@ -5,6 +7,13 @@ class StockStatsInput(BaseModel):
     symbol: str = Field(..., description="The stock symbol to analyze")
 
 
+class TimeframeInput(BaseModel):
+    symbol: str = Field(..., description="The stock symbol to analyze")
+    timeframe: Literal["daily", "weekly", "monthly"] = Field(
+        "daily", description="The bar size: daily, weekly or monthly"
+    )
+
+
 class RMultipleInput(BaseModel):
     symbol: str = Field(..., description="The stock symbol to analyze")
     entry_price: float = Field(..., description="The entry price for the trade")
@@ -20,3 +29,70 @@ class PositionSizingInput(BaseModel):
     )
     entry_price: float = Field(..., description="The entry price for the trade")
     stop_price: float = Field(..., description="The stop price for the trade")
+
+
+class RiskPlanInput(BaseModel):
+    symbols: List[str] = Field(..., description="The stock symbols to plan trades for")
+    entry_prices: Optional[List[Optional[float]]] = Field(
+        None,
+        description="Entry price per symbol, in the same order. Omit (or use null) for the last close",
+    )
+    stop_prices: Optional[List[Optional[float]]] = Field(
+        None,
+        description="Stop price per symbol, in the same order. Omit (or use null) for the nearest technical level below the entry",
+    )
+    account_size: float = Field(
+        100000.0, description="The total account size in dollars"
+    )
+    risk_percent: float = Field(
+        1.0, description="The percentage of the account to risk on each trade"
+    )
+    max_portfolio_risk_percent: float = Field(
+        6.0,
+        description="The most the account may risk across all the trades together, in percent",
+    )
+
+
+class TradeSimulationInput(BaseModel):
+    symbol: str = Field(..., description="The stock symbol to analyze")
+    entry_price: Optional[float] = Field(
+        None, description="The entry price for the trade. Omit for the last close"
+    )
+    stop_price: Optional[float] = Field(
+        None,
+        description="The stop price for the trade. Omit for the nearest technical level below the entry",
+    )
+    horizon_days: int = Field(
+        60, description="The most trading days the trade is held for"
+    )
+
+
+class BacktestInput(BaseModel):
+    symbols: List[str] = Field(
+        ...,
+        description="The stock symbols to backtest, e.g. the ones the user asked about",
+    )
+    years: int = Field(5, description="How many years of history to test")
+    min_rules: int = Field(
+        12,
+        description="How many of the 12 bullish setup rules must hold for an entry signal",
+    )
+
+
+class PortfolioInput(BaseModel):
+    symbols: List[str] = Field(
+        ..., description="The stock symbols to analyze together as a portfolio"
+    )
+    years: int = Field(1, description="How many years of daily returns to use")
+
+
+class SymbolLookupInput(BaseModel):
+    query: str = Field(
+        ..., description="The company name, partial name or ticker to look up"
+    )
+
+
+class MoversHistoryInput(BaseModel):
+    symbol: Optional[str] = Field(
+        None, description="The stock symbol to follow. Omit for all of today's movers"
+    )
@@ -1,36 +1,196 @@
+import os
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterable, List, Optional
 
-from openbb import obb
-from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.messages import ToolMessage
 from langgraph.prebuilt import ToolNode
 
 import pandas as pd
 
+from app.features.cache import cached_until_close
+from app.features.deadline import deadline_scope
+from app.features.panel import get_price_panel
+from app.features.providers import PRICE_COLUMNS, empty_panel, get_price_fetcher
+from app.features.scheduler import Priority, fetch_priority
+
+logger = logging.getLogger(__name__)
+
+# Symbols per upstream request, and how many requests fetch_many runs at once across
+# the whole process.
+FETCH_BATCH_SIZE = int(os.environ.get("FETCH_BATCH_SIZE", "20"))
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "4"))
+
+_fetch_executor = ThreadPoolExecutor(
+    max_workers=FETCH_CONCURRENCY, thread_name_prefix="fetch_many"
+)
+
+
+class PriceSnapshot:
+    """
+    Prices downloaded up front for a batch job (e.g. the cache warmer).
+
+    While a snapshot is in scope (see `use_price_snapshots`), `fetch_many` serves the
+    symbols it holds from memory instead of asking the providers again, as long as the
+    requested range starts on or after `start_date`.
+    """
+
+    def __init__(self, panel: pd.DataFrame, start_date: datetime, adjusted: bool):
+        self.panel = panel
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self.adjusted = adjusted
+        self.symbols = set(panel.index.get_level_values("symbol"))
+
+    def covers(self, start_date: datetime, adjusted: bool) -> bool:
+        return (
+            adjusted == self.adjusted
+            and pd.Timestamp(start_date).normalize() >= self.start_date
+        )
+
+    def select(
+        self,
+        symbols: List[str],
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        panel = self.panel[self.panel.index.get_level_values("symbol").isin(symbols)]
+        dates = panel.index.get_level_values("date")
+        mask = dates >= pd.Timestamp(start_date).normalize()
+        if end_date is not None:
+            mask &= dates <= pd.Timestamp(end_date).normalize()
+        return panel[mask]
+
+
+_price_snapshots: contextvars.ContextVar[tuple] = contextvars.ContextVar(
+    "price_snapshots", default=()
+)
+
+
+@contextmanager
+def use_price_snapshots(*snapshots: PriceSnapshot):
+    """Let `fetch_many` calls inside this block (and threads it spawns) read `snapshots`."""
+    token = _price_snapshots.set(_price_snapshots.get() + snapshots)
+    try:
+        yield
+    finally:
+        _price_snapshots.reset(token)
+
+
+def price_sources(adjusted: bool) -> tuple:
+    """Local price sources for fetch_many: snapshots in scope, then the shared panel."""
+    panel = get_price_panel(adjusted)
+    return _price_snapshots.get() + ((panel,) if panel is not None else ())
+
 
 def wrap_dataframe(df: pd.DataFrame) -> str:
     df_string = df.to_markdown(index=False)
     return f"\n<observation>\n{df_string}\n</observation>\n"
 
 
+def is_cacheable_observation(result) -> bool:
+    return (
+        isinstance(result, str)
+        and "Error:" not in result
+        and "No data found" not in result
+    )
+
+
+def cache_tool_output(fn):
+    """Cache a tool's observation until the next market close so repeat questions reuse it."""
+    return cached_until_close(f"tool:{fn.__name__}", is_cacheable_observation)(fn)
+
+
+def fetch_many(
+    symbols: Iterable[str],
+    start_date: datetime,
+    end_date: Optional[datetime] = None,
+    adjusted: bool = False,
+) -> pd.DataFrame:
+    """
+    Fetch daily prices for many symbols in batched upstream calls.
+
+    Symbols are grouped FETCH_BATCH_SIZE at a time into multi-symbol requests, and the
+    groups run concurrently on a process-wide pool of FETCH_CONCURRENCY workers, so a
+    scan never has more than that many requests in flight. A group that fails is
+    logged and left out; the error is raised only if every group fails. Symbols held
+    by a PriceSnapshot in scope or by the current shared price panel (see panel.py)
+    are served locally instead.
+
+    Args:
+        symbols (Iterable[str]): The tickers to fetch.
+        start_date (datetime): The first date.
+        end_date (datetime): The last date. Defaults to today.
+        adjusted (bool): Return split- and dividend-adjusted prices.
+
+    Returns:
+        pd.DataFrame: OHLCV indexed by (symbol, date).
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+    frames = []
+    for snapshot in price_sources(adjusted):
+        if snapshot.covers(start_date, adjusted):
+            hits = [symbol for symbol in symbols if symbol in snapshot.symbols]
+            if hits:
+                frames.append(snapshot.select(hits, start_date, end_date))
+                symbols = [symbol for symbol in symbols if symbol not in hits]
+
+    if not symbols:
+        return pd.concat(frames).sort_index() if frames else empty_panel()
+
+    fetcher = get_price_fetcher()
+    args = (
+        start_date.strftime("%Y-%m-%d"),
+        end_date.strftime("%Y-%m-%d") if end_date else None,
+        adjusted,
+    )
+    batches = [
+        symbols[i : i + FETCH_BATCH_SIZE]
+        for i in range(0, len(symbols), FETCH_BATCH_SIZE)
+    ]
+    if len(batches) == 1 and not frames:
+        return fetcher.fetch(batches[0], *args)
+
+    futures = [
+        _fetch_executor.submit(
+            contextvars.copy_context().run, fetcher.fetch, batch, *args
+        )
+        for batch in batches
+    ]
+
+    last_error, failed = None, 0
+    for batch, future in zip(batches, futures):
+        try:
+            frames.append(future.result())
+        except Exception as e:
+            logger.warning("fetch_many failed for %s: %s", ",".join(batch), e)
+            last_error, failed = e, failed + 1
+
+    if failed == len(batches) and not frames:
+        raise last_error
+    return pd.concat(frames).sort_index()
+
+
+def select_symbol(panel: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Return one symbol's prices from a fetch_many panel, indexed by date."""
+    symbol = symbol.upper()
+    if symbol not in panel.index.get_level_values("symbol"):
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return panel.xs(symbol, level="symbol")
+
+
 def fetch_stock_data(
     symbol: str, start_date: datetime, end_date: datetime
 ) -> pd.DataFrame:
-    return obb.equity.price.historical(
-        symbol,
-        start_date=start_date.strftime("%Y-%m-%d"),
-        end_date=end_date.strftime("%Y-%m-%d"),
-        provider="yfinance",
-    ).to_df()
+    return select_symbol(fetch_many([symbol], start_date, end_date), symbol)
 
 
 def fetch_sp500_data(start_date: datetime, end_date: datetime) -> pd.DataFrame:
-    return obb.equity.price.historical(
-        "^GSPC",
-        start_date=start_date.strftime("%Y-%m-%d"),
-        end_date=end_date.strftime("%Y-%m-%d"),
-        provider="yfinance",
-    ).to_df()
+    return fetch_stock_data("^GSPC", start_date, end_date)
 
 
 def handle_tool_error(state) -> dict:
@@ -47,7 +207,22 @@ def handle_tool_error(state) -> dict:
     }
 
 
-def create_tool_node_with_fallback(tools: list) -> dict:
-    return ToolNode(tools).with_fallbacks(
+def create_tool_node_with_fallback(
+    tools: list, priority: Priority = Priority.INTERACTIVE
+) -> dict:
+    tool_node = ToolNode(tools)
+
+    # Tools are plain functions, so the request deadline in the config and the fetch
+    # priority are handed to them (and the provider calls they make) through context
+    # variables.
+    def run_tools(state, config: RunnableConfig):
+        with deadline_scope(config), fetch_priority(priority):
+            return tool_node.invoke(state, config)
+
+    async def arun_tools(state, config: RunnableConfig):
+        with deadline_scope(config), fetch_priority(priority):
+            return await tool_node.ainvoke(state, config)
+
+    return RunnableLambda(run_tools, afunc=arun_tools, name="tools").with_fallbacks(
         [RunnableLambda(handle_tool_error)], exception_key="error"
     )
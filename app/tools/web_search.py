@@ -0,0 +1,65 @@
+import os
+import asyncio
+from typing import Optional
+
+import requests
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import (
+    TAVILY_API_URL,
+    TavilySearchAPIWrapper,
+)
+
+from app.features.deadline import UPSTREAM_TIMEOUT_SECONDS
+from app.features.replay import REPLAY_MODE
+from app.features.scheduler import schedule_fetch
+
+
+class TavilyAPIWrapper(TavilySearchAPIWrapper):
+    """The Tavily client with a request timeout, which the stock one does not set."""
+
+    def raw_results(self, query: str, max_results: Optional[int] = 5, **kwargs) -> dict:
+        params = {
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": "advanced",
+            "include_domains": [],
+            "exclude_domains": [],
+            "include_answer": False,
+            "include_raw_content": False,
+            "include_images": False,
+            **kwargs,
+        }
+        response = requests.post(
+            f"{TAVILY_API_URL}/search", json=params, timeout=UPSTREAM_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class WebSearch(TavilySearchResults):
+    """Tavily search that goes through the fetch scheduler like every other upstream call."""
+
+    def _run(self, query: str, run_manager=None):
+        try:
+            return schedule_fetch(
+                "tavily", self.api_wrapper.results, query, self.max_results
+            )
+        except Exception as e:
+            return repr(e)
+
+    async def _arun(self, query: str, run_manager=None):
+        return await asyncio.to_thread(self._run, query)
+
+
+def web_search(max_results: int = 1, api_key: Optional[str] = None) -> WebSearch:
+    """The web search tool; in replay mode it needs no Tavily API key."""
+    api_key = api_key or os.environ.get("TAVILY_API_KEY")
+    if not api_key and REPLAY_MODE == "replay":
+        api_key = "replay"
+    if api_key:
+        api_wrapper = TavilyAPIWrapper(tavily_api_key=api_key)
+    else:
+        # Reads TAVILY_API_KEY itself and raises the usual error when it is missing.
+        api_wrapper = TavilyAPIWrapper()
+    return WebSearch(max_results=max_results, api_wrapper=api_wrapper)
@@ -1,18 +1,19 @@
-from typing import Callable, TypeVar
-
-from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit.delta_generator import DeltaGenerator
-from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
 from langchain_core.runnables import RunnableConfig
-from openbb import obb
 from dotenv import load_dotenv
 
 from app.chains.clear_results import with_clear_container
 from app.chains.agent import create_anthropic_agent_graph
+from app.chains.checkpoint import create_checkpointer
+from app.chains.response_cache import ResponseCache
+from app.features.cache import get_cache
+from app.features.deadline import deadline_after
+from app.features.obb_session import start_background_login
 
-import os
 import warnings
-import inspect
+import asyncio
+import resource
+import sys
 import uuid
 import pandas as pd
 import streamlit as st
@@ -21,12 +22,6 @@ warnings.filterwarnings("ignore")
 
 load_dotenv()
 
-obb.account.login(pat=os.environ.get("OPENBB_TOKEN"), remember_me=True)
-obb.user.credentials.tiingo_token = os.environ.get("TIINGO_API_KEY")
-obb.user.credentials.fmp_api_key = os.environ.get("FMP_API_KEY")
-obb.user.credentials.intrinio_api_key = os.environ.get("INTRINIO_API_KEY")
-obb.user.credentials.fred_api_key = os.environ.get("FRED_API_KEY")
-
 pd.set_option("display.max_columns", None)
 pd.set_option("display.max_rows", None)
 pd.set_option("display.max_colwidth", None)
@@ -38,30 +33,80 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-T = TypeVar("T")
 
+@st.cache_resource
+def start_openbb_login():
+    return start_background_login()
+
+
+start_openbb_login()
+
+
+async def stream_answer(
+    question: dict, cfg: RunnableConfig, parent_container: DeltaGenerator
+) -> tuple[str, dict]:
+    """
+    Run the agent and render its tokens and tool progress as they arrive.
+
+    Returns the final answer and the timings shown in the debug panel.
+    """
+    status = parent_container.status("Thinking...")
+    answer_placeholder = parent_container.empty()
 
-def get_streamlit_cb(parent_container: DeltaGenerator):
-    def decor(fn: Callable[..., T]) -> Callable[..., T]:
-        ctx = get_script_run_ctx()
+    timings = {"ttfb": None, "total": None, "cached": False, "tools": []}
+    texts = {}
+    answer = ""
 
-        def wrapper(*args, **kwargs) -> T:
-            add_script_run_ctx(ctx=ctx)
-            return fn(*args, **kwargs)
+    async for event in get_response_cache().astream_events(question, cfg):
+        if event.type == "token":
+            if timings["ttfb"] is None:
+                timings["ttfb"] = event.elapsed
+            texts[event.run_id] = texts.get(event.run_id, "") + event.data
+            answer_placeholder.markdown(texts[event.run_id])
 
-        return wrapper
+        elif event.type == "tool_start":
+            status.update(label=f"Fetching {event.name}...")
+            status.write(f"Fetching `{event.name}`...")
 
-    st_cb = StreamlitCallbackHandler(parent_container=parent_container)
+        elif event.type == "tool_end":
+            status.write(f"`{event.name}` done in {event.duration:.1f}s")
+            timings["tools"].append(
+                {"tool": event.name, "seconds": round(event.duration, 2)}
+            )
 
-    for name, fn in inspect.getmembers(st_cb, predicate=inspect.ismethod):
-        if name.startswith("on_"):
-            setattr(st_cb, name, decor(fn))
+        elif event.type == "final":
+            answer = event.data
+            timings["total"] = event.elapsed
+            timings["cached"] = event.metadata.get("cached", False)
+            if timings["ttfb"] is None:
+                timings["ttfb"] = event.elapsed
 
-    return st_cb
+    status.update(label="Done", state="complete")
+    answer_placeholder.empty()
+    return answer, timings
 
 
-if "graph" not in st.session_state:
-    st.session_state.graph = create_anthropic_agent_graph()
+def peak_memory_mb() -> float:
+    """Peak resident memory of the Streamlit process, shared by all sessions."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@st.cache_resource
+def get_agent_graph():
+    """One compiled graph (LLM clients, tool nodes, checkpointer) for every session."""
+    return create_anthropic_agent_graph(checkpointer=create_checkpointer())
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(get_agent_graph(), get_cache())
+
+
+# Only the conversation itself is kept per session; its history lives in the shared
+# checkpointer under this session's thread_id.
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = str(uuid.uuid4())
 
 st.title("Financial Chat, your AI financial advisor 📈")
 
@@ -88,16 +133,26 @@ if with_clear_container(submit_clicked):
     st.session_state.messages.append({"role": "user", "content": user_input})
 
     answer_container = output_container.chat_message("assistant", avatar="💸")
-    st_callback = get_streamlit_cb(answer_container)
 
     cfg = RunnableConfig(recursion_limit=150)
-    cfg["callbacks"] = [st_callback]
-    cfg["configurable"] = {"thread_id": uuid.uuid4()}
+    cfg["configurable"] = {
+        "thread_id": st.session_state.thread_id,
+        "deadline": deadline_after(),
+    }
 
     question = {"messages": ("user", user_input)}
 
-    response = st.session_state.graph.invoke(question, cfg)
-    answer = response["messages"][-1].content
+    answer, timings = asyncio.run(stream_answer(question, cfg, answer_container))
 
     st.session_state.messages.append({"role": "assistant", "content": answer})
     answer_container.write(answer)
+
+    with output_container.expander("Debug"):
+        st.write(
+            f"Time to first token: {timings['ttfb']:.2f}s, "
+            f"total: {timings['total']:.2f}s"
+            + (" (cached)" if timings["cached"] else "")
+        )
+        st.write(f"Process peak memory: {peak_memory_mb():.0f} MB")
+        if timings["tools"]:
+            st.dataframe(pd.DataFrame(timings["tools"]), hide_index=True)
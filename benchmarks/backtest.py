@@ -0,0 +1,37 @@
+"""
+Time the bullish-setup backtest at universe scale on synthetic prices.
+
+    python -m benchmarks.backtest --symbols 1000 --years 10
+"""
+
+import time
+import argparse
+import tracemalloc
+
+from app.features.backtest import RULES, run_backtest
+from benchmarks.synthetic import synthetic_ohlcv
+
+
+def run(symbols: int, years: int, min_rules: int) -> None:
+    panel = synthetic_ohlcv(symbols, days=252 * years)
+    print(f"{symbols} symbols x {252 * years} sessions ({len(panel):,} bars)")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run_backtest(panel, min_rules=min_rules)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"backtest: {elapsed:.2f} s, peak {peak / 2**20:.0f} MB traced")
+    print(f"signals: {len(result['trades']):,}\n")
+    print(result["summary"].round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--min-rules", type=int, default=len(RULES) - 2)
+    args = parser.parse_args()
+    run(args.symbols, args.years, args.min_rules)
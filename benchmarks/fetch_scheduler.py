@@ -0,0 +1,68 @@
+"""
+Measure how long interactive fetches queue while a scan and a cache warm saturate a
+provider.
+
+A simulated upstream call sleeps for a fixed latency. Background and scan workers keep
+the provider busy while interactive requests arrive one by one; the run is repeated
+with every request at the same priority to show what the priority classes buy.
+
+    python -m benchmarks.fetch_scheduler --latency 0.05
+"""
+
+import time
+import argparse
+import threading
+
+import numpy as np
+
+from app.features.scheduler import FetchScheduler, Priority, fetch_priority
+
+RATE_LIMITS = {"upstream": (40.0, 10), "default": (40.0, 10)}
+
+
+def run_once(latency: float, interactive: int, prioritized: bool) -> list:
+    scheduler = FetchScheduler(
+        max_concurrency=4, reserved_interactive=1, rate_limits=RATE_LIMITS
+    )
+    stop = threading.Event()
+
+    def worker(priority: Priority):
+        with fetch_priority(priority if prioritized else Priority.INTERACTIVE):
+            while not stop.is_set():
+                scheduler.run("upstream", time.sleep, latency)
+
+    workers = [
+        threading.Thread(target=worker, args=(priority,), daemon=True)
+        for priority in [Priority.SCAN] * 4 + [Priority.BACKGROUND] * 4
+    ]
+    for thread in workers:
+        thread.start()
+    time.sleep(0.5)
+
+    queue_times = []
+    for _ in range(interactive):
+        queue_times.append(scheduler.acquire("upstream", Priority.INTERACTIVE))
+        time.sleep(latency)
+        scheduler.release()
+        time.sleep(latency)
+
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return queue_times
+
+
+def run(latency: float, interactive: int) -> None:
+    print(f"{'setup':<14}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for name, prioritized in [("flat", False), ("prioritized", True)]:
+        times = np.array(run_once(latency, interactive, prioritized)) * 1000
+        p50, p95 = np.quantile(times, [0.5, 0.95])
+        print(f"{name:<14}{p50:>9.1f}{p95:>9.1f}{times.max():>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--interactive", type=int, default=40)
+    args = parser.parse_args()
+    run(args.latency, args.interactive)
@@ -0,0 +1,62 @@
+"""
+Time questions through the full agent graph against recorded upstream responses.
+
+Record the fixtures once, with network access and API keys, then replay them anywhere.
+Replayed calls take as long as they did when recorded unless `--latency` (in ms) says
+otherwise. Tool outputs go to a throwaway cache, so every run makes every call.
+
+    python -m benchmarks.graph_replay --record "full analysis of NVDA" "top gainers"
+    python -m benchmarks.graph_replay --runs 5 "full analysis of NVDA" "top gainers"
+    python -m benchmarks.graph_replay --latency 0 "full analysis of NVDA"
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+QUESTIONS = [
+    "full analysis of NVDA",
+    "top gainers",
+    "chart for TSLA",
+    "position size for AMD at 150 stop 140",
+]
+
+
+def run(questions: list, runs: int) -> None:
+    from app.chains.agent import create_anthropic_agent_graph
+    from app.features.replay import get_replayer
+
+    graph = create_anthropic_agent_graph()
+    replayer = get_replayer()
+    print(f"{replayer.mode} from {replayer.root}")
+    print(f"{'question':<42}{'median s':>10}{'min s':>10}")
+    for question in questions:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            graph.invoke({"messages": ("user", question)}, {"recursion_limit": 25})
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{question[:40]:<42}{statistics.median(timings):>10.3f}{min(timings):>10.3f}"
+        )
+    print(replayer.status())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("questions", nargs="*", default=QUESTIONS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--record", action="store_true", help="Call upstream and save the responses."
+    )
+    parser.add_argument("--latency", help="Replay every call in this many ms.")
+    args = parser.parse_args()
+
+    # The replay settings are read at import time.
+    os.environ["REPLAY_MODE"] = "record" if args.record else "replay"
+    if args.latency is not None:
+        os.environ["REPLAY_LATENCY_MS"] = args.latency
+    os.environ["CACHE_DB"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    run(args.questions, 1 if args.record else args.runs)
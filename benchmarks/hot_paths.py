@@ -0,0 +1,298 @@
+"""
+Time the numeric hot paths behind the tools on synthetic prices and flag regressions.
+
+Every case runs at each `--sizes` entry, written SYMBOLSxYEARS of daily bars (1x2 is
+one symbol with two years, 2000x10 is 2,000 symbols with ten). A case is timed over
+all the symbols of a size, or its first `limit` symbols for the slow per-chart and
+per-report cases, and the best of `--repeat` runs is kept. The run fails if any case
+is slower than its saved baseline by more than the threshold, or if a case it times
+has no baseline for that size yet (record one with `--update`). A single run is too
+noisy to compare (a cold `--repeat 1` pass can read 50-100% slow), so checks need at
+least three. A case whose optional extra is missing (kaleido, for chart images) is
+reported and skipped; any other missing dependency is an error.
+
+    python -m benchmarks.hot_paths                                # check against the baseline
+    python -m benchmarks.hot_paths --sizes 1x2 100x2 500x5 2000x10 --update
+    python -m benchmarks.hot_paths --update                       # record a new baseline
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib
+import warnings
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_ohlcv
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "hot_paths.json")
+
+SIZES = ["1x2", "100x2", "500x5", "2000x10"]
+DEFAULT_SIZES = ["1x2", "100x2"]
+SESSIONS_PER_YEAR = 252
+# A case must also be this many seconds slower to fail, so millisecond cases do not
+# fail on timer noise.
+MIN_REGRESSION_SECONDS = 0.005
+# Fewest runs per case when checking against the baseline.
+MIN_CHECK_REPEAT = 3
+
+RS_INTERVALS = [21, 63, 126, 189, 252]
+NEWS_PER_SYMBOL = 10
+NEWS_WORDS = (
+    "shares rallied after strong earnings beat guidance raised record revenue growth "
+    "stock plunged on weak outlook downgrade lawsuit losses missed estimates concerns "
+    "analysts expect steady demand margins pressure investors cautious upbeat quarter "
+    "buyback dividend cut layoffs partnership approval delay recall surge slump"
+).split()
+
+
+class Case(NamedTuple):
+    setup: Callable[[pd.DataFrame, Optional[int]], object]
+    run: Callable[[object], None]
+    limit: Optional[int] = None
+    # The optional extra the case needs; the case is skipped when it is not installed.
+    optional: Optional[str] = None
+
+
+def parse_size(size: str) -> tuple:
+    symbols, years = size.lower().split("x")
+    return int(symbols), int(years) * SESSIONS_PER_YEAR
+
+
+def frames(panel: pd.DataFrame, limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """One date-indexed OHLCV frame per symbol, like `select_symbol` returns."""
+    symbols = [s for s in panel.index.unique("symbol") if s != "^GSPC"][:limit]
+    return {symbol: panel.xs(symbol, level="symbol") for symbol in symbols}
+
+
+def technicals(panel: pd.DataFrame, limit: Optional[int] = None) -> dict:
+    from app.features.technical import add_technicals
+
+    return {s: add_technicals(df.copy()) for s, df in frames(panel, limit).items()}
+
+
+def missing_extra(case: Case, error: ImportError) -> bool:
+    """Whether `error` is the case's optional extra not being installed."""
+    return case.optional is not None and error.name == case.optional
+
+
+def news_batch(panel: pd.DataFrame, limit: Optional[int] = None) -> list:
+    """NEWS_PER_SYMBOL short articles per symbol, built from a small word list."""
+    from app.tools.stock_sentiment import get_sentiment_analyzer
+
+    get_sentiment_analyzer()
+    rng = np.random.default_rng(7)
+    count = len(frames(panel, limit)) * NEWS_PER_SYMBOL
+    return [" ".join(rng.choice(NEWS_WORDS, 40)) for _ in range(count)]
+
+
+def chart_data(panel: pd.DataFrame, limit: Optional[int] = None) -> dict:
+    # plotly writes images through kaleido, and only says it is missing on the first write.
+    importlib.import_module("kaleido")
+    return technicals(panel, limit)
+
+
+def returns(panel: pd.DataFrame, limit: Optional[int] = None) -> list:
+    # Imported here so the import is not timed.
+    importlib.import_module("quantstats")
+
+    bench = panel.xs("^GSPC", level="symbol")["close"].pct_change().dropna()
+    return [
+        (df["close"].pct_change().dropna(), bench)
+        for df in frames(panel, limit).values()
+    ]
+
+
+def run_add_technicals(data: dict) -> None:
+    from app.features.technical import add_technicals
+
+    for df in data.values():
+        add_technicals(df.copy())
+
+
+def run_detect_trendline(data: dict) -> None:
+    from app.features.technical import detect_trendline
+
+    for df in data.values():
+        detect_trendline(df)
+
+
+def run_technical_levels(data: dict) -> None:
+    from app.tools.risk_management import calculate_technical_levels
+
+    for df in data.values():
+        calculate_technical_levels(df.copy())
+
+
+def rs_setup(panel: pd.DataFrame, limit: Optional[int] = None) -> tuple:
+    from app.tools.utils import PriceSnapshot
+
+    start = panel.index.get_level_values("date").min()
+    return PriceSnapshot(panel, start, adjusted=False), list(frames(panel, limit))
+
+
+def run_rs_rating(data: tuple) -> None:
+    from app.tools.stock_relative_strength import calculate_rs_rating
+    from app.tools.utils import use_price_snapshots
+
+    snapshot, symbols = data
+    with use_price_snapshots(snapshot):
+        for symbol in symbols:
+            calculate_rs_rating(symbol, RS_INTERVALS)
+
+
+def run_sentiment(texts: list) -> None:
+    from app.tools.stock_sentiment import analyze_sentiment
+
+    for text in texts:
+        analyze_sentiment(text)
+
+
+def run_wrap_dataframe(data: dict) -> None:
+    from app.tools.utils import wrap_dataframe
+
+    # Shaped like get_stock_price_history's output: the last 30 bars, newest first.
+    for df in data.values():
+        wrap_dataframe(df[-30:][::-1].reset_index())
+
+
+def run_chart(data: dict) -> None:
+    from app.features.chart import create_plotly_chart, plotly_fig_to_bytes
+
+    path = os.path.join(tempfile.mkdtemp(), "chart.png")
+    for symbol, df in data.items():
+        plotly_fig_to_bytes(create_plotly_chart(df, symbol), filename=path)
+
+
+def run_quantstats(data: list) -> None:
+    import quantstats as qs
+
+    for stock_ret, bench_ret in data:
+        qs.reports.metrics(stock_ret, mode="full", benchmark=bench_ret, display=False)
+
+
+CASES = {
+    "add_technicals": Case(frames, run_add_technicals),
+    "detect_trendline": Case(frames, run_detect_trendline),
+    "technical_levels": Case(frames, run_technical_levels),
+    "rs_rating": Case(rs_setup, run_rs_rating, limit=200),
+    "news_sentiment": Case(news_batch, run_sentiment),
+    "wrap_dataframe": Case(frames, run_wrap_dataframe),
+    "chart_image": Case(chart_data, run_chart, limit=5, optional="kaleido"),
+    "quantstats_metrics": Case(returns, run_quantstats, limit=20),
+}
+
+
+def synthetic_panel(symbols: int, days: int) -> pd.DataFrame:
+    """`symbols` synthetic symbols plus a ^GSPC benchmark series."""
+    panel = synthetic_ohlcv(symbols, days)
+    index = synthetic_ohlcv(1, days, seed=11).rename(index={"SYM00000": "^GSPC"})
+    return pd.concat([panel, index])
+
+
+def warm_up(cases: list) -> None:
+    """Run every case once on one symbol, so imports and first-call setup are not timed."""
+    panel = synthetic_panel(1, SESSIONS_PER_YEAR)
+    for name in cases:
+        case = CASES[name]
+        try:
+            case.run(case.setup(panel, 1))
+        except ImportError as e:
+            if not missing_extra(case, e):
+                raise
+
+
+def time_case(case: Case, panel: pd.DataFrame, repeat: int) -> tuple:
+    data = case.setup(panel, case.limit)
+    calls = len(data[1]) if isinstance(data, tuple) else len(data)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(data)
+        best = min(best, time.perf_counter() - start)
+    return best, calls
+
+
+def run(sizes: list, cases: list, repeat: int, threshold: float, update: bool) -> int:
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    warm_up(cases)
+    failed = missing = False
+    results = {}
+    print(
+        f"{'case':<20}{'size':>9}{'calls':>7}{'total s':>10}{'ms/call':>10}"
+        f"{'baseline':>10}{'change':>9}"
+    )
+    for size in sizes:
+        panel = synthetic_panel(*parse_size(size))
+        for name in cases:
+            key = f"{name}/{size}"
+            try:
+                seconds, calls = time_case(CASES[name], panel, repeat)
+            except ImportError as e:
+                if not missing_extra(CASES[name], e):
+                    raise
+                print(f"{name:<20}{size:>9}  skipped: {e}")
+                continue
+            results[key] = seconds
+
+            previous = baseline.get(key)
+            change = f"{seconds / previous - 1:+.0%}" if previous else "n/a"
+            unrecorded = not previous and not update
+            regressed = (
+                previous
+                and not update
+                and seconds > previous * (1 + threshold)
+                and seconds - previous > MIN_REGRESSION_SECONDS
+            )
+            print(
+                f"{name:<20}{size:>9}{calls:>7}{seconds:>10.3f}"
+                f"{seconds / max(calls, 1) * 1000:>10.2f}"
+                f"{previous or 'n/a':>10}{change:>9}"
+                + ("  FAIL" if regressed else "")
+                + ("  FAIL: no baseline" if unrecorded else "")
+            )
+            failed = failed or bool(regressed)
+            missing = missing or unrecorded
+
+    if failed:
+        print(f"FAIL: slower than baseline by more than {threshold:.0%}")
+    if missing:
+        print("FAIL: no baseline for some cases; record them with --update")
+
+    if update:
+        baseline.update({k: round(v, 4) for k, v in results.items()})
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", default=DEFAULT_SIZES, help=f"e.g. {' '.join(SIZES)}"
+    )
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=CASES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+    if args.repeat < MIN_CHECK_REPEAT and not args.update:
+        parser.error(
+            f"--repeat must be at least {MIN_CHECK_REPEAT} to check against the baseline"
+        )
+    # quantstats and pandas_ta trip pandas deprecation warnings on every call.
+    warnings.simplefilter("ignore", FutureWarning)
+    sys.exit(run(args.sizes, args.cases, args.repeat, args.threshold, args.update))
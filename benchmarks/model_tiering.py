@@ -0,0 +1,144 @@
+"""
+Compare end-to-end latency of a single-model graph against a tiered one.
+
+The graph is built with a stub chat model that sleeps for a per-model latency instead
+of calling a provider, so the numbers only reflect how model choice per node adds up
+along each routing path.
+
+    python -m benchmarks.model_tiering --runs 5 --scale 0.1
+"""
+
+import time
+import argparse
+import statistics
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.chains.agent import create_anthropic_agent_graph
+from app.chains.models import load_model_config
+
+# Rough time-to-last-token for a typical node response, in seconds.
+STUB_LATENCY = {
+    "claude-3-opus-20240229": 6.0,
+    "claude-3-sonnet-20240229": 2.5,
+    "claude-3-haiku-20240307": 0.8,
+}
+
+TIERED = {
+    "primary_assistant": "claude-3-haiku-20240307",
+    "gainers_losers": "claude-3-haiku-20240307",
+    "risk_management": "claude-3-haiku-20240307",
+}
+
+# Questions the fast-path router does not catch, so every run goes through the
+# primary assistant first.
+SCENARIOS = {
+    "gainers_losers": "How is the market doing today?",
+    "risk_management": "Can you help me manage risk on nvidia?",
+    "analyze_stocks": "What do you think about nvidia?",
+}
+
+HANDOFFS = {
+    "gainers_losers": ("ToGainersLosersAssistant", {"request": "today"}),
+    "risk_management": (
+        "ToRiskManagementAssistant",
+        {"symbol": "NVDA", "request": "default account"},
+    ),
+    "analyze_stocks": ("ToFullAnalysisAssistant", {"symbol": "NVDA"}),
+}
+
+
+class StubChatModel(BaseChatModel):
+    """Sleeps like the named model, hands off from the router and answers otherwise."""
+
+    model_name: str
+    scale: float = 1.0
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "StubChatModel":
+        names = [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+        return StubChatModel(
+            model_name=self.model_name, scale=self.scale, tool_names=names
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(STUB_LATENCY[self.model_name] * self.scale)
+
+        question = next(
+            m.content for m in reversed(messages) if isinstance(m, HumanMessage)
+        )
+        is_router = any(name.startswith("To") for name in self.tool_names)
+
+        if is_router and isinstance(messages[-1], HumanMessage):
+            node = next(n for n, q in SCENARIOS.items() if q == question)
+            name, args = HANDOFFS[node]
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": name, "args": args, "id": f"toolu_{node}"}],
+            )
+        else:
+            message = AIMessage(content=f"Stub answer to: {question}")
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def make_llm_for(overrides: dict, scale: float):
+    config = load_model_config()
+
+    def llm_for(node: str) -> StubChatModel:
+        model = overrides.get(node, config[node]["model"])
+        if model not in STUB_LATENCY:
+            model = "claude-3-opus-20240229"
+        return StubChatModel(model_name=model, scale=scale)
+
+    return llm_for
+
+
+def run(runs: int, scale: float) -> None:
+    setups = {
+        "single": create_anthropic_agent_graph(llm_for=make_llm_for({}, scale)),
+        "tiered": create_anthropic_agent_graph(llm_for=make_llm_for(TIERED, scale)),
+    }
+
+    print(f"{'scenario':<18}{'setup':<10}{'median s':>10}{'speedup':>10}")
+    for scenario, question in SCENARIOS.items():
+        medians = {}
+        for setup, graph in setups.items():
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                graph.invoke({"messages": ("user", question)}, {"recursion_limit": 25})
+                timings.append(time.perf_counter() - start)
+            medians[setup] = statistics.median(timings)
+
+        for setup, median in medians.items():
+            speedup = medians["single"] / median
+            print(f"{scenario:<18}{setup:<10}{median:>10.3f}{speedup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=0.1,
+        help="Multiplier applied to the stub latencies to keep runs short.",
+    )
+    args = parser.parse_args()
+    run(args.runs, args.scale)
@@ -0,0 +1,88 @@
+"""
+Memory per symbol for price history held as pandas frames versus the shared panel.
+
+Uses synthetic daily OHLCV for N symbols, then measures the Python heap needed to
+hold every symbol as a float64 DataFrame (what each worker kept per request) and to
+open the memory-mapped panel and read every symbol through it.
+
+    python -m benchmarks.price_panel --symbols 2000
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from app.features.panel import PricePanel, write_panel
+from app.features.providers import PRICE_COLUMNS
+from benchmarks.synthetic import DAYS, synthetic_ohlcv
+
+
+def heap_bytes(fn):
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def run(symbols: int) -> None:
+    panel = synthetic_ohlcv(symbols)
+    names = panel.index.get_level_values("symbol").unique()
+
+    frames, frame_bytes = heap_bytes(
+        lambda: {
+            symbol: panel.xs(symbol, level="symbol")[PRICE_COLUMNS].copy()
+            for symbol in names
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as root:
+        path = write_panel(
+            panel, panel.index.get_level_values("date").min(), False, root
+        )
+        disk = sum(
+            os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+        )
+
+        def open_and_read():
+            mapped = PricePanel(path)
+            closes = [mapped.values[mapped.block(s)][:, 3].mean() for s in names]
+            return mapped, closes
+
+        (mapped, _), panel_bytes = heap_bytes(open_and_read)
+
+        start = time.perf_counter()
+        for symbol in names[:200]:
+            mapped.prices(symbol)
+        lookup_ms = (time.perf_counter() - start) / min(200, len(names)) * 1000
+
+        view = mapped.prices(names[0])
+        shares = np.shares_memory(view.to_numpy(), mapped.values)
+
+    print(f"symbols: {symbols}, sessions per symbol: {DAYS}")
+    print(f"{'layout':<22}{'per symbol':>14}{'total':>12}")
+    print(
+        f"{'float64 DataFrames':<22}{frame_bytes / symbols / 1024:>11.1f} KB"
+        f"{frame_bytes / 2**20:>9.1f} MB  (heap, per worker)"
+    )
+    print(
+        f"{'panel files':<22}{disk / symbols / 1024:>11.1f} KB"
+        f"{disk / 2**20:>9.1f} MB  (page cache, shared)"
+    )
+    print(
+        f"{'panel heap':<22}{panel_bytes / symbols / 1024:>11.1f} KB"
+        f"{panel_bytes / 2**20:>9.1f} MB  (index, per worker)"
+    )
+    print(f"\nprices() lookup: {lookup_ms:.3f} ms, zero-copy view: {shares}")
+    del frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.symbols)
@@ -0,0 +1,80 @@
+"""
+Measure Python heap allocated per concurrent Streamlit session.
+
+Compares building a graph (and its LLM clients) for every session, as the UI used to,
+against one shared graph with only the conversation state kept per session. Memory is
+measured with tracemalloc, so it covers Python allocations and not native libraries.
+
+    python -m benchmarks.session_memory --sessions 20
+"""
+
+import os
+import gc
+import uuid
+import argparse
+import tracemalloc
+
+# Clients are only constructed, never called.
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from app.chains.agent import create_anthropic_agent_graph
+from app.chains.checkpoint import create_checkpointer
+from app.chains.models import build_llm
+
+
+def new_session_state() -> dict:
+    return {
+        "thread_id": str(uuid.uuid4()),
+        "messages": [{"role": "assistant", "content": "How can I help you?"}],
+    }
+
+
+def per_session(sessions: int) -> list:
+    states = []
+    for _ in range(sessions):
+        build_llm.cache_clear()
+        state = new_session_state()
+        state["graph"] = create_anthropic_agent_graph(
+            checkpointer=create_checkpointer(":memory:")
+        )
+        states.append(state)
+    return states
+
+
+def shared(sessions: int) -> list:
+    graph = create_anthropic_agent_graph(checkpointer=create_checkpointer(":memory:"))
+    return [graph] + [new_session_state() for _ in range(sessions)]
+
+
+def measure(setup, sessions: int) -> int:
+    build_llm.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    kept = setup(sessions)
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del kept
+
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+def run(sessions: int) -> None:
+    # Warm up imports and module-level caches so they are not charged to either setup.
+    measure(shared, 1)
+
+    print(f"{'setup':<14}{'total MB':>10}{'per session KB':>16}")
+    for name, setup in [("per-session", per_session), ("shared", shared)]:
+        total = measure(setup, sessions)
+        print(f"{name:<14}{total / 2**20:>10.2f}{total / sessions / 2**10:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sessions)
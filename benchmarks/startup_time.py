@@ -0,0 +1,123 @@
+"""
+Measure cold-start import time of the API and agent modules.
+
+Each target is imported in a fresh interpreter with `python -X importtime`. The run fails
+if any heavy data/plotting dependency is imported eagerly, or if the cumulative import
+time regresses beyond the threshold against the saved baseline.
+
+    python -m benchmarks.startup_time            # check against the baseline
+    python -m benchmarks.startup_time --update   # record a new baseline
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(__file__), "baselines", "startup_time.json"
+)
+
+TARGETS = ["app.server", "app.chains.agent"]
+
+# Must only be imported when a tool first needs them.
+LAZY_MODULES = [
+    "openbb",
+    "quantstats",
+    "pandas_ta",
+    "sklearn",
+    "seaborn",
+    "plotly",
+    "pyimgur",
+    "yfinance",
+    "finvizfinance",
+    "vaderSentiment",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(target: str) -> tuple[float, set[str], list[tuple[int, str]]]:
+    """Import `target` in a fresh interpreter; return seconds, modules and the slowest imports."""
+    env = {
+        "ANTHROPIC_API_KEY": "benchmark",
+        "TAVILY_API_KEY": "benchmark",
+        **os.environ,
+        "CHECKPOINT_DB": ":memory:",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr[-2000:]}")
+
+    modules = set()
+    children = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.add(name.split(".")[0])
+        if name == target and len(indent) == 1:
+            total_us = cumulative
+        elif len(indent) == 3:
+            children.append((cumulative, name))
+
+    return total_us / 1e6, modules, sorted(children, reverse=True)[:10]
+
+
+def run(runs: int, threshold: float, update: bool) -> int:
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    failed = False
+    results = {}
+    for target in TARGETS:
+        samples = []
+        for _ in range(runs):
+            seconds, modules, slowest = measure(target)
+            samples.append(seconds)
+        results[target] = statistics.median(samples)
+
+        eager = sorted(set(LAZY_MODULES) & modules)
+        previous = baseline.get(target)
+        change = f"{results[target] / previous - 1:+.0%}" if previous else "n/a"
+        print(
+            f"{target}: {results[target]:.3f}s (baseline {previous or 'n/a'}, {change})"
+        )
+        for cumulative, name in slowest:
+            print(f"    {cumulative / 1e6:7.3f}s  {name}")
+
+        if eager:
+            print(f"  FAIL: imported eagerly: {', '.join(eager)}")
+            failed = True
+        if previous and not update and results[target] > previous * (1 + threshold):
+            print(f"  FAIL: slower than baseline by more than {threshold:.0%}")
+            failed = True
+
+    if update:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({k: round(v, 3) for k, v in results.items()}, f, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.threshold, args.update))
@@ -0,0 +1,85 @@
+"""
+Recall and latency of the symbol index on misspelled company names.
+
+The index holds the seed list plus `--filler` made-up company names, about the size
+of the SEC ticker list. Queries are the seed names and aliases with one random typo
+each (a dropped, doubled, swapped or replaced letter).
+
+    python -m benchmarks.symbol_lookup --filler 10000 --queries 2000
+"""
+
+import time
+import string
+import argparse
+
+import numpy as np
+
+from app.features.symbols import SymbolIndex, normalize, seed_records
+
+SYLLABLES = "ba be co da di fa ge ka li lo ma mi na no pa ra ri sa so ta te vi xo zu"
+SUFFIXES = ["Inc.", "Corp.", "Holdings", "Group", "Therapeutics", "Bancorp", "Energy"]
+
+
+def filler_records(n: int, rng: np.random.Generator) -> list:
+    syllables = SYLLABLES.split()
+    records = []
+    for i in range(n):
+        word = "".join(rng.choice(syllables, rng.integers(2, 5))).capitalize()
+        name = f"{word} {rng.choice(SUFFIXES)}"
+        records.append({"symbol": f"X{i:05d}", "name": name, "aliases": []})
+    return records
+
+
+def typo(text: str, rng: np.random.Generator) -> str:
+    i = int(rng.integers(0, len(text)))
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        return text[:i] + text[i + 1 :]
+    if kind == 1:
+        return text[:i] + text[i] + text[i:]
+    if kind == 2 and i < len(text) - 1:
+        return text[:i] + text[i + 1] + text[i] + text[i + 2 :]
+    return text[:i] + rng.choice(list(string.ascii_lowercase)) + text[i + 1 :]
+
+
+def run(filler: int, queries: int, seed: int = 7) -> None:
+    rng = np.random.default_rng(seed)
+    seeds = seed_records()
+
+    start = time.perf_counter()
+    index = SymbolIndex(seeds + filler_records(filler, rng))
+    build = time.perf_counter() - start
+
+    targets = [
+        (record["symbol"], normalize(text))
+        for record in seeds
+        for text in [record["name"], *record["aliases"]]
+        if len(normalize(text)) >= 5
+    ]
+    picks = rng.integers(0, len(targets), queries)
+    cases = [(targets[i][0], typo(targets[i][1], rng)) for i in picks]
+
+    index.search("warm up")
+    top1 = top5 = 0
+    latencies = np.empty(len(cases))
+    for n, (symbol, query) in enumerate(cases):
+        start = time.perf_counter()
+        matches = index.search(query)
+        latencies[n] = time.perf_counter() - start
+        symbols = [match.symbol for match in matches]
+        top1 += symbols[:1] == [symbol]
+        top5 += symbol in symbols
+
+    print(f"{len(index):,} symbols, {len(index.keys):,} names, built in {build:.2f} s")
+    print(f"{len(cases):,} misspelled queries")
+    print(f"recall@1 {top1 / len(cases):.1%}  recall@5 {top5 / len(cases):.1%}")
+    p50, p99 = np.percentile(latencies * 1e6, [50, 99])
+    print(f"latency p50 {p50:.0f} us  p99 {p99:.0f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filler", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.filler, args.queries)
@@ -0,0 +1,48 @@
+"""
+Synthetic daily OHLCV for the benchmarks, so they run without network access or keys.
+
+Closes follow a geometric random walk with slowly varying volatility; highs and lows
+spread around the close by a random fraction of it.
+"""
+
+import numpy as np
+import pandas as pd
+
+DAYS = 504  # two years of sessions
+
+
+def synthetic_ohlcv(symbols: int = 1, days: int = DAYS, seed: int = 7) -> pd.DataFrame:
+    """
+    OHLCV for `symbols` symbols named SYM00000, SYM00001, ...
+
+    Returns:
+        pd.DataFrame: Indexed by (symbol, date), like `fetch_many`.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    vol = 0.015 * np.exp(
+        np.cumsum(rng.normal(0, 0.05, (symbols, days)), axis=1).clip(-1, 1)
+    )
+    close = 100 * np.exp(
+        np.cumsum(rng.normal(0.0003, 1, (symbols, days)) * vol, axis=1)
+    )
+    spread = np.abs(rng.normal(0, 1, (symbols, days))) * vol * close
+    data = {
+        "open": close * (1 + rng.normal(0, 0.3, close.shape) * vol),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(100_000, 50_000_000, close.shape),
+    }
+    data["high"] = np.maximum.reduce([data["high"], data["open"], close])
+    data["low"] = np.minimum.reduce([data["low"], data["open"], close])
+
+    index = pd.MultiIndex.from_product(
+        [[f"SYM{i:05d}" for i in range(symbols)], dates], names=["symbol", "date"]
+    )
+    return pd.DataFrame({k: v.ravel() for k, v in data.items()}, index=index)
+
+
+def synthetic_prices(days: int = DAYS, seed: int = 7) -> pd.DataFrame:
+    """One symbol's OHLCV indexed by date."""
+    return synthetic_ohlcv(1, days, seed).xs("SYM00000", level="symbol")
@@ -0,0 +1,43 @@
+"""
+Time the Monte Carlo trade simulator and check its probabilities converge.
+
+Runs `simulate_trade` on synthetic history for a range of path counts. The target is
+under a second for 50,000 paths.
+
+    python -m benchmarks.trade_simulation --horizon 60
+"""
+
+import time
+import argparse
+
+from app.features.simulation import simulate_trade
+from benchmarks.synthetic import synthetic_prices
+
+
+def run(horizon: int, repeats: int) -> None:
+    prices = synthetic_prices()
+    entry = float(prices["close"].iloc[-1])
+    stop = entry * 0.95
+
+    print(f"{'paths':>8}{'best s':>9}{'P(1R)':>8}{'P(2R)':>8}{'E[R] 2R':>9}")
+    for n_paths in (1_000, 10_000, 50_000, 100_000):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = simulate_trade(
+                prices, entry, stop, horizon=horizon, n_paths=n_paths
+            )
+            timings.append(time.perf_counter() - start)
+        p1, p2 = result["p_target_first"].iloc[:2]
+        print(
+            f"{n_paths:>8}{min(timings):>9.3f}{p1:>8.3f}{p2:>8.3f}"
+            f"{result['expected_r'].iloc[1]:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--horizon", type=int, default=60)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.horizon, args.repeats)
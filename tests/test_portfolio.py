@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from app.features import portfolio
+from app.features.portfolio import (
+    analyze_returns,
+    covariance_matrix,
+    inverse_volatility_weights,
+    risk_contributions,
+    risk_parity_error,
+    risk_parity_weights,
+)
+
+
+def test_risk_parity_with_a_hedge():
+    # The second asset hedges the first.
+    cov = np.array(
+        [
+            [0.04, -0.03, 0.01],
+            [-0.03, 0.09, 0.00],
+            [0.01, 0.00, 0.02],
+        ]
+    )
+    weights = risk_parity_weights(cov)
+
+    assert np.isfinite(weights).all()
+    assert (weights > 0).all()
+    assert np.isclose(weights.sum(), 1)
+    assert np.allclose(risk_contributions(weights, cov), 1 / 3, atol=1e-6)
+
+
+def test_risk_parity_with_a_hedged_common_factor():
+    # One factor with mixed-sign loadings and little idiosyncratic noise, so many
+    # positions hedge each other and the covariance is close to singular.
+    rng = np.random.default_rng(3)
+    factor = rng.normal(0, 0.01, (252, 1))
+    loadings = rng.uniform(-1.5, 1.5, (1, 200))
+    cov = covariance_matrix(factor @ loadings + rng.normal(0, 0.003, (252, 200)))
+    weights = risk_parity_weights(cov)
+
+    assert (weights > 0).all()
+    assert risk_parity_error(weights, cov) < 1e-6
+
+
+def test_risk_parity_matches_inverse_volatility_when_uncorrelated():
+    cov = np.diag([0.04, 0.09, 0.01])
+    assert np.allclose(risk_parity_weights(cov), inverse_volatility_weights(cov))
+
+
+def test_analyze_returns_with_a_negatively_correlated_asset():
+    rng = np.random.default_rng(1)
+    market = rng.normal(0, 0.01, 250)
+    returns = pd.DataFrame(
+        {
+            "AAA": market + rng.normal(0, 0.005, 250),
+            "BBB": market + rng.normal(0, 0.008, 250),
+            "HEDGE": -market + rng.normal(0, 0.004, 250),
+        }
+    )
+    table, corr, stats = analyze_returns(returns)
+
+    assert corr.loc["AAA", "HEDGE"] < -0.5
+    assert not stats["risk_parity_fallback"]
+    assert np.isfinite(table["weight_risk_parity"]).all()
+    assert np.allclose(table["risk_share_risk_parity"], 1 / 3, atol=1e-6)
+
+
+def test_analyze_returns_falls_back_to_inverse_volatility(monkeypatch):
+    rng = np.random.default_rng(2)
+    returns = pd.DataFrame(
+        {
+            "AAA": rng.normal(0, 0.01, 100),
+            "BBB": rng.normal(0, 0.02, 100),
+        }
+    )
+    cov = np.cov(returns.to_numpy(), rowvar=False)
+    monkeypatch.setattr(portfolio, "risk_parity_weights", lambda _: np.full(2, np.nan))
+    table, _, stats = analyze_returns(returns)
+
+    assert stats["risk_parity_fallback"]
+    assert np.allclose(
+        table.set_index("symbol")["weight_risk_parity"],
+        inverse_volatility_weights(cov),
+    )
+
+
+def test_analyze_returns_falls_back_when_not_risk_parity(monkeypatch):
+    rng = np.random.default_rng(4)
+    returns = pd.DataFrame(
+        {
+            "AAA": rng.normal(0, 0.01, 100),
+            "BBB": rng.normal(0, 0.03, 100),
+        }
+    )
+    # Finite, but equal weights are far from equal risk here.
+    monkeypatch.setattr(portfolio, "risk_parity_weights", lambda _: np.full(2, 0.5))
+    table, _, stats = analyze_returns(returns)
+
+    assert stats["risk_parity_fallback"]